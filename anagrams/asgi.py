@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'anagrams.settings')
 
 application = get_asgi_application()
+
+# Warm up the configured anagram corpora once per server process,
+# so the first requests don't pay the Trie build cost.
+from service_anagrams.utils import preload_corpora  # noqa: E402
+
+preload_corpora()
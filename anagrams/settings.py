@@ -162,4 +162,124 @@ LOGGING = {
             'level': 'INFO',
         },
     },
-}
\ No newline at end of file
+}
+
+# Anagram corpora loaded once per process at server startup (wsgi/asgi).
+# Maps a language code to a list of corpus keys from service_anagrams.utils.CORPORA,
+# or "*" for all of them. Corpora not listed here are loaded lazily on first use
+# and then kept warm for the lifetime of the process.
+ANAGRAM_PRELOAD_CORPORA = {
+    "it": ["1000_parole_italiane_comuni", "60000_parole_italiane"],
+    "en": ["top-5k"],
+}
+
+# Word index used by the anagram generator: "dict" (nested-dict Trie)
+# or "dafsa" (minimized, array-backed word graph, much smaller in memory).
+ANAGRAM_TRIE_BACKEND = "dafsa"
+
+# Where `manage.py build_corpora` writes the precompiled binary corpus indexes.
+# With the "dafsa" backend they are memory-mapped at load time (shared by all
+# workers on the host) instead of parsing the text corpora in every process.
+ANAGRAM_COMPILED_DIR = BASE_DIR / "service_anagrams" / "data" / "compiled"
+
+# Letters of each language. Corpus words and inputs are lowercased, then
+# accented letters are folded onto their base letter ("città" -> "citta")
+# unless "fold_accents" is False; "folding" adds or overrides rules and any
+# other character is dropped. Accented letters listed in "letters" count as
+# distinct letters. Folding happens when the corpus is loaded or compiled
+# (rerun `manage.py build_corpora --force` after a change); results keep the
+# corpus spellings.
+ANAGRAM_ALPHABETS = {
+    "it": {"letters": "abcdefghijklmnopqrstuvwxyz", "fold_accents": True},
+    "en": {"letters": "abcdefghijklmnopqrstuvwxyz", "fold_accents": True},
+}
+
+# Default anagram search strategy: "trie" (letter-by-letter walk of the word
+# index), "signature" (combinations of alphagram signatures, much faster on
+# inputs with many anagram-rich sub-words) or "ranked" (signatures again, the
+# best phrases of the most common words only, by frequency rank: suited to
+# the large English corpora). Can be overridden per request.
+ANAGRAM_SEARCH_MODE = "trie"
+
+# Leftover letter multisets remembered per corpus as dead ends (no anagram
+# can be completed from them), shared across requests. LRU-evicted; 0 disables.
+ANAGRAM_DEAD_END_TABLE_SIZE = 100000
+
+# Worker processes used to split each "trie" search by first word (0 or 1 =
+# serial search). The pool is forked once per corpus and reused; results are
+# the same as the serial search.
+ANAGRAM_PARALLEL_WORKERS = 0
+
+# Django caches. "anagrams" holds generate_anagrams results keyed by sorted
+# letters, corpus and options. It is file based so that every server worker
+# and the Telegram bot share hits; any backend works (locmem for a single
+# process, or a memcached/redis server). MAX_ENTRIES bounds its size: past
+# it, 1/CULL_FREQUENCY of the entries are evicted.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "anagrams": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "anagrams",
+        "TIMEOUT": 7 * 24 * 3600,
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+}
+
+# Cache alias (from CACHES) used for anagram results; None disables caching.
+ANAGRAM_RESULT_CACHE = "anagrams"
+
+# Directory of the lock files that let server processes wait for an
+# identical search already running in another process, then read its result
+# from the result cache. None coalesces identical searches within each
+# process only.
+ANAGRAM_SINGLE_FLIGHT_LOCK_DIR = BASE_DIR / "cache" / "locks"
+
+# Background hint searches (/anagrams/jobs/): jobs run at the same time and
+# jobs queued or running per process before new ones are refused (HTTP 503),
+# seconds a job record is kept, and the cache alias holding job records
+# (a shared one lets any server process answer polls for any job).
+ANAGRAM_JOB_WORKERS = 2
+ANAGRAM_JOB_MAX_PENDING = 20
+ANAGRAM_JOB_TTL = 3600
+ANAGRAM_JOB_CACHE = "anagrams"
+
+# Cache alias (from CACHES) where each client's latest hint search is
+# recorded, so a newer search cancels the older one even when another server
+# process runs it. None only supersedes searches within the same process.
+ANAGRAM_SUPERSEDE_CACHE = "anagrams"
+
+# Every search is counted in the metrics served at /anagrams/metrics/ (per
+# process, Prometheus text format) to staff users and to scrapers sending
+# "Authorization: Bearer <ANAGRAM_METRICS_TOKEN>" (unset: staff only).
+# Logging of each search (start, progress inside the search loop, summary)
+# is off by default, so that the search loop makes no logging calls at all.
+ANAGRAM_METRICS_TOKEN = os.getenv("ANAGRAM_METRICS_TOKEN")
+ANAGRAM_SEARCH_LOGGING = False
+
+# Staff users can profile a hint search by adding ?profile=1 to the request;
+# profiles are listed in the admin. Only the newest ANAGRAM_PROFILE_MAX_COUNT
+# are kept, for at most ANAGRAM_PROFILE_RETENTION_DAYS (0 = no limit).
+ANAGRAM_PROFILE_MAX_COUNT = 100
+ANAGRAM_PROFILE_RETENTION_DAYS = 14
+
+# Telegram bot: searches running at the same time (the others wait their
+# turn, and a new word from a chat replaces that chat's pending search),
+# and anagrams returned per search.
+TELEGRAM_MAX_CONCURRENT_SEARCHES = 2
+TELEGRAM_MAX_RESULTS = 500
+
+# Telegram bot results are sent one page at a time with navigation buttons:
+# anagrams per page, seconds a result set stays browsable, and the cache
+# alias holding result sets.
+TELEGRAM_PAGE_SIZE = 50
+TELEGRAM_RESULTS_TTL = 3600
+TELEGRAM_RESULTS_CACHE = "anagrams"
+
+# Minimum seconds between two messages sent or edited by the bot; on a
+# flood-wait error the bot pauses as long as Telegram asks, then retries.
+TELEGRAM_SEND_INTERVAL = 0.05
@@ -20,6 +20,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const settingsMaxLengthInput = document.getElementById('settings-max-length');
     const settingsPrioritizeLong = document.getElementById('settings-prioritize-long');
     const settingsMaxResults     = document.getElementById('settings-max-results');
+    const settingsMaxWords       = document.getElementById('settings-max-words');
+    const settingsExactWords     = document.getElementById('settings-exact-words');
     const settingsSaveBtn        = document.getElementById('settings-save');
     const settingsCancelBtn      = document.getElementById('settings-cancel');
     
@@ -237,6 +239,48 @@ document.addEventListener('DOMContentLoaded', function() {
       });
     }
 
+    // Read a newline-delimited JSON response, calling onMessage for each line
+    // as soon as it arrives
+    function readNdjson(response, onMessage) {
+      const reader  = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      function pump() {
+        return reader.read().then(({ done, value }) => {
+          if (value) {
+            buffer += decoder.decode(value, { stream: true });
+          }
+          const lines = buffer.split('\n');
+          buffer = done ? '' : lines.pop();
+          lines.filter(line => line.trim()).forEach(line => onMessage(JSON.parse(line)));
+          if (!done) return pump();
+        });
+      }
+      return pump();
+    }
+
+    function showHintsStats(data) {
+      hintsStats.classList.add('active');
+      const res_found = ngettext("%s result found for unused characters", "%s results found for unused characters", data.n_results).replace('%s', data.n_results);
+      const recursions = gettext("Recursive calls: %s").replace('%s', data.recursions);
+      hintsStats.innerHTML = `<span>${res_found}</span><span class="recursions">${recursions}</span>`;
+    }
+
+    function appendHint(hint) {
+      const hintItem = document.createElement('span');
+      hintItem.className = 'hint-item';
+      hintItem.textContent = hint;
+      hintsBox.appendChild(hintItem);
+    }
+
+    // Identifies this page to the server: a new hints request cancels the
+    // previous one still running
+    const hintsClientId = (window.crypto && crypto.randomUUID)
+      ? crypto.randomUUID()
+      : Math.random().toString(36).slice(2) + Date.now().toString(36);
+    let hintsController = null;
+
     function fetchHints() {
       // lang
       const lang = document.documentElement.lang || 'it';
@@ -248,26 +292,42 @@ document.addEventListener('DOMContentLoaded', function() {
         alert(gettext("No unused characters to fetch hints for."));
         return;
       }
+      // Drop the previous request, if any: the server stops its search
+      if (hintsController) hintsController.abort();
+      const controller = new AbortController();
+      hintsController = controller;
       // loader
       btnGetHints.innerHTML = '<span class="loader"></span>';
-      fetch(`/anagrams/${lang}/fetch/${unusedChars}`, {
+      hintsBox.innerHTML = '';
+      // Hints are streamed: show each one as soon as the server finds it
+      fetch(`/anagrams/${lang}/fetch/${unusedChars}/stream/?client=${hintsClientId}`, {
             method: 'GET',
             headers: {
                 'X-CSRFToken': getCookie('csrftoken')
-            }
+            },
+            signal: controller.signal
         })
-        .then(response => response.json())
-        .then(data => {
-            if (data.status === 'success') {
-              hintsBox.innerHTML = data.hints_html.map(hint => `<span class="hint-item">${hint}</span>`).join('');
-              btnGetHints.innerHTML = btnGetHints.dataset.text;
-              hintsStats.classList.add('active');
-              const res_found = ngettext("%s result found for unused characters", "%s results found for unused characters", data.n_results).replace('%s', data.n_results);
-              const recursions = gettext("Recursive calls: %s").replace('%s', data.recursions);
-              hintsStats.innerHTML = `<span>${res_found}</span><span class="recursions">${recursions}</span>`;
+        .then(response => readNdjson(response, data => {
+            if (data.type === 'hint') {
+              appendHint(data.hint);
+            } else if (data.type === 'done' && data.status === 'success') {
+              // Long words first: the streamed hints were provisional, show the final ranking
+              if (data.hints) {
+                hintsBox.innerHTML = '';
+                data.hints.forEach(appendHint);
+              }
+              showHintsStats(data);
             }
+        }))
+        .then(() => {
+            if (hintsController === controller) hintsController = null;
+            btnGetHints.innerHTML = btnGetHints.dataset.text;
         })
         .catch(error => {
+            // Superseded by a newer request, which owns the button now
+            if (error.name === 'AbortError') return;
+            if (hintsController === controller) hintsController = null;
+            btnGetHints.innerHTML = btnGetHints.dataset.text;
             alert('Network or server error: ' + error);
         });
     }
@@ -324,6 +384,12 @@ document.addEventListener('DOMContentLoaded', function() {
       if (settingsPrioritizeLong && typeof settings.prioritize_long_words !== 'undefined') {
         settingsPrioritizeLong.checked = !!settings.prioritize_long_words;
       }
+      if (settingsMaxWords && typeof settings.max_words !== 'undefined') {
+        settingsMaxWords.value = settings.max_words;
+      }
+      if (settingsExactWords && typeof settings.exact_words !== 'undefined') {
+        settingsExactWords.checked = !!settings.exact_words;
+      }
     }
 
     function loadUserSettings() {
@@ -376,6 +442,8 @@ document.addEventListener('DOMContentLoaded', function() {
         max_word_length: settingsMaxLengthInput ? settingsMaxLengthInput.value : undefined,
         prioritize_long_words: settingsPrioritizeLong ? settingsPrioritizeLong.checked : true,
         max_results: settingsMaxResults ? settingsMaxResults.value : undefined,
+        max_words: settingsMaxWords ? settingsMaxWords.value : undefined,
+        exact_words: settingsExactWords ? settingsExactWords.checked : false,
       };
 
       // If the user is not authenticated, store preferences in a cookie only.
@@ -448,6 +516,8 @@ document.addEventListener('DOMContentLoaded', function() {
       max_word_length: settings.max_word_length,
       prioritize_long_words: settings.prioritize_long_words,
       max_results: settings.max_results,
+      max_words: settings.max_words,
+      exact_words: settings.exact_words,
     };
 
     try {
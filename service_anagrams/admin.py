@@ -1,3 +1,40 @@
 from django.contrib import admin
+from django.http import HttpResponse
+from django.utils.html import format_html
 
-# Register your models here.
+from . import models
+
+
+@admin.register(models.SearchProfile)
+class SearchProfileAdmin(admin.ModelAdmin):
+    """Profiles of slow searches captured by staff with ``?profile=1``."""
+
+    list_display = ("created_at", "chars", "lang", "corpus_key", "search_mode", "elapsed_s", "nodes", "prunes", "results", "stopped", "user")
+    list_filter = ("lang", "corpus_key", "search_mode", "stopped")
+    search_fields = ("chars",)
+    date_hierarchy = "created_at"
+    exclude = ("raw_stats", "report")
+    readonly_fields = (
+        "created_at", "user", "chars", "lang", "corpus_key", "search_mode", "options",
+        "elapsed_s", "nodes", "prunes", "results", "stopped", "telemetry", "profile_report",
+    )
+    actions = ["download_stats"]
+
+    def has_add_permission(self, request):
+        # Profiles only come from profiled searches
+        return False
+
+    @admin.display(description="Profile")
+    def profile_report(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.report)
+
+    @admin.action(description="Download the pstats file of the selected profile")
+    def download_stats(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Select exactly one profile to download.", level="warning")
+            return None
+        profile = queryset.get()
+        # Readable with pstats.Stats(path), or tools like snakeviz
+        response = HttpResponse(bytes(profile.raw_stats), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="search-profile-{profile.pk}.prof"'
+        return response
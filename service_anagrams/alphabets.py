@@ -0,0 +1,115 @@
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+
+# Letters of the languages without an entry in settings.ANAGRAM_ALPHABETS
+DEFAULT_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+# Letters that don't decompose into a base letter plus accents
+LIGATURES = {"æ": "ae", "œ": "oe", "ß": "ss", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th"}
+
+
+def accent_folding(letters):
+    """
+    Return the accent folding rules towards ``letters``: every Latin letter
+    with diacritics (and a few ligatures) maps to its base letters, e.g.
+    "à" -> "a", "ç" -> "c", "æ" -> "ae".
+
+    Args:
+        letters (str): Letters to fold into; rules whose result uses other
+            letters are left out
+    """
+    folding = {}
+    for code in range(0xC0, 0x250):
+        char = chr(code)
+        if char != char.lower():
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", char) if not unicodedata.combining(c))
+        if base != char and base and all(c in letters for c in base):
+            folding[char] = base
+    for char, base in LIGATURES.items():
+        if all(c in letters for c in base):
+            folding[char] = base
+    return folding
+
+
+class _FoldTable(dict):
+    """``str.translate`` table deleting every character it has no entry for."""
+
+    def __missing__(self, code):
+        return None
+
+
+class Alphabet:
+    """
+    Letters a corpus is searched with, and how anything else maps onto them.
+
+    ``fold`` lowercases a string, rewrites characters through the folding
+    rules ("à" -> "a") and drops whatever is left outside the alphabet, in a
+    single ``str.translate`` pass. It is applied to the corpus once, when
+    the index is built, and to each search input: the search itself only
+    ever sees letters of the alphabet.
+    """
+
+    def __init__(self, letters=DEFAULT_LETTERS, folding=None):
+        """
+        Args:
+            letters (str): Letters of the alphabet, lowercase. Accented
+                letters listed here are distinct letters, not folded.
+            folding (dict): Character -> replacement (letters of the
+                alphabet, or "" to drop the character)
+        """
+        self.letters = letters
+        self.folding = {
+            char: base for char, base in (folding or {}).items() if char not in letters
+        }
+        table = _FoldTable((ord(char), base) for char, base in self.folding.items())
+        table.update((ord(letter), letter) for letter in letters)
+        self._table = table
+
+    def fold(self, string):
+        """Return ``string`` reduced to letters of the alphabet."""
+        return unicodedata.normalize("NFC", string).lower().translate(self._table)
+
+    def fold_words(self, words):
+        """
+        Fold a corpus, keeping track of the original spellings.
+
+        Words are lowercased, so capitalised entries ("DNA", "Roman") are
+        searchable like the others; spellings differing only in case count
+        as the same spelling.
+
+        Args:
+            words (iterable): Words of the corpus
+
+        Returns:
+            tuple: ``(folded, spellings)``: the distinct folded words, in
+            order of first appearance, and a dict mapping each folded word
+            that had other spellings to all of its spellings, sorted
+        """
+        folded_words = {}
+        variants = {}
+        for word in words:
+            original = unicodedata.normalize("NFC", word.strip()).lower()
+            folded = original.translate(self._table)
+            if not folded:
+                continue
+            folded_words.setdefault(folded, set()).add(original)
+            if original != folded:
+                variants[folded] = True
+        spellings = {folded: tuple(sorted(folded_words[folded])) for folded in variants}
+        return list(folded_words), spellings
+
+
+@lru_cache(maxsize=None)
+def get_alphabet(lang):
+    """
+    Return the Alphabet of a language, as configured in
+    ``settings.ANAGRAM_ALPHABETS`` (default: a-z with accents folded).
+    """
+    config = (getattr(settings, "ANAGRAM_ALPHABETS", {}) or {}).get(lang, {})
+    letters = config.get("letters", DEFAULT_LETTERS)
+    folding = accent_folding(letters) if config.get("fold_accents", True) else {}
+    folding.update(config.get("folding", {}))
+    return Alphabet(letters, folding)
@@ -1,6 +1,19 @@
+import heapq
+from itertools import count, islice, product
+import logging
+import math
+import multiprocessing
 from random import randrange
+import sys
+import threading
 import time
 
+from .alphabets import Alphabet
+from .memo import MIN_MEMO_LETTERS, DeadEndTable, multiset_key
+from .signatures import SignatureIndex
+
+logger = logging.getLogger(__name__)
+
 class Trie:
     """
     Trie (prefix tree) data structure for efficient word storage and lookup.
@@ -10,17 +23,33 @@ class Trie:
     def __init__(self):
         """Initialize the Trie with an empty root dictionary."""
         self.root = {}
+        # Subtree annotations for the search, computed on first use
+        self._prune_tables = None
+        self._max_word_length = None
+        # Stored (folded) word -> original spellings
+        self.spellings = {}
+        # Names of the corpus sources, bit i of a word's tags is source i
+        self.sources = ()
+        # Word -> frequency rank (0 = most common)
+        self.ranks = {}
 
-    def add(self, word):
+    def add(self, word, tags=0, rank=None):
         """
         Add a word to the Trie.
         
         Args:
             word (str): The word to add to the Trie
+            tags (int): Bitmask of the sources the word comes from, merged
+                with the tags of earlier additions of the same word
+            rank (int): Frequency rank of the word (0 = most common); by
+                default the order words are first added in
         """
-        self.__add(self.root, word[0], word[1:])
+        self._prune_tables = None
+        self._max_word_length = None
+        self.ranks.setdefault(word, len(self.ranks) if rank is None else rank)
+        self.__add(self.root, word[0], word[1:], tags)
 
-    def __add(self, node, prefix, suffix):
+    def __add(self, node, prefix, suffix, tags):
         """
         Private recursive method to add a word to the Trie.
         
@@ -28,18 +57,19 @@ class Trie:
             node (dict): Current Trie node
             prefix (str): Current character to add
             suffix (str): Remaining characters of the word
+            tags (int): Source bitmask of the word
         """
         if prefix not in node:
             node[prefix] = {}
         
         if suffix == "":
-            # Empty string marks the end of a valid word
-            node[prefix][suffix] = ""
+            # Empty string marks the end of a valid word, holding its tags
+            node[prefix][suffix] = node[prefix].get(suffix, 0) | tags
         else:
             # Continue recursively with next character
             new_prefix = suffix[0]
             new_suffix = suffix[1:]
-            self.__add(node[prefix], new_prefix, new_suffix)
+            self.__add(node[prefix], new_prefix, new_suffix, tags)
 
     def __contains__(self, word):
         """
@@ -61,6 +91,120 @@ class Trie:
             pass
         return False
 
+    def word_tags(self, word):
+        """Return the tags bitmask of ``word`` (0 if it isn't stored)."""
+        node = self.root
+        for letter in word:
+            node = node.get(letter)
+            if node is None:
+                return 0
+        return node.get('', 0)
+
+    def word_ranks(self):
+        """Yield ``(word, rank)`` for every word stored in the Trie."""
+        ranks = self.ranks
+        for word in self.words():
+            yield word, ranks.get(word, len(ranks))
+
+    # Follow the edge labelled ``letter`` out of ``node``, returning the
+    # child node or None: a plain dict lookup, bound without a Python-level
+    # frame since it runs once per visited node during the search.
+    child = staticmethod(dict.get)
+
+    def is_word(self, node):
+        """Return True if a word ends at ``node``."""
+        return '' in node
+
+    def compile(self):
+        """No-op, the dict Trie is usable as soon as words are added."""
+
+    @property
+    def max_word_length(self):
+        """Length of the longest word stored in the Trie, computed once."""
+        if self._max_word_length is None:
+            self._max_word_length = max((len(word) for word in self.words()), default=0)
+        return self._max_word_length
+
+    def prune_tables(self):
+        """
+        Return fast lookups for per-node subtree annotations used by the search.
+
+        - ``min_len(node)``: fewest letters needed to finish a word from node
+          (0 if a word ends there)
+        - ``required(node)``: bitmask of the letters used by *every* word
+          completion below node
+        - ``bits``: maps each letter to its bit in the required masks
+
+        Returns:
+            tuple: ``(min_len, required, bits)``
+        """
+        if self._prune_tables is not None:
+            return self._prune_tables
+
+        # Pre-order listing; walking it backwards visits children before parents
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for key, child in node.items() if key != '')
+
+        letters = sorted({key for node in order for key in node if key != ''})
+        bits = {letter: 1 << bit for bit, letter in enumerate(letters) if bit < 64}
+
+        min_len = {}
+        required = {}
+        for node in reversed(order):
+            if '' in node:
+                min_len[id(node)] = 0
+                required[id(node)] = 0
+                continue
+            node_required = -1
+            node_min_len = 255
+            for key, child in node.items():
+                node_required &= bits.get(key, 0) | required[id(child)]
+                node_min_len = min(node_min_len, min_len[id(child)] + 1)
+            min_len[id(node)] = node_min_len
+            required[id(node)] = node_required if node_required != -1 else 0
+
+        self._prune_tables = (
+            lambda node: min_len[id(node)],
+            lambda node: required[id(node)],
+            bits,
+        )
+        return self._prune_tables
+
+    def words(self):
+        """Yield every word stored in the Trie."""
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            for key, child in node.items():
+                if key == '':
+                    yield prefix
+                else:
+                    stack.append((child, prefix + key))
+
+    @property
+    def node_count(self):
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(child for key, child in node.items() if key != '')
+        return count
+
+    def memory_usage(self):
+        """Return the approximate size in bytes of all the node dicts."""
+        total = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node)
+            stack.extend(child for key, child in node.items() if key != '')
+        return total
+
 
 class AnagramGenerator:
     """
@@ -68,23 +212,127 @@ class AnagramGenerator:
     using exactly the letters from a given string.
     """
     
-    def __init__(self, corpus, corpus_name: str | None = None):
+    def __init__(
+        self,
+        corpus,
+        corpus_name: str | None = None,
+        trie_class=None,
+        index=None,
+        dead_end_table_size: int = 100000,
+        alphabet: Alphabet | None = None,
+        log_searches: bool = False,
+    ):
         """
         Initialize the generator with a word corpus.
         
         Args:
             corpus (list): List of words to use for generating anagrams
+            corpus_name (str): Optional human-readable corpus identifier
+            trie_class (type): Word index implementation, ``Trie`` (default)
+                or any class with the same add/child/is_word interface,
+                such as ``dafsa.Dafsa``
+            index: Optional already built word index (e.g. a memory-mapped
+                ``Dafsa``, or one built by ``utils.build_corpus_index``) with
+                folded words, spellings and source tags; when given,
+                ``corpus`` is ignored
+            dead_end_table_size (int): Leftover letter multisets remembered
+                as dead ends across searches (0 disables the table)
+            alphabet (Alphabet): Letters of the language and folding rules
+                (default: a-z with accents folded). The corpus is stored
+                folded; original spellings come back in the results.
+            log_searches (bool): Log the start, progress and end of every
+                search (default: False). When off, the search loop makes
+                no logging calls at all; per-search figures are still
+                returned as ``telemetry`` (see ``generate``).
         """
-        self.t = Trie()
         # Optional human-readable identifier for the corpus being used
         self.corpus_name = corpus_name
-        word_count = 0
-        print(f"Loading corpus...")
-        for word in corpus:
-            word = word.rstrip()
+        self.log_searches = log_searches
+        # Alphagram index for the "signature" search mode, built on first use
+        self._signatures = None
+        self._signatures_lock = threading.Lock()
+        # Leftover letter multisets known to have no solution, shared by all
+        # the searches on this corpus
+        self.dead_ends = DeadEndTable(dead_end_table_size)
+        # Worker processes for parallel searches, started on first use
+        self._pool = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+        self._cancel_flags = None
+        # Slots of _cancel_flags not used by a running parallel search
+        self._free_cancel_slots = list(range(CANCEL_SLOTS))
+        self._cancel_slots_freed = threading.Condition()
+        self._cancel_generations = count(1)
+        self.alphabet = alphabet or Alphabet()
+        if index is not None:
+            self.t = index
+            # Folded at build time, see Alphabet.fold_words
+            self.spellings = getattr(index, "spellings", {})
+            return
+
+        self.t = (trie_class or Trie)()
+        logger.info("Loading corpus %s", corpus_name or "")
+        words, self.spellings = self.alphabet.fold_words(corpus)
+        for word in words:
             self.t.add(word)
-            word_count += 1
-        print(f"Loaded {word_count} words into Trie")
+        self.t.spellings = self.spellings
+        word_count = len(words)
+        self.t.compile()
+        logger.info("Loaded %d words into %s", word_count, type(self.t).__name__)
+
+    @property
+    def signatures(self):
+        """Words of the corpus grouped by alphagram signature (built lazily)."""
+        if self._signatures is None:
+            with self._signatures_lock:
+                if self._signatures is None:
+                    ranks = dict(self.t.word_ranks())
+                    self._signatures = SignatureIndex(ranks, self.spellings, ranks)
+        return self._signatures
+
+    def normalize(self, string):
+        """
+        Normalize an input string: lowercase, folded and reduced to the
+        letters of the alphabet (see ``Alphabet.fold``).
+
+        Args:
+            string (str): The raw input
+
+        Returns:
+            str: The letters to build anagrams from
+        """
+        return self.alphabet.fold(string)
+
+    def respell(self, phrase):
+        """
+        Turn a phrase of folded words back into the corpus spellings.
+
+        Args:
+            phrase (list): Words as stored in the index
+
+        Yields:
+            list: The phrase once per combination of original spellings
+        """
+        spellings = self.spellings
+        if not any(word in spellings for word in phrase):
+            yield phrase
+            return
+        for words in product(*(spellings.get(word, (word,)) for word in phrase)):
+            yield list(words)
+
+    def word_sources(self, word):
+        """
+        Return the names of the corpus sources ``word`` comes from.
+
+        Args:
+            word (str): A word, in any spelling
+
+        Returns:
+            list: Source names, empty if the word isn't in the corpus or
+            the corpus has no sources recorded
+        """
+        tags = self.t.word_tags(self.normalize(word))
+        return [name for bit, name in enumerate(getattr(self.t, "sources", ())) if tags >> bit & 1]
 
     def frequency_dict(self, string):
         """
@@ -111,6 +359,15 @@ class AnagramGenerator:
         prioritize_long_words: bool = True,
         min_word_length: int | None = None,
         max_word_length: int | None = None,
+        search_mode: str = "trie",
+        grouped: bool = False,
+        top_k: int | None = None,
+        max_words: int | None = None,
+        exact_words: bool = False,
+        workers: int | None = None,
+        cancel=None,
+        progress=None,
+        found=None,
     ):
         """
         Generate all possible anagrams of the given string, sorted to prioritize
@@ -120,94 +377,145 @@ class AnagramGenerator:
             string (str): The string to generate anagrams for
             max_results (int): Maximum number of anagrams to generate (default: 10000)
             timeout (int): Maximum time in seconds before stopping (default: 30)
+            min_word_length (int): Shortest word allowed in a phrase
+            max_word_length (int): Longest word allowed in a phrase
+            search_mode (str): "trie" walks the Trie letter by letter,
+                "signature" searches combinations of alphagram signatures,
+                "ranked" returns the ``top_k`` (or ``max_results``) phrases
+                of most common words, best first (see ``rank_cost``);
+                ``prioritize_long_words`` doesn't apply to it
+            grouped (bool): In "signature" mode, return one compact phrase per
+                combination, e.g. "{amor|mora|roma} ..." (default: False)
+            top_k (int): With ``prioritize_long_words``, search directly for
+                the K best phrases (fewest, hence longest, words) instead of
+                collecting ``max_results`` phrases in search order and sorting
+                them. Phrases that can't beat the current K-th best are cut
+                during the search.
+            max_words (int): Maximum number of words per phrase
+            exact_words (bool): Only return phrases of exactly ``max_words``
+                words (default: False)
+            workers (int): With 2 or more, split a "trie" search across that
+                many processes (see ``parallel_generate``); results are the
+                same as the serial search
+            cancel: Optional object whose ``is_set()`` returning True stops
+                the search early (``stopped`` is then 'cancelled')
+            progress (callable): Optional ``progress(calls, found)`` called
+                regularly during the search with the nodes visited so far
+                and the number of anagrams kept
+            found (callable): Optional ``found(phrase)`` called with every
+                phrase as it is kept, before the search completes. With
+                ``top_k`` or in "ranked" mode these are provisional: each
+                one beat the K-th best at the time, but may be pushed out
+                of the final results by a better one found later
+
+        The word length and word count constraints are enforced by the search
+        itself, so no time or result budget is spent on phrases that would be
+        thrown away.
             
         Returns:
             list: List of anagrams, where each anagram is a list of words
         """
-        # Normalize string: convert to lowercase and remove non-alphabetic characters
-        string = string.lower()
-        for c in string:
-            if c not in 'abcdefghijklmnopqrstuvwxyz':
-                string = string.replace(c, "")
+        string = self.normalize(string)
+        if self.log_searches:
+            logger.info(
+                "Searching anagrams of %r (%d letters) in %s, max %s results, timeout %ss",
+                string, len(string), self.corpus_name, max_results, timeout,
+            )
 
-        print(f"\n=== Starting anagram generation ===")
-        print(f"Input string: '{string}' (length: {len(string)} letters)")
-        print(f"Max results: {max_results}, Timeout: {timeout}s")
-        
         anagrams = []
-        f = self.frequency_dict(string)
-        
-        print(f"Letter frequencies: {f}")
-        
+
         # Track generation progress
         start_time = time.time()
-        stats = {
-            'calls': 0,
-            'completed_words': 0,
-            'max_depth': 0
+        stats = {}
+
+        constraints = {
+            'min_word_length': min_word_length,
+            'max_word_length': max_word_length,
+            'max_words': max_words,
+            'exact_words': exact_words,
         }
-        
+
         # Generate all anagrams with limits
-        try:
-            self.__generate(
-                anagrams,
-                self.t.root,
-                [],
-                "",
-                f,
-                0,
-                max_results,
-                start_time,
+        if workers and workers > 1 and search_mode == "trie":
+            anagrams = self.parallel_generate(
+                string,
+                workers,
+                max_results=max_results,
+                timeout=timeout,
+                top_k=top_k if prioritize_long_words else None,
+                stats=stats,
+                cancel=cancel,
+                progress=progress,
+                found=found,
+                **constraints,
+            )
+        elif search_mode == "ranked":
+            anagrams = self.__ranked(
+                string,
+                top_k or max_results,
                 timeout,
                 stats,
+                dict(constraints, cancel=cancel),
+                progress,
+                found,
             )
-        except TimeoutError as e:
-            print(f"\n⚠️  {e}")
-        except MaxResultsError as e:
-            print(f"\n⚠️  {e}")
-        
-        elapsed = time.time() - start_time
-        print(f"\n=== Generation complete ===")
-        print(f"String: {string}")
-        print(f"Found {len(anagrams)} anagrams in {elapsed:.2f}s")
-        print(f"Recursive calls: {stats['calls']}")
-        print(f"Words completed: {stats['completed_words']}")
-        print(f"Max recursion depth: {stats['max_depth']}")
-
-        # Optionally post-filter by word length constraints
-        if min_word_length is not None or max_word_length is not None:
-            original_count = len(anagrams)
-            anagrams = [
-                phrase
-                for phrase in anagrams
-                if all(
-                    (min_word_length is None or len(word) >= min_word_length)
-                    and (max_word_length is None or len(word) <= max_word_length)
-                    for word in phrase
-                )
-            ]
-            print(
-                f"Filtered anagrams by word length "
-                f"(min={min_word_length}, max={max_word_length}): "
-                f"{original_count} -> {len(anagrams)}"
+        elif prioritize_long_words and top_k:
+            anagrams = self.__top_k(
+                string,
+                top_k,
+                timeout,
+                search_mode,
+                grouped,
+                stats,
+                dict(constraints, cancel=cancel),
+                progress,
+                found,
+            )
+        else:
+            search = self.iter_generate(
+                string,
+                timeout=timeout,
+                search_mode=search_mode,
+                grouped=grouped,
+                stats=stats,
+                cancel=cancel,
+                progress=progress and (lambda calls: progress(calls, len(anagrams))),
+                **constraints,
+            )
+            for phrase in search:
+                anagrams.append(phrase)
+                if found is not None:
+                    found(phrase)
+                if len(anagrams) >= max_results:
+                    stats['stopped'] = 'max_results'
+                    break
+            search.close()
+
+        stats['elapsed'] = time.time() - start_time
+        telemetry = self.telemetry(string, stats, len(anagrams), search_mode)
+        if self.log_searches:
+            logger.info(
+                "Found %d anagrams of %r in %.2fs (%d nodes, %d words completed, %d prunes, "
+                "%d dead ends skipped, depth %d, stopped: %s)",
+                len(anagrams), string, stats['elapsed'], stats['calls'], stats['completed_words'],
+                stats['prunes'], stats['memo_hits'], stats['max_depth'], stats['stopped'],
             )
 
         if len(anagrams) == 0:
-            print("⚠️  No anagrams found. This could mean:")
-            print("   - The word/phrase is too long for the corpus")
-            print("   - The letter combination doesn't form valid words")
+            # Input too long for the corpus, or no valid words in its letters
             return {
                 'success': False,
                 'n_results': 0,
                 'corpus': self.corpus_name,
                 'anagrams': [],
+                'stopped': stats['stopped'],
+                'telemetry': telemetry,
             }
 
         # Sort anagrams to prioritize longer words
         # First by average word length (descending)
         # Then by number of words (ascending - fewer words = longer words)
-        if prioritize_long_words:
-            print(f"Sorting results (prioritizing longer words)...")
+        if prioritize_long_words and search_mode != "ranked":
             anagrams.sort(
                 key=lambda phrase: (
                     -sum(len(word) for word in phrase) / len(phrase),  # Average length descending
@@ -220,87 +528,859 @@ class AnagramGenerator:
             'n_results': len(anagrams),
             'recursion': stats['calls'],
             'words'    : stats['completed_words'],
+            'prunes'   : stats['prunes'],
+            'memo_hits': stats['memo_hits'],
             'anagrams' : anagrams,
             'corpus'   : self.corpus_name,
+            'stopped'  : stats['stopped'],
+            'telemetry': telemetry,
         }
         return result
-        
 
+    def telemetry(self, string, stats, n_results, search_mode="trie"):
+        """
+        Summarize one search for the metrics.
 
-    def __generate(self, anagrams, node, partial_anagram, current_word, f, depth, max_results, start_time, timeout, stats):
+        Args:
+            string (str): The normalized input
+            stats (dict): Statistics filled by the search
+            n_results (int): Anagrams the search returned
+            search_mode (str): "trie", "signature" or "ranked"
+
+        Returns:
+            dict: corpus, mode, input_length, nodes, prunes, memo_hits,
+            results, first_result_s (None without results), elapsed_s and
+            stopped (None, or 'timeout', 'max_results' or 'cancelled': the
+            results may be truncated)
         """
-        Private recursive method to generate anagrams with progress tracking and limits.
-        
-        Explores all possible combinations of valid words that use
-        exactly the available letters in the frequency dictionary.
+        first_result = stats.get('first_result')
+        return {
+            'corpus': self.corpus_name,
+            'mode': search_mode,
+            'input_length': len(string),
+            'nodes': stats['calls'],
+            'prunes': stats['prunes'],
+            'memo_hits': stats['memo_hits'],
+            'results': n_results,
+            'first_result_s': round(first_result, 4) if first_result is not None else None,
+            'elapsed_s': round(stats.get('elapsed', 0.0), 4),
+            'stopped': stats['stopped'],
+        }
         
+
+
+    def iter_generate(
+        self,
+        string,
+        timeout=30,
+        search_mode: str = "trie",
+        grouped: bool = False,
+        stats: dict | None = None,
+        word_cap: list | None = None,
+        cost_cap: list | None = None,
+        min_word_length: int | None = None,
+        max_word_length: int | None = None,
+        max_words: int | None = None,
+        exact_words: bool = False,
+        first_words=None,
+        cancel=None,
+        progress=None,
+    ):
+        """
+        Lazily yield anagrams of the given string as soon as they are found.
+
+        Results come out in search order (no sorting, no result cap): the
+        caller decides how many to consume, and closing the iterator stops
+        the search right away.
+
         Args:
-            anagrams (list): Accumulator list to save found anagrams
-            node (dict): Current node in the Trie
-            partial_anagram (list): List of completed words so far
-            current_word (str): Word being constructed
-            f (dict): Frequency dictionary of remaining letters
-            depth (int): Current recursion depth
-            max_results (int): Maximum number of results before stopping
-            start_time (float): Start timestamp for timeout checking
-            timeout (int): Maximum seconds before timeout
-            stats (dict): Statistics dictionary for tracking progress
-        """
-        # Update statistics
-        stats['calls'] += 1
-        stats['max_depth'] = max(stats['max_depth'], depth)
-        
-        # Check for timeout
-        if time.time() - start_time > timeout:
-            raise TimeoutError(f"Generation stopped: timeout of {timeout}s exceeded")
-        
-        # Check for max results
-        if len(anagrams) >= max_results:
-            raise MaxResultsError(f"Generation stopped: reached max results ({max_results})")
-        
-        # Progress indicator every 100000 calls
-        if stats['calls'] % 100000 == 0:
-            elapsed = time.time() - start_time
-            print(f"  Progress: {stats['calls']} calls, {len(anagrams)} anagrams found, {elapsed:.1f}s elapsed, depth: {depth}")
-        
-        # If we just completed a valid word
-        if '' in node:
-            stats['completed_words'] += 1
-            next_partial_anagram = partial_anagram + [current_word]
-            
-            # If we've used all letters, we have a complete anagram
-            if all([f[key] == 0 for key in f]):
-                anagrams.append(next_partial_anagram)
-                if len(anagrams) % 100 == 0:
-                    print(f"  Found anagram #{len(anagrams)}: {' '.join(next_partial_anagram)}")
-            else:
-                # Otherwise, restart from root to search for next word
-                self.__generate(anagrams, self.t.root, next_partial_anagram, "", f, depth + 1, max_results, start_time, timeout, stats)
-
-        # Try each letter still available
-        for prefix in f:
-            if f[prefix] > 0:  # If letter is still available
-                if prefix in node:  # If letter is a valid path in Trie
-                    new_word = current_word + prefix
-                    
-                    # Condition to maintain lexicographic order and avoid duplicates
-                    # New word must be >= last word in common prefix
-                    if len(partial_anagram) == 0 or new_word >= partial_anagram[-1][:len(new_word)]:
-                        # Use the letter (subtract from frequency)
-                        f[prefix] -= 1
-                        
-                        # Recursion to continue building the word
-                        self.__generate(anagrams, node[prefix], partial_anagram, new_word, f, depth + 1, max_results, start_time, timeout, stats)
-                        
-                        # Restore the letter for other combinations (backtracking)
-                        f[prefix] += 1
-
-
-class TimeoutError(Exception):
-    """Exception raised when generation exceeds timeout limit."""
-    pass
-
-
-class MaxResultsError(Exception):
-    """Exception raised when generation reaches max results limit."""
-    pass
\ No newline at end of file
+            string (str): The string to generate anagrams for
+            timeout (int): Maximum time in seconds before stopping (default: 30)
+            search_mode (str): "trie", "signature" or "ranked", see
+                ``generate``. In "ranked" mode phrases come out cheapest
+                words first, in search order.
+            grouped (bool): Compact "{a|b}" phrases in "signature" mode
+            stats (dict): Optional dictionary filled with the search
+                statistics (calls, completed_words, prunes, memo_hits,
+                max_depth, and 'stopped' set to 'timeout' on timeout or
+                'cancelled' on cancellation)
+            word_cap (list): Optional one-item list holding the maximum number
+                of words per phrase. The consumer may lower it while iterating;
+                branches that can't stay within it are cut from then on.
+            cost_cap (list): In "ranked" mode, optional one-item list with
+                the cost phrases must stay below, read live like
+                ``word_cap``
+            min_word_length (int): Shortest word allowed in a phrase
+            max_word_length (int): Longest word allowed in a phrase
+            max_words (int): Maximum number of words per phrase
+            exact_words (bool): Only yield phrases of exactly ``max_words``
+                words
+            first_words (iterable): In "trie" mode, only explore phrases
+                starting with one of these words (used to split a search)
+            cancel: Optional object whose ``is_set()`` returning True stops
+                the search, checked along with the deadline
+            progress (callable): Optional ``progress(calls)`` called with the
+                nodes visited so far, along with the deadline checks
+
+        Yields:
+            list: One anagram at a time, as a list of words
+        """
+        if stats is None:
+            stats = {}
+        stats.update(_empty_stats())
+
+        f = self.frequency_dict(self.normalize(string))
+        deadline = time.time() + timeout
+        limits = {
+            'min_word_length': min_word_length if min_word_length and min_word_length > 1 else None,
+            'max_word_length': max_word_length or None,
+            'max_words': max_words or None,
+            'exact_words': bool(exact_words and max_words),
+        }
+        # Dead ends found under some constraints don't hold under others
+        memo_scope = tuple(limits.values())
+        if search_mode == "signature":
+            search = self.__search_signatures(
+                f, deadline, stats, grouped, word_cap, memo_scope, limits, cancel, progress
+            )
+        elif search_mode == "ranked":
+            search = self.__search_ranked(f, deadline, stats, cost_cap, limits, cancel, progress)
+        else:
+            search = self.__search(
+                f, deadline, stats, memo_scope, word_cap, first_words, cancel, progress, **limits
+            )
+            if self.spellings:
+                search = self.__respelled(search)
+        start = time.time()
+        try:
+            for phrase in search:
+                if stats['first_result'] is None:
+                    stats['first_result'] = time.time() - start
+                yield phrase
+        finally:
+            search.close()
+            stats['elapsed'] = time.time() - start
+
+    def __respelled(self, search):
+        """Private wrapper giving back the original spellings of a search's phrases."""
+        try:
+            for phrase in search:
+                yield from self.respell(phrase)
+        finally:
+            search.close()
+
+    def __top_k(self, string, k, timeout, search_mode, grouped, stats, constraints, progress=None, found=None):
+        """
+        Private bounded best-first collection of the K best phrases.
+
+        Phrases are ranked like the ``prioritize_long_words`` sort: since every
+        phrase uses the same letters, a higher average word length simply
+        means fewer words, and ties keep search order. The K best seen so far
+        are kept in a bounded heap; once it is full, the search is told (via
+        the word cap) to drop every branch that would need as many words as
+        the current K-th best. ``constraints`` are extra keyword options of
+        ``iter_generate`` (word length and word count limits, first words,
+        cancellation); ``progress`` and ``found`` are the ``generate``
+        callbacks, ``found`` being called for each phrase entering the heap.
+
+        Returns:
+            list: The K best phrases, best first
+        """
+        # Max-heap on (words, discovery order) through negated keys: heap[0] is the worst kept
+        heap = []
+        word_cap = [len(string)]
+        search = self.iter_generate(
+            string,
+            timeout=timeout,
+            search_mode=search_mode,
+            grouped=grouped,
+            stats=stats,
+            word_cap=word_cap,
+            progress=progress and (lambda calls: progress(calls, len(heap))),
+            **constraints,
+        )
+        for seq, phrase in enumerate(search):
+            entry = (-len(phrase), -seq, phrase)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif heapq.heappushpop(heap, entry) is entry:
+                continue
+            if found is not None:
+                found(phrase)
+            if len(heap) == k:
+                word_cap[0] = -heap[0][0] - 1
+        search.close()
+
+        return [phrase for _, _, phrase in sorted(heap, key=lambda entry: (-entry[0], -entry[1]))]
+
+    def __ranked(self, string, k, timeout, stats, constraints, progress=None, found=None):
+        """
+        Private score-bounded collection of the K phrases of lowest cost.
+
+        The cost of a phrase is the sum of the costs of its words, from
+        their frequency rank (see ``signatures.rank_cost``), so phrases of
+        fewer, more common words win; ties keep search order. The K best
+        seen so far are kept in a bounded heap; once it is full, the search
+        is told (via the cost cap) to drop every combination whose cost,
+        or the least it could still cost, reaches the current K-th best.
+        ``constraints``, ``progress`` and ``found`` are as for ``__top_k``.
+
+        Returns:
+            list: The K best phrases, best first
+        """
+        index = self.signatures
+        # Max-heap on (cost, discovery order) through negated keys: heap[0] is the worst kept
+        heap = []
+        cost_cap = [math.inf]
+        search = self.iter_generate(
+            string,
+            timeout=timeout,
+            search_mode="ranked",
+            stats=stats,
+            cost_cap=cost_cap,
+            progress=progress and (lambda calls: progress(calls, len(heap))),
+            **constraints,
+        )
+        for seq, phrase in enumerate(search):
+            cost = index.phrase_cost(phrase)
+            if cost >= cost_cap[0]:
+                continue
+            entry = (-cost, -seq, phrase)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif heapq.heappushpop(heap, entry) is entry:
+                continue
+            if found is not None:
+                found(phrase)
+            if len(heap) == k:
+                cost_cap[0] = -heap[0][0]
+        search.close()
+
+        return [phrase for _, _, phrase in sorted(heap, key=lambda entry: (-entry[0], -entry[1]))]
+
+    def first_words(self, string, min_word_length=None, max_word_length=None):
+        """
+        List the words a "trie" search of the given string can start with.
+
+        Words come in the order the serial search reaches them, so splitting
+        this list into consecutive chunks splits the search results into
+        consecutive runs.
+
+        Args:
+            string (str): The string to generate anagrams for
+            min_word_length (int): Shortest word allowed
+            max_word_length (int): Longest word allowed
+
+        Returns:
+            list: Candidate first words
+        """
+        t = self.t
+        child_of = t.child
+        is_word = t.is_word
+        min_len = t.prune_tables()[0]
+
+        f = self.frequency_dict(self.normalize(string))
+        letters = list(f)
+        counts = [f[letter] for letter in letters]
+        n_letters = len(letters)
+        remaining = sum(counts)
+        shortest = min_word_length or 1
+        max_len = max_word_length or remaining
+
+        words = []
+        # Frames are [node, word, next letter, letter consumed to enter]
+        stack = [[t.root, "", 0, -1]]
+        while stack:
+            frame = stack[-1]
+            node, word, i, _ = frame
+            child = None
+            if len(word) < max_len:
+                while i < n_letters:
+                    if counts[i]:
+                        child = child_of(node, letters[i])
+                        if child is not None and min_len(child) < remaining:
+                            break
+                        child = None
+                    i += 1
+            if child is None:
+                stack.pop()
+                if frame[3] >= 0:
+                    counts[frame[3]] += 1
+                    remaining += 1
+                continue
+
+            frame[2] = i + 1
+            counts[i] -= 1
+            remaining -= 1
+            new_word = word + letters[i]
+            if is_word(child) and len(new_word) >= shortest:
+                words.append(new_word)
+            stack.append([child, new_word, 0, i])
+        return words
+
+    def parallel_generate(
+        self,
+        string,
+        workers,
+        max_results=10000,
+        timeout=30,
+        top_k: int | None = None,
+        stats: dict | None = None,
+        cancel=None,
+        progress=None,
+        found=None,
+        **constraints,
+    ):
+        """
+        Run a "trie" search split by first word across a pool of processes.
+
+        The candidate first words (see ``first_words``) are cut into
+        consecutive chunks, several per worker so that busy and quick chunks
+        even out. Each worker searches the phrases starting with the words of
+        its chunk and the chunks are merged back in order, so the output is
+        exactly the serial one: partitions never overlap, hence no duplicates.
+
+        The pool is forked from this process and kept for later searches:
+        workers share the loaded word index (a memory-mapped ``Dafsa`` is
+        never copied) but each has its own dead end table. The deadline is
+        common to all the workers, and once ``max_results`` phrases are
+        merged the remaining chunks are cancelled.
+
+        Args:
+            string (str): The string to generate anagrams for
+            workers (int): Number of worker processes
+            max_results (int): Maximum number of anagrams to return
+            timeout (int): Maximum time in seconds before stopping
+            top_k (int): Return the ``top_k`` phrases with the fewest words
+                instead, like ``generate`` with ``prioritize_long_words``
+            stats (dict): Optional dictionary filled with the merged
+                statistics of all the chunks
+            cancel: Optional object whose ``is_set()`` returning True stops
+                the search, checked while waiting for chunks
+            progress (callable): Optional ``progress(calls, found)`` called
+                as chunks complete
+            found (callable): Optional ``found(phrase)`` called with the
+                phrases of each chunk as it is merged (with ``top_k``, before
+                the final ranking)
+            **constraints: Word length and word count options of
+                ``iter_generate``
+
+        Returns:
+            list: Anagrams as lists of words, in serial search order (or best
+            first with ``top_k``)
+        """
+        if stats is None:
+            stats = {}
+        stats.update(_empty_stats())
+
+        start = time.time()
+        deadline = start + timeout
+        first = self.first_words(
+            string,
+            constraints.get('min_word_length'),
+            constraints.get('max_word_length'),
+        )
+        if not first:
+            return []
+        n_chunks = min(len(first), workers * CHUNKS_PER_WORKER)
+        chunks = [
+            first[c * len(first) // n_chunks:(c + 1) * len(first) // n_chunks]
+            for c in range(n_chunks)
+        ]
+
+        pool = self.__get_pool(workers)
+        # A chunk runs while its slot holds its search's generation: chunks
+        # of a finished search still queued stay cancelled when a later
+        # search takes the slot over
+        slot = self.__acquire_cancel_slot()
+        generation = next(self._cancel_generations)
+        self._cancel_flags[slot] = generation
+        tasks = [
+            (slot, generation, string, chunk, deadline, max_results, top_k, constraints)
+            for chunk in chunks
+        ]
+
+        anagrams = []
+        results = pool.imap(_search_partition, tasks)
+        try:
+            for c in range(len(tasks)):
+                while True:
+                    try:
+                        phrases, chunk_stats = results.next(timeout=CANCEL_POLL_INTERVAL)
+                        break
+                    except multiprocessing.TimeoutError:
+                        if cancel is not None and cancel.is_set():
+                            stats['stopped'] = 'cancelled'
+                            break
+                if stats['stopped'] == 'cancelled':
+                    break
+
+                for key in ('calls', 'completed_words', 'prunes', 'memo_hits'):
+                    stats[key] += chunk_stats[key]
+                stats['max_depth'] = max(stats['max_depth'], chunk_stats['max_depth'])
+                if chunk_stats['stopped'] == 'timeout':
+                    stats['stopped'] = 'timeout'
+                if phrases and stats['first_result'] is None:
+                    stats['first_result'] = time.time() - start
+
+                if found is not None:
+                    for phrase in phrases if top_k else phrases[:max_results - len(anagrams)]:
+                        found(phrase)
+                if top_k:
+                    # Chunks are in search order: (words, chunk, position) is the serial ranking
+                    anagrams.extend((len(phrase), c, n, phrase) for n, phrase in enumerate(phrases))
+                else:
+                    anagrams.extend(phrases)
+                if progress is not None:
+                    progress(stats['calls'], len(anagrams))
+                if not top_k and len(anagrams) >= max_results:
+                    stats['stopped'] = 'max_results'
+                    del anagrams[max_results:]
+                    break
+        finally:
+            # Chunks still queued or running stop at their next check
+            self._cancel_flags[slot] = 0
+            self.__release_cancel_slot(slot)
+            stats['elapsed'] = time.time() - start
+
+        if top_k:
+            anagrams.sort(key=lambda entry: entry[:3])
+            anagrams = [phrase for _, _, _, phrase in anagrams[:top_k]]
+        return anagrams
+
+    def _search_partition(
+        self, cancel_flags, slot, generation, string, first_words, deadline, max_results, top_k, constraints
+    ):
+        """
+        Search one chunk of a ``parallel_generate`` run, in a pool worker.
+
+        Returns:
+            tuple: ``(phrases, stats)``
+        """
+        stats = {}
+        options = dict(
+            constraints, first_words=first_words, cancel=_CancelFlag(cancel_flags, slot, generation)
+        )
+        timeout = deadline - time.time()
+        if top_k:
+            phrases = self.__top_k(string, top_k, timeout, "trie", False, stats, options)
+        else:
+            search = self.iter_generate(string, timeout=timeout, stats=stats, **options)
+            phrases = list(islice(search, max_results))
+            search.close()
+        return phrases, stats
+
+    def __get_pool(self, workers):
+        """Return the worker pool, (re)starting it with ``workers`` processes if needed."""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers != workers:
+                if self._pool is not None:
+                    self._pool.terminate()
+                # Fork, so that workers inherit the loaded index instead of rebuilding it
+                context = multiprocessing.get_context("fork")
+                self._cancel_flags = context.RawArray('q', CANCEL_SLOTS)
+                self._pool = context.Pool(
+                    workers,
+                    initializer=_init_partition_worker,
+                    initargs=(self, self._cancel_flags),
+                )
+                self._pool_workers = workers
+            return self._pool
+
+    def __acquire_cancel_slot(self):
+        """Private: take a free cancellation slot, waiting for one if all are in use."""
+        with self._cancel_slots_freed:
+            while not self._free_cancel_slots:
+                self._cancel_slots_freed.wait()
+            return self._free_cancel_slots.pop()
+
+    def __release_cancel_slot(self, slot):
+        with self._cancel_slots_freed:
+            self._free_cancel_slots.append(slot)
+            self._cancel_slots_freed.notify()
+
+    def close_pool(self):
+        """Stop the worker processes of parallel searches, if any."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+                self._pool_workers = 0
+
+    def __search_signatures(
+        self,
+        f,
+        deadline,
+        stats,
+        grouped,
+        word_cap=None,
+        memo_scope=(),
+        limits=None,
+        cancel=None,
+        progress=None,
+    ):
+        """
+        Private search over the alphagram signature index.
+
+        Yields phrases as lists of words, expanding each combination of
+        signatures found by ``SignatureIndex.search`` into real words.
+        ``limits`` holds the word length and word count constraints.
+        """
+        index = self.signatures
+        search = index.search(
+            f,
+            deadline,
+            stats,
+            dead_ends=self.dead_ends,
+            memo_scope=memo_scope,
+            word_cap=word_cap,
+            cancel=cancel,
+            progress=progress,
+            **(limits or {}),
+        )
+        for signatures in search:
+            yield from index.expand(signatures, grouped=grouped)
+
+    def __search_ranked(self, f, deadline, stats, cost_cap=None, limits=None, cancel=None, progress=None):
+        """
+        Private search over the signature index, cheapest words first.
+
+        Each combination found by ``SignatureIndex.search_ranked`` is
+        expanded into real words, its cheapest phrases first.
+        """
+        index = self.signatures
+        search = index.search_ranked(
+            f,
+            deadline,
+            stats,
+            cost_cap=cost_cap,
+            cancel=cancel,
+            progress=progress,
+            **(limits or {}),
+        )
+        for _, signatures in search:
+            yield from sorted(index.expand(signatures), key=index.phrase_cost)
+
+    def __search(
+        self,
+        f,
+        deadline,
+        stats,
+        memo_scope=(),
+        word_cap=None,
+        first_words=None,
+        cancel=None,
+        progress=None,
+        min_word_length=None,
+        max_word_length=None,
+        max_words=None,
+        exact_words=False,
+    ):
+        """
+        Private iterative search yielding every anagram as it is found.
+
+        Explores all possible combinations of valid words that use exactly
+        the available letters in the frequency dictionary, with an explicit
+        stack instead of recursion, so long inputs never hit Python's
+        recursion limit. Results come out in the same order as a recursive
+        depth-first walk of the Trie.
+
+        Each stack frame is
+        ``[node, word, next_letter, taken_letter, pushed_word, bound, memo]``:
+        the Trie node reached, the word spelled so far, the index of the next
+        letter to try, the letter consumed to enter the frame (-1 for word
+        restarts from the root), whether the frame pushed a completed word
+        onto the partial anagram, the lowest letter allowed next (None once
+        the word is already past the previous word of the phrase) and, for
+        word restarts, the ``(dead end key, results found before)`` pair used
+        to record leftover letters that lead nowhere.
+
+        Word constraints are part of the walk: a word shorter than
+        ``min_word_length`` doesn't count as a word, nothing is spelled past
+        ``max_word_length`` letters, and a new word is only started if the
+        phrase can still end within ``max_words`` words (and, with
+        ``exact_words``, can still reach that many).
+
+        Args:
+            f (dict): Frequency dictionary of the letters to use
+            deadline (float): ``time.time()`` value after which the search stops
+            stats (dict): Statistics dictionary, updated when the search ends
+            memo_scope (tuple): Search constraints, part of the dead end keys
+            word_cap (list): Optional one-item list with the maximum number of
+                words per phrase, read live (see ``iter_generate``)
+            first_words (iterable): Only explore phrases starting with one of
+                these words
+            cancel: Optional object with an ``is_set()`` method, checked with
+                the deadline
+            progress (callable): Optional ``progress(calls)``, called with
+                the deadline checks
+            min_word_length (int): Shortest word allowed
+            max_word_length (int): Longest word allowed
+            max_words (int): Maximum number of words per phrase
+            exact_words (bool): Only yield phrases of exactly ``max_words`` words
+        """
+        t = self.t
+        child_of = t.child
+        is_word = t.is_word
+        root = t.root
+        min_len, required, bits = t.prune_tables()
+
+        letters = list(f)
+        counts = [f[letter] for letter in letters]
+        n_letters = len(letters)
+        # Running count of unused letters, instead of rescanning the dict
+        remaining = sum(counts)
+        # Bitmask of the letters still available, in the index's bit layout
+        letter_bits = [bits.get(letter, 0) for letter in letters]
+        available = 0
+        for bit in letter_bits:
+            available |= bit
+
+        shortest = min_word_length or 1
+        max_len = max_word_length or remaining
+        # Dead ends depend on how many more words are allowed, if limited
+        count_limited = bool(max_words)
+        # Phrases never need more words than letters
+        max_words = max_words or remaining
+        min_words = max_words if exact_words else 1
+        if word_cap is not None or max_words < remaining:
+            longest = min(t.max_word_length, max_len) or 1
+        else:
+            # No word count limit: the bound below never cuts anything
+            longest = remaining
+
+        # Restrict the first word of the phrase, and its prefixes on the way
+        if first_words is not None:
+            first_words = set(first_words)
+            first_prefixes = {word[:end] for word in first_words for end in range(1, len(word) + 1)}
+
+        dead_ends = self.dead_ends
+        use_memo = dead_ends.max_entries > 0
+        # Under a word cap an empty subtree may only mean "too many words",
+        # so dead ends are looked up but not recorded
+        record_memo = word_cap is None
+        # Letter order used to build canonical dead end keys
+        perm = sorted(range(n_letters), key=letters.__getitem__)
+        sorted_letters = [letters[j] for j in perm]
+
+        partial = []
+        stack = [[root, "", 0, -1, False, None, None]]
+        calls = 1
+        found = 0
+        completed_words = 0
+        prunes = 0
+        memo_hits = 0
+        max_depth = 1
+        budget = CHECK_INTERVAL
+        # Off by default: then the loop makes no logging calls at all
+        log_progress = self.log_searches and logger.isEnabledFor(logging.DEBUG)
+
+        try:
+            while stack:
+                frame = stack[-1]
+                node, word, i, _, _, bound, _ = frame
+                if len(word) >= max_len:
+                    # Longest word allowed: don't spell any further
+                    i = n_letters
+
+                # Find the next letter still available that is a valid path in the Trie.
+                # Condition to maintain lexicographic order and avoid duplicates:
+                # letters below the bound would make the word < the previous one
+                child = None
+                while i < n_letters:
+                    if counts[i] and (bound is None or letters[i] >= bound):
+                        child = child_of(node, letters[i])
+                        if child is not None:
+                            break
+                    i += 1
+
+                if child is None:
+                    # Frame exhausted: backtrack, restoring what it consumed
+                    stack.pop()
+                    if frame[3] >= 0:
+                        counts[frame[3]] += 1
+                        remaining += 1
+                        available |= letter_bits[frame[3]]
+                    if frame[4]:
+                        memo = frame[6]
+                        if memo is not None and found == memo[1]:
+                            # Nothing found after this word: leftover letters are a dead end
+                            dead_ends.record(memo[0], partial[-1])
+                        partial.pop()
+                    continue
+
+                letter = letters[i]
+                new_word = word + letter
+                child_bound = None
+                if letter == bound:
+                    # Still equal to the previous word's prefix: keep bounding
+                    # by its next letter, if it has one
+                    last = partial[-1]
+                    if len(new_word) < len(last):
+                        child_bound = last[len(new_word)]
+
+                frame[2] = i + 1
+                if first_words is not None and not partial and new_word not in first_prefixes:
+                    continue
+                counts[i] -= 1
+                remaining -= 1
+                if not counts[i]:
+                    available &= ~letter_bits[i]
+
+                # Skip subtrees that can't finish a word with the letters left:
+                # too few letters, or some letter every completion needs is gone,
+                # or every word below is too long
+                to_finish = min_len(child)
+                if len(new_word) + to_finish < shortest:
+                    to_finish = shortest - len(new_word)
+                if (
+                    to_finish > remaining
+                    or len(new_word) + to_finish > max_len
+                    or required(child) & ~available
+                ):
+                    prunes += 1
+                    counts[i] += 1
+                    remaining += 1
+                    available |= letter_bits[i]
+                    continue
+
+                calls += 1
+
+                # Deadline check only every CHECK_INTERVAL nodes
+                budget -= 1
+                if not budget:
+                    budget = CHECK_INTERVAL
+                    now = time.time()
+                    if now > deadline:
+                        stats['stopped'] = 'timeout'
+                        return
+                    if cancel is not None and cancel.is_set():
+                        stats['stopped'] = 'cancelled'
+                        return
+                    if progress is not None:
+                        progress(calls)
+                    if log_progress and calls % PROGRESS_INTERVAL < CHECK_INTERVAL:
+                        logger.debug("Search progress: %d nodes, %.1fs left, depth %d", calls, deadline - now, len(stack))
+
+                if (
+                    is_word(child)
+                    and len(new_word) >= shortest
+                    and (first_words is None or partial or new_word in first_words)
+                ):
+                    completed_words += 1
+                    n_words = len(partial) + 1
+                    cap = max_words
+                    if word_cap is not None and word_cap[0] < cap:
+                        cap = word_cap[0]
+                    if not remaining:
+                        # All letters used: complete anagram, nothing left to explore below
+                        counts[i] += 1
+                        remaining += 1
+                        available |= letter_bits[i]
+                        if min_words <= n_words <= cap:
+                            found += 1
+                            yield partial + [new_word]
+                        continue
+                    # Otherwise keep the child for later, and first restart
+                    # from the root to search for the next word, unless the
+                    # leftover letters are a known dead end
+                    stack.append([child, new_word, 0, i, False, child_bound, None])
+                    # Words of the phrase with this one, plus the fewest (or,
+                    # with exact_words, the most) more words the remaining
+                    # letters could make
+                    if (
+                        n_words + -(-remaining // longest) > cap
+                        or n_words + remaining // shortest < min_words
+                    ):
+                        prunes += 1
+                        continue
+                    memo = None
+                    if use_memo and remaining >= MIN_MEMO_LETTERS:
+                        key = (
+                            memo_scope,
+                            multiset_key(sorted_letters, map(counts.__getitem__, perm)),
+                            max_words - n_words if count_limited else None,
+                        )
+                        if dead_ends.is_dead(key, new_word):
+                            memo_hits += 1
+                            continue
+                        if record_memo:
+                            memo = (key, found)
+                    partial.append(new_word)
+                    stack.append([root, "", 0, -1, True, new_word[0], memo])
+                    calls += 1
+                else:
+                    stack.append([child, new_word, 0, i, False, child_bound, None])
+
+                if len(stack) > max_depth:
+                    max_depth = len(stack)
+        finally:
+            stats['calls'] += calls
+            stats['completed_words'] += completed_words
+            stats['prunes'] += prunes
+            stats['memo_hits'] += memo_hits
+            stats['max_depth'] = max(stats['max_depth'], max_depth)
+
+
+def _empty_stats():
+    """Return a fresh search statistics dictionary."""
+    return {
+        'calls': 0,
+        'completed_words': 0,
+        'prunes': 0,
+        'memo_hits': 0,
+        'max_depth': 0,
+        'stopped': None,
+        'first_result': None,
+        'elapsed': 0.0,
+    }
+
+
+class _CancelFlag:
+    """
+    Cancellation token of a parallel search, shared with the pool workers:
+    set once the search's slot no longer holds its generation.
+    """
+
+    def __init__(self, flags, slot, generation):
+        self.flags = flags
+        self.slot = slot
+        self.generation = generation
+
+    def is_set(self):
+        return self.flags[self.slot] != self.generation
+
+
+# State of a parallel search worker process, set when the pool starts
+_partition_generator = None
+_partition_cancel_flags = None
+
+
+def _init_partition_worker(generator, cancel_flags):
+    global _partition_generator, _partition_cancel_flags
+    # The parent's dead end table lock may have been held by another
+    # thread when forking: start from an empty table of the same size
+    generator.dead_ends = DeadEndTable(generator.dead_ends.max_entries)
+    generator._pool = None
+    _partition_generator = generator
+    _partition_cancel_flags = cancel_flags
+
+
+def _search_partition(task):
+    return _partition_generator._search_partition(_partition_cancel_flags, *task)
+
+
+# Number of visited nodes between two deadline checks in the search loop
+CHECK_INTERVAL = 1024
+
+# Approximate number of visited nodes between two progress log lines
+PROGRESS_INTERVAL = 100 * CHECK_INTERVAL
+
+# Chunks of first words per worker in a parallel search
+CHUNKS_PER_WORKER = 8
+
+# Concurrent parallel searches per generator; more wait for a slot to free up
+CANCEL_SLOTS = 64
+
+# Seconds between two cancellation checks while waiting for parallel chunks
+CANCEL_POLL_INTERVAL = 0.25
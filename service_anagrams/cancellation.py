@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two reads of the shared search sequence by a running search
+POLL_INTERVAL = 0.25
+
+
+class SearchToken:
+    """
+    Cancellation token of one hint search.
+
+    Set explicitly (e.g. when the client disconnects) or implicitly, once a
+    newer search from the same client has started, in this process or in
+    another one sharing the cache.
+    """
+
+    def __init__(self, searches=None, client=None, seq=0):
+        self.searches = searches
+        self.client = client
+        self.seq = seq
+        self.event = threading.Event()
+        self._next_check = 0.0
+
+    def set(self):
+        self.event.set()
+
+    def is_set(self):
+        if self.event.is_set():
+            return True
+        if self.client is not None:
+            if self.searches.local_seq(self.client) > self.seq:
+                self.event.set()
+            else:
+                now = time.monotonic()
+                if now >= self._next_check:
+                    self._next_check = now + POLL_INTERVAL
+                    if self.searches.shared_seq(self.client) > self.seq:
+                        self.event.set()
+        return self.event.is_set()
+
+
+class LatestSearches:
+    """
+    Tracks the latest hint search of each client.
+
+    Every search started for a client gets the next number of a per-client
+    sequence, kept both in memory and in a Django cache shared by the
+    server processes; the tokens of older searches then report themselves
+    as set, so the engine drops work nobody will read.
+    """
+
+    def __init__(self, cache_alias=None, ttl=600, max_clients=10000):
+        """
+        Args:
+            cache_alias (str): Django cache alias for the shared sequences,
+                or None to only supersede searches within the process
+            ttl (int): Seconds a client's sequence is kept after its last search
+            max_clients (int): Clients remembered in memory (least recently
+                active ones are forgotten first)
+        """
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self.max_clients = max_clients
+        self._latest = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if not self.cache_alias:
+            return None
+        try:
+            return caches[self.cache_alias]
+        except InvalidCacheBackendError:
+            logger.warning("Search sequence cache %r is not configured in CACHES", self.cache_alias)
+            return None
+
+    @staticmethod
+    def seq_key(client):
+        return f"anagrams:search-seq:{client}"
+
+    def start(self, client):
+        """
+        Register a new search for ``client`` and return its token.
+
+        Args:
+            client (str): Identity of the client (session), or None for a
+                search that can't be superseded
+        """
+        if not client:
+            return SearchToken()
+
+        seq = 0
+        cache = self.cache
+        if cache is not None:
+            key = self.seq_key(client)
+            try:
+                seq = cache.incr(key)
+            except ValueError:
+                cache.add(key, 0, self.ttl)
+                seq = cache.incr(key)
+            cache.touch(key, self.ttl)
+
+        with self._lock:
+            seq = max(seq, self._latest.get(client, 0) + 1)
+            self._latest[client] = seq
+            self._latest.move_to_end(client)
+            while len(self._latest) > self.max_clients:
+                self._latest.popitem(last=False)
+        return SearchToken(self, client, seq)
+
+    def local_seq(self, client):
+        return self._latest.get(client, 0)
+
+    def shared_seq(self, client):
+        cache = self.cache
+        if cache is None:
+            return 0
+        return cache.get(self.seq_key(client), 0)
+
+
+# Hint searches of the web UI, one live search per client
+latest_searches = LatestSearches(getattr(settings, "ANAGRAM_SUPERSEDE_CACHE", None))
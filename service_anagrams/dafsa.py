@@ -0,0 +1,588 @@
+from array import array
+from collections.abc import Mapping
+import mmap
+import os
+import struct
+import sys
+
+# Binary index file layout, see Dafsa.save(). The header is little-endian,
+# the int32 arrays use the native byte order so they can be mapped as-is:
+#   header   MAGIC, FORMAT_VERSION, node count, edge count, word count,
+#            alphabet size in bytes, spelling count, spellings size in
+#            bytes, sources size in bytes
+#   alphabet UTF-8 letters in code order, zero-padded to 4 bytes
+#   int32    edge_start[node count + 1]
+#   int32    targets[edge count]
+#   uint8    labels[edge count]
+#   uint8    finals[node count], zero-padded to 8 bytes
+#   uint64   required[node count]
+#   uint8    min_len[node count], zero-padded to 4 bytes
+#   uint32   word_counts[node count]
+#   uint32   tags[word count]
+#   uint32   ranks[word count]
+#   uint32   spelling_offsets[spelling count + 1], start of each line
+#   spellings UTF-8 lines "word\tspelling\tspelling...", sorted by word, see
+#            Dafsa.spellings
+#   sources  UTF-8 source names, one per line, see Dafsa.sources
+MAGIC = b"ANGRDAFS"
+FORMAT_VERSION = 6
+
+# Subtree annotations (see Dafsa._annotate) track required letters in a
+# 64-bit mask and minimum completion lengths in a byte.
+_MASK_LETTERS = 64
+_MAX_MIN_LEN = 255
+_HEADER = struct.Struct("<8sIIIIIIII")
+
+
+class _BuildState:
+    """Mutable automaton state used only while the DAFSA is being built."""
+
+    __slots__ = ("edges", "final")
+
+    def __init__(self):
+        self.edges = {}
+        self.final = False
+
+
+class _MappedSpellings(Mapping):
+    """
+    Read-only ``word -> spellings`` mapping over the spellings block of a
+    mapped index.
+
+    Lines are sorted by word and located through their offset table, so a
+    lookup is a binary search over the mapping and nothing is decoded
+    until a word is asked for.
+    """
+
+    def __init__(self, data, offsets):
+        """
+        Args:
+            data: The spellings block (bytes-like)
+            offsets: Start of each line in ``data``, plus its end
+        """
+        self._data = data
+        self._offsets = offsets
+
+    def _line(self, i):
+        return bytes(self._data[self._offsets[i]:self._offsets[i + 1] - 1])
+
+    def __getitem__(self, word):
+        key = word.encode("utf-8") + b"\t"
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            line = self._line(middle)
+            if line[:len(key)] == key:
+                return tuple(line[len(key):].decode("utf-8").split("\t"))
+            if line < key:
+                low = middle + 1
+            else:
+                high = middle
+        raise KeyError(word)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._line(i).split(b"\t", 1)[0].decode("utf-8")
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+class Dafsa:
+    """
+    Minimized DAFSA (directed acyclic word graph) stored in flat arrays.
+
+    Same operations as ``Trie`` (``add``, ``in``, child walk), but common
+    suffixes are shared and every node is an integer index into a handful of
+    compact buffers instead of a Python dict:
+
+    - ``edge_start[n] .. edge_start[n + 1]`` is the slice of edges of node n
+    - ``labels`` holds one byte per edge, the letter code (sorted per node)
+    - ``targets`` holds the destination node of each edge
+    - ``finals`` holds one byte per node, 1 if a word ends there
+    - ``word_counts`` holds the number of words ending at or below each
+      node, which numbers the words in alphabetical order (minimal perfect
+      hashing) so ``tags`` and ``ranks`` can hold one value per word
+
+    Words are collected with ``add`` and packed by ``compile()`` (called
+    automatically by ``AnagramGenerator``); the index is read-only afterwards.
+    """
+
+    def __init__(self):
+        """Initialize an empty DAFSA, ready to collect words."""
+        self.root = 0
+        self._pending = {}
+        self._pending_ranks = {}
+        self._compiled = False
+        self.alphabet = ""
+        self._codes = {}
+        self._edge_start = array("i", [0, 0])
+        self._labels = b""
+        self._label_base = 0
+        self._targets = array("i")
+        self._finals = b"\x00"
+        self._required = array("Q", [0])
+        self._min_len = array("B", [_MAX_MIN_LEN])
+        self._word_counts = array("I", [0])
+        self._tags = array("I")
+        self._ranks = array("I")
+        self._max_word_length = None
+        self.word_count = 0
+        # Stored (folded) word -> original spellings, saved with the index
+        self.spellings = {}
+        # Names of the corpus sources, bit i of a word's tags is source i
+        self.sources = ()
+
+    @classmethod
+    def from_words(cls, words):
+        """Build and compile a DAFSA from an iterable of words."""
+        dafsa = cls()
+        for word in words:
+            dafsa.add(word)
+        dafsa.compile()
+        return dafsa
+
+    def add(self, word, tags=0, rank=None):
+        """
+        Add a word to the DAFSA.
+
+        Args:
+            word (str): The word to add
+            tags (int): Bitmask of the sources the word comes from, merged
+                with the tags of earlier additions of the same word
+            rank (int): Frequency rank of the word (0 = most common); by
+                default the order words are first added in
+
+        Raises:
+            RuntimeError: If the index has already been compiled
+        """
+        if self._compiled:
+            raise RuntimeError("Cannot add words to a compiled DAFSA")
+        if word:
+            self._pending[word] = self._pending.get(word, 0) | tags
+            self._pending_ranks.setdefault(word, len(self._pending_ranks) if rank is None else rank)
+
+    def compile(self):
+        """Minimize the collected words and pack them into flat arrays."""
+        if self._compiled:
+            return
+        words = sorted(self._pending)
+        self._tags = array("I", (self._pending[word] for word in words))
+        self._ranks = array("I", (self._pending_ranks[word] for word in words))
+        self._pending = {}
+        self._pending_ranks = {}
+        self._pack(self._build(words))
+        self._annotate()
+        self.word_count = len(words)
+        self._compiled = True
+
+    @staticmethod
+    def _build(words):
+        """
+        Build the minimal automaton of a sorted word list (Daciuk et al.).
+
+        Returns:
+            _BuildState: The root state
+        """
+        root = _BuildState()
+        register = {}
+        unchecked = []  # (parent, letter, child) along the last inserted word
+        previous = ""
+
+        def minimize(down_to):
+            while len(unchecked) > down_to:
+                parent, letter, child = unchecked.pop()
+                key = (child.final, tuple((c, id(s)) for c, s in sorted(child.edges.items())))
+                existing = register.get(key)
+                if existing is not None:
+                    parent.edges[letter] = existing
+                else:
+                    register[key] = child
+
+        for word in words:
+            common = 0
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+            minimize(common)
+
+            node = unchecked[-1][2] if unchecked else root
+            for letter in word[common:]:
+                child = _BuildState()
+                node.edges[letter] = child
+                unchecked.append((node, letter, child))
+                node = child
+            node.final = True
+            previous = word
+
+        minimize(0)
+        return root
+
+    def _pack(self, root):
+        """Number the states breadth-first and flatten them into arrays."""
+        letters = set()
+        ids = {id(root): 0}
+        order = [root]
+        for state in order:
+            for letter, child in state.edges.items():
+                letters.add(letter)
+                if id(child) not in ids:
+                    ids[id(child)] = len(order)
+                    order.append(child)
+
+        if len(letters) > 255:
+            raise ValueError(f"Alphabet too large for a DAFSA ({len(letters)} symbols)")
+
+        self.alphabet = "".join(sorted(letters))
+        self._codes = {letter: bytes([code]) for code, letter in enumerate(self.alphabet)}
+
+        edge_start = array("i", [0])
+        labels = bytearray()
+        targets = array("i")
+        finals = bytearray(len(order))
+        for index, state in enumerate(order):
+            finals[index] = state.final
+            for letter in sorted(state.edges):
+                labels += self._codes[letter]
+                targets.append(ids[id(state.edges[letter])])
+            edge_start.append(len(targets))
+
+        self._edge_start = edge_start
+        self._labels = bytes(labels)
+        self._targets = targets
+        self._finals = bytes(finals)
+
+    def _annotate(self):
+        """
+        Summarize the subtree below every node, for early pruning.
+
+        - ``min_len[n]``: fewest letters needed to finish a word from n
+          (0 if a word ends at n)
+        - ``required[n]``: bitmask of the letters used by *every* word
+          completion below n; a node whose required letters are not all
+          still available cannot finish any word
+
+        Nodes are processed in post-order, children before parents.
+        """
+        node_count = self.node_count
+        edge_start, targets, labels = self._edge_start, self._targets, self._labels
+        finals = self._finals
+        required = array("Q", bytes(8 * node_count))
+        min_len = array("B", bytes(node_count))
+        word_counts = array("I", bytes(4 * node_count))
+        done = bytearray(node_count)
+
+        stack = [self.root]
+        while stack:
+            node = stack[-1]
+            if done[node]:
+                stack.pop()
+                continue
+            pending = [
+                targets[edge]
+                for edge in range(edge_start[node], edge_start[node + 1])
+                if not done[targets[edge]]
+            ]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            done[node] = 1
+
+            word_counts[node] = finals[node] + sum(
+                word_counts[targets[edge]] for edge in range(edge_start[node], edge_start[node + 1])
+            )
+            if finals[node]:
+                continue  # Empty completion: needs no letters, length 0
+            node_required = -1
+            node_min_len = _MAX_MIN_LEN
+            for edge in range(edge_start[node], edge_start[node + 1]):
+                target = targets[edge]
+                code = labels[edge]
+                bit = 1 << code if code < _MASK_LETTERS else 0
+                node_required &= bit | required[target]
+                node_min_len = min(node_min_len, min_len[target] + 1)
+            required[node] = node_required if node_required != -1 else 0
+            min_len[node] = node_min_len
+
+        self._required = required
+        self._min_len = min_len
+        self._word_counts = word_counts
+
+    @property
+    def max_word_length(self):
+        """Length of the longest word (longest path from the root), computed once."""
+        if self._max_word_length is None:
+            edge_start, targets = self._edge_start, self._targets
+            depth = {}
+            stack = [self.root]
+            while stack:
+                node = stack[-1]
+                pending = [
+                    targets[edge]
+                    for edge in range(edge_start[node], edge_start[node + 1])
+                    if targets[edge] not in depth
+                ]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                depth[node] = max(
+                    (depth[targets[edge]] + 1 for edge in range(edge_start[node], edge_start[node + 1])),
+                    default=0,
+                )
+            self._max_word_length = depth[self.root]
+        return self._max_word_length
+
+    def prune_tables(self):
+        """
+        Return fast lookups for the subtree annotations used by the search.
+
+        Returns:
+            tuple: ``(min_len, required, bits)`` where ``min_len(node)`` and
+            ``required(node)`` read the annotations of a node and ``bits``
+            maps each letter to its bit in the required masks
+        """
+        bits = {
+            letter: 1 << code
+            for code, letter in enumerate(self.alphabet)
+            if code < _MASK_LETTERS
+        }
+        return self._min_len.__getitem__, self._required.__getitem__, bits
+
+    def child(self, node, letter):
+        """
+        Follow the edge labelled ``letter`` out of ``node``.
+
+        Returns:
+            int | None: The child node, or None if there is no such edge
+        """
+        code = self._codes.get(letter)
+        if code is None:
+            return None
+        base = self._label_base
+        index = self._labels.find(code, base + self._edge_start[node], base + self._edge_start[node + 1])
+        if index < 0:
+            return None
+        return self._targets[index - base]
+
+    def is_word(self, node):
+        """Return True if a word ends at ``node``."""
+        return self._finals[node] == 1
+
+    def __contains__(self, word):
+        """
+        Check if a word exists in the DAFSA.
+
+        Args:
+            word (str): The word to search for
+
+        Returns:
+            bool: True if word exists, False otherwise
+        """
+        self.compile()
+        node = self.root
+        for letter in word:
+            node = self.child(node, letter)
+            if node is None:
+                return False
+        return self.is_word(node)
+
+    def word_index(self, word):
+        """
+        Return the position of ``word`` in the alphabetical word list, or
+        None if it isn't stored.
+
+        Every edge skipped on the way down accounts for the words below it,
+        every word ending on the way for itself.
+        """
+        self.compile()
+        edge_start, targets, labels = self._edge_start, self._targets, self._labels
+        base = self._label_base
+        finals, word_counts = self._finals, self._word_counts
+        node = self.root
+        index = 0
+        for letter in word:
+            code = self._codes.get(letter)
+            if code is None:
+                return None
+            code = code[0]
+            index += finals[node]
+            for edge in range(edge_start[node], edge_start[node + 1]):
+                label = labels[base + edge]
+                if label == code:
+                    node = targets[edge]
+                    break
+                if label > code:
+                    return None
+                index += word_counts[targets[edge]]
+            else:
+                return None
+        return index if finals[node] else None
+
+    def word_tags(self, word):
+        """Return the tags bitmask of ``word`` (0 if it isn't stored)."""
+        index = self.word_index(word)
+        return self._tags[index] if index is not None and index < len(self._tags) else 0
+
+    def word_ranks(self):
+        """Yield ``(word, rank)`` for every word, in alphabetical order."""
+        ranks = self._ranks
+        if len(ranks) != self.word_count:
+            ranks = range(self.word_count)
+        return zip(self.words(), ranks)
+
+    def words(self):
+        """Yield every word of the DAFSA in alphabetical order."""
+        self.compile()
+        alphabet = self.alphabet
+        edge_start, targets, labels, base = self._edge_start, self._targets, self._labels, self._label_base
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if self.is_word(node):
+                yield prefix
+            # Push edges in reverse so the smallest letter is explored first
+            for edge in range(edge_start[node + 1] - 1, edge_start[node] - 1, -1):
+                stack.append((targets[edge], prefix + alphabet[labels[base + edge]]))
+
+    def save(self, path):
+        """
+        Write the compiled index to ``path`` in the versioned binary format.
+
+        The file is written next to its destination and renamed into place,
+        so running workers never map a half-written index.
+        """
+        self.compile()
+        alphabet = self.alphabet.encode("utf-8")
+        padding = b"\x00" * (-len(alphabet) % 4)
+        lines = [
+            ("\t".join((word,) + tuple(variants)) + "\n").encode("utf-8")
+            for word, variants in sorted(self.spellings.items())
+        ]
+        spelling_offsets = array("I", [0])
+        for line in lines:
+            spelling_offsets.append(spelling_offsets[-1] + len(line))
+        spellings = b"".join(lines)
+        sources = "".join(name + "\n" for name in self.sources).encode("utf-8")
+        tags = self._tags if len(self._tags) == self.word_count else array("I", bytes(4 * self.word_count))
+        ranks = self._ranks if len(self._ranks) == self.word_count else array("I", range(self.word_count))
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as file:
+            file.write(_HEADER.pack(
+                MAGIC, FORMAT_VERSION, self.node_count, self.edge_count, self.word_count, len(alphabet),
+                len(lines), len(spellings), len(sources),
+            ))
+            file.write(alphabet + padding)
+            file.write(self._edge_start.tobytes())
+            file.write(self._targets.tobytes())
+            file.write(self._labels)
+            file.write(self._finals)
+            file.write(b"\x00" * (-file.tell() % 8))
+            file.write(self._required.tobytes())
+            file.write(self._min_len.tobytes())
+            file.write(b"\x00" * (-file.tell() % 4))
+            file.write(self._word_counts.tobytes())
+            file.write(tags.tobytes())
+            file.write(ranks.tobytes())
+            file.write(spelling_offsets.tobytes())
+            file.write(spellings)
+            file.write(sources)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a compiled index written by ``save``.
+
+        Nothing is copied: the arrays and the spellings are views on a
+        read-only shared mapping, so every process mapping the same file
+        shares one physical copy of the pages and loading cost does not
+        depend on corpus size. Only the index is shared this way: the
+        ``SignatureIndex`` of the "signature" and "ranked" modes is still
+        built by each process on its first search in those modes.
+
+        Raises:
+            ValueError: If the file is not a DAFSA index of the current version
+        """
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a compiled DAFSA index")
+        version = struct.unpack_from("<I", mapped, len(MAGIC))[0]
+        if version != FORMAT_VERSION:
+            mapped.close()
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+
+        (
+            _, _, node_count, edge_count, word_count, alphabet_size, spelling_count, spellings_size,
+            sources_size,
+        ) = _HEADER.unpack_from(mapped, 0)
+        offset = _HEADER.size
+        alphabet = mapped[offset:offset + alphabet_size].decode("utf-8")
+        offset += alphabet_size + (-alphabet_size % 4)
+
+        view = memoryview(mapped)
+        dafsa = cls()
+        dafsa.alphabet = alphabet
+        dafsa._codes = {letter: bytes([code]) for code, letter in enumerate(alphabet)}
+        dafsa._edge_start = view[offset:offset + 4 * (node_count + 1)].cast("i")
+        offset += 4 * (node_count + 1)
+        dafsa._targets = view[offset:offset + 4 * edge_count].cast("i")
+        offset += 4 * edge_count
+        dafsa._labels = mapped
+        dafsa._label_base = offset
+        offset += edge_count
+        dafsa._finals = view[offset:offset + node_count]
+        offset += node_count
+        offset += -offset % 8
+        dafsa._required = view[offset:offset + 8 * node_count].cast("Q")
+        offset += 8 * node_count
+        dafsa._min_len = view[offset:offset + node_count]
+        offset += node_count
+        offset += -offset % 4
+        dafsa._word_counts = view[offset:offset + 4 * node_count].cast("I")
+        offset += 4 * node_count
+        dafsa._tags = view[offset:offset + 4 * word_count].cast("I")
+        offset += 4 * word_count
+        dafsa._ranks = view[offset:offset + 4 * word_count].cast("I")
+        offset += 4 * word_count
+        spelling_offsets = view[offset:offset + 4 * (spelling_count + 1)].cast("I")
+        offset += 4 * (spelling_count + 1)
+        dafsa.spellings = _MappedSpellings(view[offset:offset + spellings_size], spelling_offsets)
+        offset += spellings_size
+        dafsa.sources = tuple(mapped[offset:offset + sources_size].decode("utf-8").splitlines())
+        dafsa.word_count = word_count
+        dafsa._compiled = True
+        return dafsa
+
+    @property
+    def node_count(self):
+        return len(self._finals)
+
+    @property
+    def edge_count(self):
+        return len(self._targets)
+
+    def memory_usage(self):
+        """
+        Return the approximate size in bytes of the packed index.
+
+        For a memory-mapped index this is the size of the (shared) mapping.
+        """
+        if isinstance(self._labels, mmap.mmap):
+            return len(self._labels)
+        return (
+            sys.getsizeof(self._edge_start)
+            + sys.getsizeof(self._labels)
+            + sys.getsizeof(self._targets)
+            + sys.getsizeof(self._finals)
+            + sys.getsizeof(self._required)
+            + sys.getsizeof(self._min_len)
+            + sys.getsizeof(self._word_counts)
+            + sys.getsizeof(self._tags)
+            + sys.getsizeof(self._ranks)
+        )
@@ -0,0 +1,240 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+from .utils import generate_anagrams
+
+logger = logging.getLogger(__name__)
+
+# States a job goes through; the last three are final
+JOB_STATES = ("queued", "running", "done", "cancelled", "failed")
+FINISHED_STATES = ("done", "cancelled", "failed")
+
+# Seconds between two saves of a running job's progress
+PROGRESS_SAVE_INTERVAL = 0.5
+
+# Seconds between two reads of the shared cancellation flag by a running job,
+# and between two reads of a job's state by a long-polling request
+POLL_INTERVAL = 0.25
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class _JobCancel:
+    """
+    Cancellation token of a job.
+
+    Set directly when the job is cancelled from this process, or noticed
+    (at most every POLL_INTERVAL) through the flag another process stores
+    in the shared job cache.
+    """
+
+    def __init__(self, manager, job_id):
+        self.manager = manager
+        self.job_id = job_id
+        self.event = threading.Event()
+        self._next_check = 0.0
+
+    def set(self):
+        self.event.set()
+
+    def is_set(self):
+        if self.event.is_set():
+            return True
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + POLL_INTERVAL
+            if self.manager.cache.get(self.manager.cancel_key(self.job_id)):
+                self.event.set()
+        return self.event.is_set()
+
+
+class JobManager:
+    """
+    Runs anagram searches in the background on a bounded pool of threads.
+
+    Clients submit a search, get a job id back, then poll the job for its
+    progress and results, or cancel it. Job records live in a Django cache
+    (``settings.ANAGRAM_JOB_CACHE``), so with a shared cache backend any
+    server process can answer for a job run by another one. No external
+    broker is needed: each process runs the jobs it accepted.
+    """
+
+    def __init__(self, max_workers=2, max_pending=20, ttl=3600, cache_alias=None):
+        """
+        Args:
+            max_workers (int): Jobs running at the same time in this process
+            max_pending (int): Jobs queued or running in this process before
+                new ones are refused
+            ttl (int): Seconds a job record is kept
+            cache_alias (str): Django cache alias for job records (default:
+                the "default" cache, local to the process)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._executor = None
+        self._pending = 0
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self.cache_alias:
+            try:
+                return caches[self.cache_alias]
+            except InvalidCacheBackendError:
+                logger.warning("Job cache %r is not configured in CACHES", self.cache_alias)
+        return caches["default"]
+
+    @staticmethod
+    def job_key(job_id):
+        return f"anagrams:job:{job_id}"
+
+    @staticmethod
+    def cancel_key(job_id):
+        return f"anagrams:job:{job_id}:cancel"
+
+    def submit(self, word, lang=None, **options):
+        """
+        Queue a search and return its job record.
+
+        Args:
+            word (str): Letters to find anagrams of
+            lang (str): Language code
+            **options: Other ``generate_anagrams`` keyword arguments
+
+        Raises:
+            JobQueueFull: If ``max_pending`` jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} anagram jobs already pending")
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="anagram-job",
+                )
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "state": "queued",
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "progress": {"recursions": 0, "found": 0},
+            "result": None,
+            "error": None,
+        }
+        token = _JobCancel(self, job["id"])
+        self._tokens[job["id"]] = token
+        self._save(job)
+        try:
+            self._executor.submit(self._run, job, word, lang, options, token)
+        except RuntimeError:
+            # Executor shut down (interpreter exiting)
+            self._finish(job, "failed", error="Job queue is shut down")
+            raise
+        return job
+
+    def get(self, job_id):
+        """Return the job record, or None if unknown or expired."""
+        job = self.cache.get(self.job_key(job_id))
+        if job is not None and job["state"] not in FINISHED_STATES:
+            job["cancel_requested"] = bool(self.cache.get(self.cancel_key(job_id)))
+        return job
+
+    def wait(self, job_id, timeout):
+        """
+        Long-poll a job: return its record once it is finished, or after
+        ``timeout`` seconds with its current progress.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["state"] in FINISHED_STATES or time.monotonic() >= deadline:
+                return job
+            time.sleep(POLL_INTERVAL)
+
+    def cancel(self, job_id):
+        """
+        Ask a job to stop. A queued job won't start, a running one stops at
+        its next check. Returns the job record, or None if unknown.
+        """
+        job = self.get(job_id)
+        if job is None or job["state"] in FINISHED_STATES:
+            return job
+        self.cache.set(self.cancel_key(job_id), True, self.ttl)
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.set()
+        job["cancel_requested"] = True
+        return job
+
+    def _save(self, job):
+        self.cache.set(self.job_key(job["id"]), job, self.ttl)
+
+    def _finish(self, job, state, result=None, error=None):
+        job["state"] = state
+        job["finished"] = time.time()
+        job["result"] = result
+        job["error"] = error
+        self._save(job)
+        with self._lock:
+            self._pending -= 1
+        self._tokens.pop(job["id"], None)
+
+    def _run(self, job, word, lang, options, token):
+        if token.is_set():
+            self._finish(job, "cancelled")
+            return
+
+        job["state"] = "running"
+        job["started"] = time.time()
+        self._save(job)
+
+        next_save = [0.0]
+
+        def progress(calls, found):
+            now = time.monotonic()
+            if now >= next_save[0]:
+                next_save[0] = now + PROGRESS_SAVE_INTERVAL
+                job["progress"] = {"recursions": calls, "found": found}
+                self._save(job)
+
+        try:
+            hints = generate_anagrams(word, lang, cancel=token, progress=progress, **options)
+        except Exception as e:
+            logger.exception("Anagram job %s failed", job["id"])
+            self._finish(job, "failed", error=str(e))
+            return
+
+        result = {
+            "hints": hints.get("anagrams", []),
+            "n_results": hints.get("n_results", 0),
+            "recursions": hints.get("recursion", 0),
+            "corpus": hints.get("corpus"),
+            "corpus_key": hints.get("corpus_key"),
+            "search_mode": hints.get("search_mode"),
+            "stopped": hints.get("stopped"),
+        }
+        job["progress"] = {"recursions": result["recursions"], "found": result["n_results"]}
+        self._finish(job, "cancelled" if result["stopped"] == "cancelled" else "done", result=result)
+
+
+# Background searches of this process (web views)
+job_manager = JobManager(
+    max_workers=getattr(settings, "ANAGRAM_JOB_WORKERS", 2),
+    max_pending=getattr(settings, "ANAGRAM_JOB_MAX_PENDING", 20),
+    ttl=getattr(settings, "ANAGRAM_JOB_TTL", 3600),
+    cache_alias=getattr(settings, "ANAGRAM_JOB_CACHE", None),
+)
@@ -0,0 +1,256 @@
+import json
+import os
+import platform
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from service_anagrams.alphabets import get_alphabet
+from service_anagrams.anagramgen_fork import AnagramGenerator
+from service_anagrams.metrics import percentile
+from service_anagrams.utils import (
+    CORPORA,
+    TRIE_BACKENDS,
+    build_corpus_index,
+    get_corpus_paths,
+    load_compiled_index,
+)
+
+# Fixed inputs per language, from short to long, so runs stay comparable
+BENCHMARK_INPUTS = {
+    "it": ["stelle", "ragione", "lampadario", "marco polo", "leonardo da vinci", "giuseppe garibaldi"],
+    "en": ["listen", "garden", "astronomer", "conversation", "eleven plus two", "william shakespeare"],
+}
+
+# Metrics compared with the baseline: name -> True if higher is better
+METRICS = {
+    "load_s": False,
+    "mmap_load_ms": False,
+    "memory_mb": False,
+    "first_result_ms": False,
+    "p50_ms": False,
+    "p99_ms": False,
+    "nodes_per_s": True,
+}
+
+# Differences below these absolute amounts are noise, never regressions
+NOISE_FLOOR = {
+    "load_s": 0.05,
+    "mmap_load_ms": 1.0,
+    "memory_mb": 0.1,
+    "first_result_ms": 1.0,
+    "p50_ms": 2.0,
+    "p99_ms": 2.0,
+    "nodes_per_s": 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark corpus loading and anagram searches on a fixed set of inputs, "
+        "save a baseline and report regressions against it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", choices=sorted(CORPORA), help="Only benchmark corpora of this language")
+        parser.add_argument("--corpus", action="append", help="Corpus key to benchmark (repeatable, default: all)")
+        parser.add_argument(
+            "--backend",
+            choices=sorted(TRIE_BACKENDS),
+            default=getattr(settings, "ANAGRAM_TRIE_BACKEND", "dict"),
+            help="Word index backend (default: settings.ANAGRAM_TRIE_BACKEND)",
+        )
+        parser.add_argument(
+            "--mode",
+            action="append",
+            choices=["trie", "signature", "ranked"],
+            help="Search mode to measure (repeatable, default: trie)",
+        )
+        parser.add_argument("--results", type=int, default=100, help="Results N to time each search to")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per input, for the latency percentiles")
+        parser.add_argument("--timeout", type=float, default=10, help="Seconds a single search may run")
+        parser.add_argument(
+            "--baseline",
+            default="benchmark_baseline.json",
+            help="Baseline file to compare with (default: benchmark_baseline.json)",
+        )
+        parser.add_argument("--save", action="store_true", help="Write this run as the new baseline")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative slowdown reported as a regression (default: 0.2, i.e. 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        langs = [options["lang"]] if options["lang"] else sorted(CORPORA)
+        selected = options["corpus"]
+        modes = options["mode"] or ["trie"]
+        if selected:
+            known = {key for lang in langs for key in CORPORA[lang]}
+            unknown = set(selected) - known
+            if unknown:
+                raise CommandError(f"Unknown corpus key(s): {', '.join(sorted(unknown))}")
+
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "backend": options["backend"],
+                "results": options["results"],
+                "repeat": options["repeat"],
+                "timeout": options["timeout"],
+            },
+            "corpora": {},
+        }
+
+        for lang in langs:
+            for corpus_key in CORPORA[lang]:
+                if selected and corpus_key not in selected:
+                    continue
+                label = f"{lang}/{corpus_key}"
+                missing = [path for path in get_corpus_paths(lang, corpus_key) if not os.path.exists(path)]
+                if missing:
+                    self.stdout.write(self.style.WARNING(f"{label}: skipped, {', '.join(missing)} not found"))
+                    continue
+                report["corpora"][label] = self.benchmark_corpus(lang, corpus_key, modes, options)
+
+        baseline_path = options["baseline"]
+        if options["save"]:
+            with open(baseline_path, "w") as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not os.path.exists(baseline_path):
+            self.stdout.write(f"No baseline at {baseline_path}, run again with --save to create one")
+            return
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+        regressions = self.compare(baseline, report, options["threshold"])
+        if regressions:
+            raise CommandError(f"{regressions} regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
+
+    def benchmark_corpus(self, lang, corpus_key, modes, options):
+        """Measure loading and searches on one corpus; return its metrics."""
+        label = f"{lang}/{corpus_key}"
+        start = time.perf_counter()
+        index = build_corpus_index(lang, corpus_key, TRIE_BACKENDS[options["backend"]])
+        load_s = time.perf_counter() - start
+        result = {
+            "load_s": round(load_s, 3),
+            "memory_mb": round(index.memory_usage() / 2**20, 2),
+            "words": sum(1 for _ in index.words()),
+            "nodes": index.node_count,
+            "searches": {},
+        }
+
+        start = time.perf_counter()
+        compiled = load_compiled_index(lang, corpus_key)
+        if compiled is not None:
+            result["mmap_load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        self.stdout.write(
+            f"{label}: {result['words']} words, {result['nodes']} nodes, "
+            f"{result['memory_mb']} MB, built in {load_s:.2f}s"
+            + (f", mapped in {result['mmap_load_ms']} ms" if compiled is not None else "")
+        )
+        self.stdout.write(
+            f"  {'input':<22} {'mode':<9} {'results':>7} {'first ms':>9} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'nodes/s':>10}"
+        )
+
+        generator = AnagramGenerator(
+            None,
+            corpus_name=label,
+            index=index,
+            dead_end_table_size=getattr(settings, "ANAGRAM_DEAD_END_TABLE_SIZE", 100000),
+            alphabet=get_alphabet(lang),
+        )
+        if "signature" in modes or "ranked" in modes:
+            # Built on first use: keep it out of the first search's latency
+            generator.signatures
+        for word in BENCHMARK_INPUTS.get(lang, []):
+            for mode in modes:
+                search = self.benchmark_search(generator, word, mode, options)
+                result["searches"][f"{word}|{mode}"] = search
+                self.stdout.write(
+                    f"  {word:<22} {mode:<9} {search['results']:>7} {search['first_result_ms'] or '-':>9} "
+                    f"{search['p50_ms']:>8} {search['p99_ms']:>8} {search['nodes_per_s']:>10}"
+                    + (f"  ({search['stopped']})" if search["stopped"] else "")
+                )
+        return result
+
+    def benchmark_search(self, generator, word, mode, options):
+        """Time ``options['repeat']`` cold searches of ``word``; return their metrics."""
+        firsts, totals, rates = [], [], []
+        n_results = 0
+        stopped = None
+        for _ in range(options["repeat"]):
+            # Every run starts from a cold dead end table
+            generator.dead_ends.clear()
+            stats = {}
+            first = None
+            n_results = 0
+            start = time.perf_counter()
+            search = generator.iter_generate(word, timeout=options["timeout"], search_mode=mode, stats=stats)
+            for _ in search:
+                n_results += 1
+                if first is None:
+                    first = time.perf_counter() - start
+                if n_results >= options["results"]:
+                    break
+            search.close()
+            elapsed = time.perf_counter() - start
+            stopped = stats["stopped"]
+            if first is not None:
+                firsts.append(first)
+            totals.append(elapsed)
+            rates.append(stats["calls"] / elapsed if elapsed else 0)
+
+        return {
+            "results": n_results,
+            "stopped": stopped,
+            "first_result_ms": round(percentile(firsts, 0.5) * 1000, 2) if firsts else None,
+            "p50_ms": round(percentile(totals, 0.5) * 1000, 2),
+            "p99_ms": round(percentile(totals, 0.99) * 1000, 2),
+            "nodes_per_s": round(percentile(rates, 0.5)),
+        }
+
+    def compare(self, baseline, report, threshold):
+        """Print the regressions of ``report`` against ``baseline``; return how many."""
+        regressions = 0
+        for label, current in report["corpora"].items():
+            previous = baseline.get("corpora", {}).get(label)
+            if previous is None:
+                self.stdout.write(f"{label}: not in the baseline")
+                continue
+            pairs = [(label, current, previous)]
+            for key, search in current["searches"].items():
+                if key in previous.get("searches", {}):
+                    pairs.append((f"{label} {key}", search, previous["searches"][key]))
+
+            for name, now, before in pairs:
+                if "results" in now and now["results"] != before.get("results"):
+                    self.stdout.write(self.style.WARNING(
+                        f"{name}: {now['results']} results, baseline had {before.get('results')}"
+                    ))
+                for metric, higher_is_better in METRICS.items():
+                    if now.get(metric) is None or before.get(metric) is None:
+                        continue
+                    value, reference = now[metric], before[metric]
+                    change = value - reference
+                    if higher_is_better:
+                        change = -change
+                    if change <= NOISE_FLOOR[metric] or change <= threshold * abs(reference):
+                        continue
+                    regressions += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"{name}: {metric} {value} vs {reference} in the baseline "
+                        f"({'-' if higher_is_better else '+'}{change / abs(reference) * 100 if reference else 100:.0f}%)"
+                    ))
+        return regressions
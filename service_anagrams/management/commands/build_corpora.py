@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service_anagrams.dafsa import Dafsa, FORMAT_VERSION
+from service_anagrams.utils import (
+    CORPORA,
+    build_corpus_index,
+    get_compiled_path,
+    get_corpus_paths,
+    load_compiled_index,
+)
+
+
+class Command(BaseCommand):
+    help = "Compile the text corpora into memory-mappable binary DAFSA indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", choices=sorted(CORPORA), help="Only compile corpora of this language")
+        parser.add_argument("--corpus", action="append", help="Corpus key to compile (repeatable, default: all)")
+        parser.add_argument("--force", action="store_true", help="Rebuild even if the index is up to date")
+
+    def handle(self, *args, **options):
+        langs = [options["lang"]] if options["lang"] else sorted(CORPORA)
+        selected = options["corpus"]
+
+        if selected:
+            known = {key for lang in langs for key in CORPORA[lang]}
+            unknown = set(selected) - known
+            if unknown:
+                raise CommandError(f"Unknown corpus key(s): {', '.join(sorted(unknown))}")
+
+        for lang in langs:
+            for corpus_key in CORPORA[lang]:
+                if selected and corpus_key not in selected:
+                    continue
+
+                compiled_path = get_compiled_path(lang, corpus_key)
+                label = f"{lang}/{corpus_key}"
+
+                missing = [path for path in get_corpus_paths(lang, corpus_key) if not os.path.exists(path)]
+                if missing:
+                    self.stdout.write(self.style.WARNING(f"{label}: skipped, {', '.join(missing)} not found"))
+                    continue
+
+                if not options["force"] and load_compiled_index(lang, corpus_key) is not None:
+                    self.stdout.write(f"{label}: up to date")
+                    continue
+
+                start = time.perf_counter()
+                # Sources merged, exclusions removed and words folded once, here
+                index = build_corpus_index(lang, corpus_key, Dafsa)
+                os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+                index.save(compiled_path)
+                elapsed = time.perf_counter() - start
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label}: {index.word_count} words from {len(index.sources)} sources "
+                    f"({len(index.spellings)} with other spellings), "
+                    f"{index.node_count} nodes, "
+                    f"{os.path.getsize(compiled_path) / 2**20:.1f} MB (v{FORMAT_VERSION}) in {elapsed:.2f}s"
+                ))
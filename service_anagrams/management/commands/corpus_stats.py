@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from service_anagrams.utils import CORPORA, TRIE_BACKENDS, load_corpus_words
+
+
+class Command(BaseCommand):
+    help = "Report node counts and memory usage of every corpus for each word index backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lang", choices=sorted(CORPORA), help="Only report corpora of this language")
+        parser.add_argument(
+            "--backend",
+            action="append",
+            choices=sorted(TRIE_BACKENDS),
+            help="Backend to measure (repeatable, default: all)",
+        )
+
+    def handle(self, *args, **options):
+        backends = options["backend"] or sorted(TRIE_BACKENDS)
+        langs = [options["lang"]] if options["lang"] else sorted(CORPORA)
+
+        self.stdout.write(
+            f"{'corpus':<32} {'backend':<8} {'words':>9} {'nodes':>10} {'memory MB':>10} {'build s':>8}"
+        )
+        for lang in langs:
+            for corpus_key in CORPORA[lang]:
+                try:
+                    words = load_corpus_words(lang, corpus_key)
+                except OSError as e:
+                    self.stdout.write(self.style.WARNING(f"{lang}/{corpus_key}: skipped ({e.strerror})"))
+                    continue
+
+                for backend in backends:
+                    start = time.perf_counter()
+                    index = TRIE_BACKENDS[backend]()
+                    for word in words:
+                        index.add(word)
+                    index.compile()
+                    elapsed = time.perf_counter() - start
+
+                    self.stdout.write(
+                        f"{lang + '/' + corpus_key:<32} {backend:<8} {len(words):>9} "
+                        f"{index.node_count:>10} {index.memory_usage() / 2**20:>10.1f} {elapsed:>8.2f}"
+                    )
+                    del index
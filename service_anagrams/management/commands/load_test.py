@@ -0,0 +1,440 @@
+import json
+import os
+import random
+import re
+import secrets
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from service_anagrams.metrics import percentile
+from service_anagrams.models import UserAnagramSettings
+from service_anagrams.utils import CORPORA
+from service_saver.models import Anagrams
+
+# Names typed in the composer, per language
+SHORT_NAMES = {
+    "it": ["anna", "marco", "giulia", "luca", "sara", "paolo", "elena", "matteo"],
+    "en": ["emma", "liam", "olivia", "noah", "grace", "henry", "alice", "oscar"],
+}
+LONG_NAMES = {
+    "it": ["alessandro manzoni", "giuseppe verdi", "maria montessori", "leonardo da vinci", "rita levi montalcini"],
+    "en": ["william shakespeare", "charles dickens", "ada lovelace", "isaac newton", "virginia woolf"],
+}
+
+# Actions of a composer session and their weights; anonymous users can't
+# save or delete, they fetch short-name hints instead
+MIX = [
+    ("hints_short", 45),
+    ("hints_long", 15),
+    ("hints_stream", 10),
+    ("settings", 10),
+    ("save", 12),
+    ("delete", 8),
+]
+LOGGED_IN_ONLY = {"save", "delete"}
+
+# Load test accounts are recognizable; the run only removes the ones it created
+USERNAME_PREFIX = "loadtest-"
+
+# Seconds between two samples of the server processes
+SAMPLE_INTERVAL = 1.0
+
+
+class VirtualUser:
+    """One simulated composer session, with its own cookies."""
+
+    def __init__(self, base_url, timeout, lang, username=None, password=None, cookie_settings=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.lang = lang
+        self.username = username
+        self.password = password
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+        self.cookie_settings = cookie_settings
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, path, data=None, headers=None):
+        """Send a request; return ``(status, body)``. HTTP errors are returned, not raised."""
+        headers = dict(headers or {})
+        if self.cookie_settings is not None:
+            # Same encoding as the frontend: URL-encoded JSON
+            headers["Cookie"] = "anagram_settings=" + quote(json.dumps(self.cookie_settings))
+        if data is not None:
+            headers.setdefault("X-CSRFToken", self.csrf_token())
+            headers.setdefault("Referer", self.base_url + "/")
+        request = Request(self.base_url + path, data=data, headers=headers)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except HTTPError as e:
+            return e.code, e.read()
+
+    def login(self):
+        status, body = self.request("/login/")
+        match = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', body)
+        form = {
+            "username": self.username,
+            "password": self.password,
+            "csrfmiddlewaretoken": match.group(1).decode() if match else self.csrf_token(),
+        }
+        status, _ = self.request("/login/", urlencode(form).encode(), {"Content-Type": "application/x-www-form-urlencoded"})
+        if not any(cookie.name == "sessionid" for cookie in self.cookies):
+            raise CommandError(f"Login of {self.username} failed (HTTP {status})")
+
+    def hints(self, name, stream=False):
+        path = f"/anagrams/{self.lang}/fetch/{quote(name)}/" + ("stream/" if stream else "")
+        return self.request(path)
+
+    def run(self, action, rng):
+        """Perform one action of the mix; return ``(status, body)``."""
+        if action == "hints_short":
+            return self.hints(rng.choice(SHORT_NAMES[self.lang]))
+        if action == "hints_long":
+            return self.hints(rng.choice(LONG_NAMES[self.lang]))
+        if action == "hints_stream":
+            return self.hints(rng.choice(SHORT_NAMES[self.lang] + LONG_NAMES[self.lang]), stream=True)
+        if action == "settings":
+            return self.request(f"/anagrams/settings/?lang={self.lang}")
+        if action == "save":
+            name = rng.choice(SHORT_NAMES[self.lang] + LONG_NAMES[self.lang])
+            body = json.dumps({"model": name, "anagrams": " ".join(reversed(name.split()))}).encode()
+            return self.request("/save-anagrams/", body, {"Content-Type": "application/json"})
+        if action == "delete":
+            # Like the UI: open the saved list, delete one entry
+            status, page = self.request("/my-anagrams")
+            ids = re.findall(rb'data-id="(\d+)"', page)
+            if status != 200 or not ids:
+                return status, page
+            body = json.dumps({"id": int(rng.choice(ids))}).encode()
+            return self.request("/delete-anagrams/", body, {"Content-Type": "application/json"})
+        raise ValueError(f"Unknown action {action!r}")
+
+
+def _process_tree(pid):
+    """Return ``pid`` and its descendants (Linux /proc)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                ppid = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def _cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    # utime and stime, fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _rss_mb(pid):
+    with open(f"/proc/{pid}/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class ServerMonitor(threading.Thread):
+    """Samples CPU and RSS of a server process and its workers."""
+
+    def __init__(self, pid):
+        super().__init__(name="load-test-monitor", daemon=True)
+        self.pid = pid
+        self.stopped = threading.Event()
+        # pid -> {"cpu": [first, last] seconds, "rss": [samples], "start": t, "end": t}
+        self.workers = {}
+
+    def run(self):
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            for pid in _process_tree(self.pid):
+                try:
+                    cpu, rss = _cpu_seconds(pid), _rss_mb(pid)
+                except (OSError, IndexError, ValueError):
+                    continue
+                worker = self.workers.setdefault(pid, {"cpu": [cpu, cpu], "rss": [], "start": now, "end": now})
+                worker["cpu"][1] = cpu
+                worker["rss"].append(rss)
+                worker["end"] = now
+            self.stopped.wait(SAMPLE_INTERVAL)
+
+    def summary(self):
+        rows = []
+        for pid, worker in sorted(self.workers.items()):
+            elapsed = worker["end"] - worker["start"]
+            rows.append({
+                "pid": pid,
+                "cpu_percent": round((worker["cpu"][1] - worker["cpu"][0]) / elapsed * 100, 1) if elapsed else 0.0,
+                "rss_mb_max": round(max(worker["rss"]), 1),
+                "rss_mb_last": round(worker["rss"][-1], 1),
+            })
+        return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mix of composer traffic (hints, settings, save and delete) against a "
+        "local server and report throughput, latency, errors and server CPU / RSS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8765", help="Server base URL")
+        parser.add_argument(
+            "--start-server",
+            action="store_true",
+            help="Start the server for the run (runserver on the --url port, or --server-command)",
+        )
+        parser.add_argument(
+            "--server-command",
+            help='Command starting the server, e.g. "gunicorn anagrams.wsgi -w 4 -b 127.0.0.1:8765"',
+        )
+        parser.add_argument("--server-pid", type=int, help="Pid of an already running server to monitor")
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+        parser.add_argument("--logged-in", type=float, default=0.3, help="Fraction of logged-in users")
+        parser.add_argument("--duration", type=float, default=60, help="Seconds of load")
+        parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which users start")
+        parser.add_argument("--think", type=float, default=1.0, help="Mean think time between actions, in seconds")
+        parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds")
+        parser.add_argument("--lang", choices=sorted(CORPORA), action="append", help="Languages (default: all)")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed of the traffic mix")
+        parser.add_argument("--output", help="Also write the report as JSON to this file")
+        parser.add_argument("--keep-users", action="store_true", help="Keep the load test accounts afterwards")
+
+    def handle(self, *args, **options):
+        server = None
+        server_pid = options["server_pid"]
+        if options["start_server"]:
+            server = self.start_server(options)
+            server_pid = server.pid
+
+        langs = options["lang"] or sorted(CORPORA)
+        rng = random.Random(options["seed"])
+        n_logged_in = round(options["users"] * options["logged_in"])
+        password = "load-test-%d" % rng.randrange(10**9)
+        # Tells this run's accounts apart from those of other runs
+        run_id = secrets.token_hex(4)
+        users = []
+        # Pks of the accounts created by this run, the only ones deleted afterwards
+        created = []
+        try:
+            for i in range(options["users"]):
+                lang = langs[i % len(langs)]
+                if i < n_logged_in:
+                    account = self.create_account(f"{USERNAME_PREFIX}{run_id}-{i}", password, lang, rng)
+                    created.append(account.pk)
+                    users.append(VirtualUser(options["url"], options["timeout"], lang, account.username, password))
+                else:
+                    users.append(VirtualUser(
+                        options["url"], options["timeout"], lang, cookie_settings=self.random_settings(lang, rng),
+                    ))
+
+            monitor = None
+            if server_pid and os.path.isdir("/proc"):
+                monitor = ServerMonitor(server_pid)
+                monitor.start()
+
+            self.stdout.write(
+                f"{len(users)} users ({n_logged_in} logged in) for {options['duration']:.0f}s "
+                f"against {options['url']}"
+            )
+            records = self.run_load(users, options)
+            if monitor is not None:
+                monitor.stopped.set()
+                monitor.join()
+            report = self.report(records, options, monitor)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(10)
+            if not options["keep_users"]:
+                self.delete_accounts(User.objects.filter(pk__in=created))
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def start_server(self, options):
+        port = options["url"].rstrip("/").rsplit(":", 1)[-1]
+        command = shlex.split(options["server_command"]) if options["server_command"] else [
+            sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload",
+        ]
+        self.stdout.write(f"Starting server: {' '.join(command)}")
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        probe = VirtualUser(options["url"], 2, "it")
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with code {server.returncode}")
+            try:
+                probe.request("/")
+            except (URLError, OSError):
+                time.sleep(0.5)
+                continue
+            time.sleep(0.5)
+            if server.poll() is not None:
+                # Something else answers on that port
+                raise CommandError(f"Server exited with code {server.returncode}, is {options['url']} already in use?")
+            return server
+        server.terminate()
+        raise CommandError("Server did not answer within 60s")
+
+    @staticmethod
+    def random_settings(lang, rng):
+        """Composer settings as a user might pick them."""
+        return {
+            "corpus_key": rng.choice(list(CORPORA[lang])),
+            "min_word_length": rng.choice([1, 2, 3]),
+            "max_word_length": rng.choice([8, 12, 20]),
+            "prioritize_long_words": rng.random() < 0.7,
+            "max_results": rng.choice([100, 500]),
+            "max_words": rng.choice([0, 0, 2, 3]),
+            "exact_words": rng.random() < 0.2,
+        }
+
+    def create_account(self, username, password, lang, rng):
+        # Never reuse (nor delete) an account that this run didn't create
+        if User.objects.filter(username=username).exists():
+            raise CommandError(f"Account {username} already exists")
+        user = User.objects.create_user(username, password=password)
+        UserAnagramSettings.objects.create(user=user, **self.random_settings(lang, rng))
+        return user
+
+    @staticmethod
+    def delete_accounts(users):
+        # Saved anagrams don't cascade (DO_NOTHING): remove them first
+        Anagrams.objects.filter(user__in=users).delete()
+        users.delete()
+
+    def run_load(self, users, options):
+        """Run every virtual user until the duration is over; return the request records."""
+        records = []
+        lock = threading.Lock()
+        start = time.monotonic()
+        end = start + options["duration"]
+        actions = [action for action, _ in MIX]
+        weights = [weight for _, weight in MIX]
+
+        def session(n, user):
+            rng = random.Random(options["seed"] * 1000 + n)
+            time.sleep(options["ramp_up"] * n / max(1, len(users)))
+            if user.username:
+                try:
+                    user.login()
+                except (CommandError, URLError, OSError) as e:
+                    with lock:
+                        records.append(("login", 0, 0.0, f"error: {e}"))
+                    return
+            while time.monotonic() < end:
+                action = rng.choices(actions, weights)[0]
+                if action in LOGGED_IN_ONLY and not user.username:
+                    action = "hints_short"
+                sent = time.monotonic()
+                outcome = None
+                try:
+                    status, _ = user.run(action, rng)
+                    if status >= 400:
+                        outcome = f"HTTP {status}"
+                except (socket.timeout, TimeoutError):
+                    status, outcome = 0, "timeout"
+                except URLError as e:
+                    status = 0
+                    outcome = "timeout" if isinstance(e.reason, (socket.timeout, TimeoutError)) else f"error: {e.reason}"
+                except OSError as e:
+                    status, outcome = 0, f"error: {e}"
+                with lock:
+                    records.append((action, status, time.monotonic() - sent, outcome))
+                time.sleep(rng.expovariate(1 / options["think"]) if options["think"] > 0 else 0)
+
+        threads = [
+            threading.Thread(target=session, args=(n, user), name=f"load-test-user-{n}", daemon=True)
+            for n, user in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(0.0, end - time.monotonic()) + options["timeout"] + 5)
+        self.elapsed = time.monotonic() - start
+        with lock:
+            return list(records)
+
+    def report(self, records, options, monitor):
+        """Print and return the throughput, latency and error summary."""
+        by_action = {}
+        for action, status, latency, outcome in records:
+            by_action.setdefault(action, []).append((latency, outcome))
+
+        def summarize(entries):
+            latencies = [latency for latency, _ in entries]
+            errors = sum(1 for _, outcome in entries if outcome and outcome != "timeout")
+            timeouts = sum(1 for _, outcome in entries if outcome == "timeout")
+            return {
+                "requests": len(entries),
+                "throughput": round(len(entries) / self.elapsed, 2),
+                "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+                "p90_ms": round(percentile(latencies, 0.9) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+                "max_ms": round(max(latencies) * 1000, 1),
+                "error_rate": round(errors / len(entries), 4),
+                "timeout_rate": round(timeouts / len(entries), 4),
+            }
+
+        report = {"elapsed_s": round(self.elapsed, 1), "users": options["users"], "actions": {}}
+        self.stdout.write(
+            f"{'action':<14} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+            f"{'max ms':>8} {'errors':>7} {'timeouts':>8}"
+        )
+        rows = sorted(by_action.items()) + ([("TOTAL", [entry for entries in by_action.values() for entry in entries])] if records else [])
+        for action, entries in rows:
+            summary = summarize(entries)
+            report["actions"][action] = summary
+            self.stdout.write(
+                f"{action:<14} {summary['requests']:>6} {summary['throughput']:>7} {summary['p50_ms']:>8} "
+                f"{summary['p90_ms']:>8} {summary['p99_ms']:>8} {summary['max_ms']:>8} "
+                f"{summary['error_rate']:>7.1%} {summary['timeout_rate']:>8.1%}"
+            )
+
+        failures = {}
+        for action, status, latency, outcome in records:
+            if outcome:
+                failures[outcome] = failures.get(outcome, 0) + 1
+        for outcome, count in sorted(failures.items(), key=lambda item: -item[1])[:5]:
+            self.stdout.write(self.style.WARNING(f"  {count} x {outcome}"))
+
+        if monitor is not None:
+            report["server"] = monitor.summary()
+            self.stdout.write(f"{'server pid':>10} {'cpu %':>7} {'rss MB max':>11} {'rss MB last':>12}")
+            for worker in report["server"]:
+                self.stdout.write(
+                    f"{worker['pid']:>10} {worker['cpu_percent']:>7} {worker['rss_mb_max']:>11} {worker['rss_mb_last']:>12}"
+                )
+        return report
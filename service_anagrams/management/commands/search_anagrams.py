@@ -0,0 +1,72 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service_anagrams.utils import CORPORA, get_generator, normalize_corpus_choice
+
+
+class Command(BaseCommand):
+    help = "Time an anagram search, serial and split across worker processes, and report the speedup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("word", help="Word or phrase to find anagrams of")
+        parser.add_argument("--lang", choices=sorted(CORPORA), default="it")
+        parser.add_argument("--corpus", help="Corpus key (default: the language default)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            action="append",
+            help="Worker count to compare with the serial search (repeatable, "
+                 "default: powers of two up to the number of cores)",
+        )
+        parser.add_argument("--max-results", type=int, default=10000)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            help="Search for the K phrases with the longest words instead of the first results",
+        )
+
+    def handle(self, *args, **options):
+        lang, corpus_key = normalize_corpus_choice(options["lang"], options["corpus"])
+        try:
+            generator = get_generator(lang, corpus_key)
+        except OSError as e:
+            raise CommandError(f"Cannot load {lang}/{corpus_key}: {e}")
+
+        cores = os.cpu_count() or 1
+        worker_counts = options["workers"]
+        if not worker_counts:
+            worker_counts = []
+            n = 2
+            while n <= cores:
+                worker_counts.append(n)
+                n *= 2
+
+        self.stdout.write(f"{lang}/{corpus_key}, {cores} cores, input '{options['word']}'")
+        self.stdout.write(f"{'workers':>7} {'seconds':>8} {'results':>8} {'calls':>10} {'speedup':>8}  same")
+
+        baseline = None
+        for workers in [1] + worker_counts:
+            # Every run starts from a cold dead end table, like a new corpus
+            generator.dead_ends.clear()
+            start = time.perf_counter()
+            result = generator.generate(
+                options["word"],
+                max_results=options["max_results"],
+                timeout=options["timeout"],
+                prioritize_long_words=bool(options["top_k"]),
+                top_k=options["top_k"],
+                workers=workers,
+            )
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline = (elapsed, result["anagrams"])
+            self.stdout.write(
+                f"{workers:>7} {elapsed:>8.2f} {result['n_results']:>8} {result.get('recursion', 0):>10} "
+                f"{baseline[0] / elapsed:>7.2f}x  {'yes' if result['anagrams'] == baseline[1] else 'NO'}"
+            )
+
+        generator.close_pool()
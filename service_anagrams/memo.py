@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import threading
+
+# Leftover multisets smaller than this are cheap to re-prove and not memoized
+MIN_MEMO_LETTERS = 4
+
+
+def multiset_key(sorted_letters, counts):
+    """
+    Return the canonical key of a letter multiset: its letters in sorted order.
+
+    Args:
+        sorted_letters (list): Distinct letters, sorted
+        counts (iterable): Number of occurrences of each letter, same order
+    """
+    return "".join(map(str.__mul__, sorted_letters, counts))
+
+
+class DeadEndTable:
+    """
+    Size-capped LRU table of leftover letter multisets known to have no solution.
+
+    The search reaches the same leftover letters through many different word
+    orders. Once a leftover multiset has been fully explored without finding
+    an anagram, later searches (in the same request or in any other request
+    on the same corpus) skip it.
+
+    Each entry maps ``(scope, multiset)`` to the lowest "bound" word proven
+    dead: the search only builds words that are >= the previous word of the
+    phrase, so a dead end with a given previous word is also a dead end with
+    any greater one. An empty bound means "no solution at all".
+    """
+
+    def __init__(self, max_entries=100000):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used
+                ones are evicted (0 disables the table)
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_dead(self, key, bound=""):
+        """Return True if ``key`` is known to have no solution for ``bound``."""
+        with self._lock:
+            dead_bound = self._entries.get(key)
+            if dead_bound is None:
+                return False
+            self._entries.move_to_end(key)
+        return bound >= dead_bound
+
+    def record(self, key, bound=""):
+        """Remember that ``key`` has no solution for ``bound`` (and above)."""
+        if not self.max_entries:
+            return
+        with self._lock:
+            dead_bound = self._entries.get(key)
+            if dead_bound is None or bound < dead_bound:
+                self._entries[key] = bound
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
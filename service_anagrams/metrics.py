@@ -0,0 +1,181 @@
+import bisect
+import json
+import logging
+import math
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Counter:
+    """Monotonic counter, one value per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Histogram:
+    """Distribution of observed values over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, ([*counts], total, n)) for key, (counts, total, n) in self._values.items())
+        for key, (counts, total, n) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", _format_labels(self.labels, key, [("le", bound)]), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labels, key), total
+            yield f"{self.name}_count", _format_labels(self.labels, key), n
+
+
+class MetricsRegistry:
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+
+    Values are kept in memory per process: with several server workers each
+    one reports its own searches, and a scraper sums them.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, buckets, labels=()):
+        metric = Histogram(name, help, buckets, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return every metric in the text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Per-search telemetry, see AnagramGenerator.telemetry
+SEARCHES = registry.counter(
+    "anagram_searches_total",
+    "Anagram searches run, by corpus, mode and how they stopped",
+    ("corpus", "mode", "stopped"),
+)
+NODES = registry.counter("anagram_search_nodes_total", "Search nodes visited", ("corpus", "mode"))
+PRUNES = registry.counter("anagram_search_prunes_total", "Subtrees and phrases pruned", ("corpus", "mode"))
+RESULTS = registry.counter("anagram_search_results_total", "Anagrams found", ("corpus", "mode"))
+DURATION = registry.histogram(
+    "anagram_search_duration_seconds",
+    "Total time of a search",
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    ("corpus", "mode"),
+)
+FIRST_RESULT = registry.histogram(
+    "anagram_search_first_result_seconds",
+    "Time until a search found its first anagram",
+    (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+    ("corpus", "mode"),
+)
+SEARCH_NODES = registry.histogram(
+    "anagram_search_nodes",
+    "Nodes visited by a search",
+    (1e3, 1e4, 1e5, 1e6, 1e7, 1e8),
+    ("corpus", "mode"),
+)
+INPUT_LETTERS = registry.histogram(
+    "anagram_search_input_letters",
+    "Letters of the searched inputs",
+    (4, 8, 12, 16, 20, 25, 30, 40),
+    ("corpus", "mode"),
+)
+
+
+def record_search(telemetry):
+    """
+    Add one search to the metrics (and log it with ANAGRAM_SEARCH_LOGGING).
+
+    Args:
+        telemetry (dict): As returned by ``AnagramGenerator.telemetry``
+    """
+    labels = {"corpus": telemetry["corpus"] or "", "mode": telemetry["mode"]}
+    SEARCHES.inc(stopped=telemetry["stopped"] or "complete", **labels)
+    NODES.inc(telemetry["nodes"], **labels)
+    PRUNES.inc(telemetry["prunes"], **labels)
+    RESULTS.inc(telemetry["results"], **labels)
+    DURATION.observe(telemetry["elapsed_s"], **labels)
+    if telemetry["first_result_s"] is not None:
+        FIRST_RESULT.observe(telemetry["first_result_s"], **labels)
+    SEARCH_NODES.observe(telemetry["nodes"], **labels)
+    INPUT_LETTERS.observe(telemetry["input_length"], **labels)
+    if getattr(settings, "ANAGRAM_SEARCH_LOGGING", False):
+        logger.info("Anagram search %s", json.dumps(telemetry, sort_keys=True))
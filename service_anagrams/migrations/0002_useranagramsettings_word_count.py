@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_anagrams", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useranagramsettings",
+            name="max_words",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="useranagramsettings",
+            name="exact_words",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+# Corpus keys that pointed at word lists missing from the tree
+MISSING_CORPUS_KEYS = ["660000_parole_italiane", "986700_parole_uniche"]
+
+
+def move_to_merged_corpus(apps, schema_editor):
+    UserAnagramSettings = apps.get_model("service_anagrams", "UserAnagramSettings")
+    UserAnagramSettings.objects.filter(corpus_key__in=MISSING_CORPUS_KEYS).update(corpus_key="parole_verbi_nomi")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_anagrams", "0002_useranagramsettings_word_count"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="useranagramsettings",
+            name="corpus_key",
+            field=models.CharField(default="parole_verbi_nomi", max_length=100),
+        ),
+        migrations.RunPython(move_to_merged_corpus, migrations.RunPython.noop),
+    ]
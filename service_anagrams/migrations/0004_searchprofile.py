@@ -0,0 +1,50 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_anagrams", "0003_useranagramsettings_corpus_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("chars", models.CharField(max_length=255)),
+                ("lang", models.CharField(max_length=10)),
+                ("corpus_key", models.CharField(max_length=100)),
+                ("search_mode", models.CharField(max_length=20)),
+                ("options", models.JSONField(blank=True, default=dict)),
+                ("elapsed_s", models.FloatField(default=0)),
+                ("nodes", models.BigIntegerField(default=0)),
+                ("prunes", models.BigIntegerField(default=0)),
+                ("results", models.PositiveIntegerField(default=0)),
+                ("stopped", models.CharField(blank=True, max_length=20)),
+                ("telemetry", models.JSONField(blank=True, default=dict)),
+                ("report", models.TextField(blank=True)),
+                ("raw_stats", models.BinaryField(blank=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="search_profiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
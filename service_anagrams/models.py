@@ -17,8 +17,8 @@ class UserAnagramSettings(models.Model):
     )
 
     # Logical key of the corpus within the selected language
-    # (e.g. "660000_parole_italiane", "top-5k", etc.)
-    corpus_key = models.CharField(max_length=100, default="660000_parole_italiane")
+    # (e.g. "parole_verbi_nomi", "top-5k", etc.)
+    corpus_key = models.CharField(max_length=100, default="parole_verbi_nomi")
 
     # Constraints on generated anagram words
     min_word_length = models.PositiveIntegerField(default=2)
@@ -30,6 +30,57 @@ class UserAnagramSettings(models.Model):
     # Maximum number of anagram results to return
     max_results = models.PositiveIntegerField(default=500)
 
+    # Maximum number of words per anagram (0 = no limit)
+    max_words = models.PositiveIntegerField(default=0)
+
+    # Whether anagrams must have exactly max_words words
+    exact_words = models.BooleanField(default=False)
+
     def __str__(self) -> str:
         return f"Settings for {self.user!s}"
 
+
+class SearchProfile(models.Model):
+    """
+    Profile of one hint search, captured on request by a staff user
+    (``fetch_hints`` with ``?profile=1``, see ``profiling``).
+
+    Old profiles are deleted as new ones come in, past
+    ``settings.ANAGRAM_PROFILE_MAX_COUNT`` or
+    ``settings.ANAGRAM_PROFILE_RETENTION_DAYS``.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="search_profiles",
+    )
+
+    # What was searched, and with which generation settings
+    chars = models.CharField(max_length=255)
+    lang = models.CharField(max_length=10)
+    corpus_key = models.CharField(max_length=100)
+    search_mode = models.CharField(max_length=20)
+    options = models.JSONField(default=dict, blank=True)
+
+    # Engine counters of the search (see AnagramGenerator.telemetry)
+    elapsed_s = models.FloatField(default=0)
+    nodes = models.BigIntegerField(default=0)
+    prunes = models.BigIntegerField(default=0)
+    results = models.PositiveIntegerField(default=0)
+    stopped = models.CharField(max_length=20, blank=True)
+    telemetry = models.JSONField(default=dict, blank=True)
+
+    # cProfile report (top functions by cumulative time), and the raw
+    # statistics in the pstats file format
+    report = models.TextField(blank=True)
+    raw_stats = models.BinaryField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.lang}/{self.corpus_key} {self.chars!r} ({self.elapsed_s:.2f}s)"
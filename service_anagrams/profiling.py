@@ -0,0 +1,87 @@
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SearchProfile
+from .utils import generate_anagrams, normalize_corpus_choice
+
+# Functions listed in the stored report
+REPORT_LINES = 60
+
+# One profiled search at a time: a profiler can't run in two threads at once
+# on every Python version, and profiles of concurrent searches would mix
+_profile_lock = threading.Lock()
+
+
+def profile_search(user, word, lang, **options):
+    """
+    Run one ``generate_anagrams`` search under cProfile and store its profile.
+
+    The search bypasses the result cache and the single flight, so that it
+    really runs (in this thread) and a cached answer doesn't hide a slow
+    input. With ``settings.ANAGRAM_PARALLEL_WORKERS`` the profile only covers
+    the process merging the chunks; the engine counters cover all of them.
+
+    Args:
+        user: The user asking for the profile
+        word (str): Letters to search
+        lang (str): Language code
+        **options: Other ``generate_anagrams`` keyword arguments
+
+    Returns:
+        tuple: ``(results, profile)``, the ``generate_anagrams`` results
+        and the saved SearchProfile
+    """
+    profiler = cProfile.Profile()
+    with _profile_lock:
+        results = profiler.runcall(generate_anagrams, word, lang, use_cache=False, **options)
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats("cumulative").print_stats(REPORT_LINES)
+    telemetry = results.get("telemetry") or {}
+    corpus_lang, corpus_key = normalize_corpus_choice(lang, options.get("corpus_key"))
+    profile = SearchProfile.objects.create(
+        user=user if user is not None and user.is_authenticated else None,
+        chars=word[:255],
+        lang=corpus_lang,
+        corpus_key=corpus_key,
+        search_mode=results.get("search_mode") or "",
+        options={key: value for key, value in options.items() if key not in ("cancel", "progress")},
+        elapsed_s=telemetry.get("elapsed_s", 0),
+        nodes=telemetry.get("nodes", 0),
+        prunes=telemetry.get("prunes", 0),
+        results=results.get("n_results", 0),
+        stopped=results.get("stopped") or "",
+        telemetry=telemetry,
+        report=report.getvalue(),
+        # Same content as Stats.dump_stats writes
+        raw_stats=marshal.dumps(stats.stats),
+    )
+    apply_retention()
+    return results, profile
+
+
+def apply_retention():
+    """
+    Delete the profiles older than ``settings.ANAGRAM_PROFILE_RETENTION_DAYS``
+    and all but the newest ``settings.ANAGRAM_PROFILE_MAX_COUNT``.
+
+    Returns:
+        int: Number of profiles deleted
+    """
+    deleted = 0
+    days = getattr(settings, "ANAGRAM_PROFILE_RETENTION_DAYS", 14)
+    if days:
+        deleted += SearchProfile.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()[0]
+    max_count = getattr(settings, "ANAGRAM_PROFILE_MAX_COUNT", 100)
+    if max_count:
+        keep = SearchProfile.objects.values_list("pk", flat=True)[:max_count]
+        deleted += SearchProfile.objects.exclude(pk__in=list(keep)).delete()[0]
+    return deleted
@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusRegistry:
+    """
+    Process-wide registry of ready-to-use anagram generators.
+
+    Each (lang, corpus_key) pair is built at most once per process by the
+    loader callable and then kept warm, so the web views and the Telegram
+    handlers share the same Trie instead of rebuilding it on every request.
+    """
+
+    def __init__(self, loader: Callable[[str, str], object]):
+        """
+        Args:
+            loader (callable): Function ``loader(lang, corpus_key)`` returning
+                a fully built generator for that corpus
+        """
+        self._loader = loader
+        self._generators: Dict[Tuple[str, str], object] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def get(self, lang: str, corpus_key: str):
+        """
+        Return the generator for a corpus, building it on first use.
+
+        Concurrent first requests for the same corpus wait for a single
+        build instead of loading the file several times.
+        """
+        key = (lang, corpus_key)
+        generator = self._generators.get(key)
+        if generator is not None:
+            return generator
+
+        with self._lock_for(key):
+            generator = self._generators.get(key)
+            if generator is None:
+                logger.info("Loading corpus %s/%s", lang, corpus_key)
+                generator = self._loader(lang, corpus_key)
+                self._generators[key] = generator
+        return generator
+
+    def preload(self, entries: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Eagerly build the given corpora.
+
+        Corpora that fail to load (e.g. a missing data file) are logged and
+        skipped, they will be retried lazily on first use.
+
+        Returns:
+            list: The (lang, corpus_key) pairs that are now loaded
+        """
+        loaded = []
+        for lang, corpus_key in entries:
+            try:
+                self.get(lang, corpus_key)
+            except OSError as e:
+                logger.warning("Unable to preload corpus %s/%s: %s", lang, corpus_key, e)
+                continue
+            loaded.append((lang, corpus_key))
+        return loaded
+
+    def is_loaded(self, lang: str, corpus_key: str) -> bool:
+        return (lang, corpus_key) in self._generators
+
+    def loaded(self) -> List[Tuple[str, str]]:
+        """Return the (lang, corpus_key) pairs currently kept in memory."""
+        return list(self._generators)
+
+    def evict(self, lang: str, corpus_key: str) -> None:
+        """Drop a corpus from memory, it will be rebuilt on next use."""
+        self._generators.pop((lang, corpus_key), None)
+
+    def clear(self) -> None:
+        self._generators.clear()
@@ -0,0 +1,69 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+from .alphabets import get_alphabet
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the search or to the result format makes the
+# cached results stale
+RESULT_CACHE_VERSION = 5
+
+
+def get_result_cache():
+    """
+    Return the Django cache holding anagram results, or None if disabled.
+
+    The cache alias comes from ``settings.ANAGRAM_RESULT_CACHE``: any backend
+    of Django's cache framework works (locmem for a single process, file
+    based or a cache server to share results between workers and the bot).
+    """
+    alias = getattr(settings, "ANAGRAM_RESULT_CACHE", None)
+    if not alias:
+        return None
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        logger.warning("Anagram result cache %r is not configured in CACHES", alias)
+        return None
+
+
+def is_cacheable(results):
+    """
+    Tell whether a search's results may be cached.
+
+    Only complete searches, or those that stopped at their result cap,
+    qualify: a cancelled search and one cut off by its timeout return a
+    partial, load-dependent list that must not be served to later callers.
+    """
+    return results.get("stopped") in (None, "max_results")
+
+
+def canonical_letters(word, lang):
+    """Return the letters of ``word`` the search uses in ``lang``, in sorted order."""
+    return "".join(sorted(get_alphabet(lang).fold(word)))
+
+
+def make_result_key(word, lang, corpus_key, **options):
+    """
+    Return the cache key of a search.
+
+    Only the multiset of letters matters to the search, so "Roma", "amor"
+    and "a m o r" share the key: the letters are folded with the alphabet
+    of ``lang`` and sorted.
+    Every option that changes the results (word constraints, ordering,
+    search mode, number of results) is part of the key.
+
+    Args:
+        word (str): Raw user input
+        lang (str): Language code
+        corpus_key (str): Corpus key within the language
+        **options: Search options, with plain (repr-stable) values
+    """
+    query = "|".join([canonical_letters(word, lang)] + [f"{name}={options[name]!r}" for name in sorted(options)])
+    # Hashed: keys must stay short and free of special characters for cache servers
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    return f"anagrams:{lang}:{corpus_key}:{digest}"
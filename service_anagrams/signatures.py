@@ -0,0 +1,512 @@
+from itertools import combinations_with_replacement, product
+import math
+import time
+
+from .memo import MIN_MEMO_LETTERS, multiset_key
+
+# Number of visited nodes between two deadline checks in the search loop
+CHECK_INTERVAL = 1024
+
+# Word costs are integers, in 1/COST_SCALE bits
+COST_SCALE = 1000
+
+
+def rank_cost(rank):
+    """
+    Return the cost of a word from its frequency rank (0 = most common).
+
+    Word frequencies roughly follow Zipf's law (probability ~ 1 / rank), so
+    the cost is about the information of the word, -log2(probability): the
+    cost of a phrase, the sum of its word costs, is lower for phrases of
+    common words and for phrases of fewer words. Every word costs at least
+    COST_SCALE.
+    """
+    return int(COST_SCALE * math.log2(rank + 2))
+
+
+def signature(word):
+    """Return the alphagram of a word: its letters in sorted order."""
+    return "".join(sorted(word))
+
+
+class SignatureIndex:
+    """
+    Words grouped by alphagram signature ("amor", "mora", "roma" -> "amor").
+
+    The search works on the multiset of input letters and picks combinations
+    of signatures instead of walking a Trie letter by letter, so words made of
+    the same letters are explored once. They are expanded back to real words
+    only when a result is produced.
+    """
+
+    def __init__(self, words, spellings=None, ranks=None):
+        """
+        Build the index.
+
+        Args:
+            words (iterable): Words of the corpus, as stored in the index
+            spellings (dict): Optional stored word -> original spellings
+                (see ``Alphabet.fold_words``); groups then hold the
+                original spellings
+            ranks (dict): Optional stored word -> frequency rank, for the
+                word costs of ``search_ranked`` (default: the order of
+                ``words``)
+        """
+        spellings = spellings or {}
+        ranks = ranks or {}
+        groups = {}
+        # Word, in every spelling -> cost (see rank_cost)
+        costs = {}
+        for position, word in enumerate(words):
+            variants = spellings.get(word, (word,))
+            groups.setdefault(signature(word), []).extend(variants)
+            cost = rank_cost(ranks.get(word, position))
+            for variant in variants:
+                costs[variant] = cost
+        for group in groups.values():
+            group.sort()
+        self.groups = groups
+        self.costs = costs
+        # Cheapest word of each signature
+        self.signature_costs = {sig: min(costs[word] for word in group) for sig, group in groups.items()}
+
+        alphabet = sorted(set("".join(groups)))
+        self._bits = {letter: 1 << bit for bit, letter in enumerate(alphabet)}
+        self._masks = [(sig, self.mask(sig)) for sig in groups]
+
+    def __len__(self):
+        return len(self.groups)
+
+    def mask(self, letters):
+        """Return the bitmask of the distinct letters in ``letters``."""
+        bits = self._bits
+        mask = 0
+        for letter in set(letters):
+            mask |= bits.get(letter, 0)
+        return mask
+
+    def candidates(self, counts):
+        """
+        Return the signatures that fit in the given letter multiset.
+
+        Args:
+            counts (dict): Letter -> number of available occurrences
+        """
+        if any(letter not in self._bits for letter in counts):
+            # Letters outside the corpus alphabet can never be used up
+            return []
+        available = self.mask(counts)
+        total = sum(counts.values())
+        fitting = []
+        for sig, mask in self._masks:
+            if mask & ~available or len(sig) > total:
+                continue
+            if all(sig.count(letter) <= counts[letter] for letter in set(sig)):
+                fitting.append(sig)
+        return fitting
+
+    def search(
+        self,
+        counts,
+        deadline,
+        stats,
+        dead_ends=None,
+        memo_scope=(),
+        word_cap=None,
+        cancel=None,
+        progress=None,
+        min_word_length=None,
+        max_word_length=None,
+        max_words=None,
+        exact_words=False,
+    ):
+        """
+        Yield every combination of signatures using exactly the given letters.
+
+        Letters are ranked from the rarest to the most frequent in the input
+        and every signature is filed under its rarest letter. At each step the
+        search only tries signatures filed under the rarest letter still left
+        (some word must use it), and picks them in non-decreasing index order,
+        so each multiset of signatures is produced exactly once.
+
+        Args:
+            counts (dict): Letter -> number of occurrences to use
+            deadline (float): ``time.time()`` value after which the search stops
+            stats (dict): Statistics dictionary, updated when the search ends
+            dead_ends (DeadEndTable): Optional table of leftover multisets
+                known to have no solution, consulted and updated
+            memo_scope (tuple): Search constraints, part of the dead end keys
+            word_cap (list): Optional one-item list with the maximum number of
+                signatures per solution, read live: combinations that would
+                need more are cut
+            cancel: Optional object whose ``is_set()`` returning True stops
+                the search, checked along with the deadline
+            progress (callable): Optional ``progress(calls)`` called with the
+                nodes visited so far, along with the deadline checks
+            min_word_length (int): Shortest signature allowed
+            max_word_length (int): Longest signature allowed
+            max_words (int): Maximum number of signatures per solution
+            exact_words (bool): Only yield solutions of exactly ``max_words``
+                signatures
+
+        Yields:
+            tuple: Signatures of one solution, in the order they were picked
+        """
+        order = sorted(counts, key=lambda letter: (counts[letter], letter))
+        position = {letter: pos for pos, letter in enumerate(order)}
+        n_positions = len(order)
+        remaining = [counts[letter] for letter in order]
+
+        buckets = [[] for _ in order]
+        for sig in self.candidates(counts):
+            if min_word_length and len(sig) < min_word_length:
+                continue
+            if max_word_length and len(sig) > max_word_length:
+                continue
+            vector = sorted(
+                (position[letter], sig.count(letter)) for letter in set(sig)
+            )
+            buckets[vector[0][0]].append((sig, vector))
+        for bucket in buckets:
+            # Longer signatures first: results with fewer, longer words come out early
+            bucket.sort(key=lambda item: (-len(item[0]), item[0]))
+
+        left = sum(remaining)
+        if not left:
+            return
+
+        lengths = [len(sig) for bucket in buckets for sig, _ in bucket]
+        longest = max(lengths, default=1)
+        shortest = min(lengths, default=1)
+        # Dead ends depend on how many more words are allowed, if limited
+        count_limited = bool(max_words)
+        # Solutions never need more words than letters
+        max_words = max_words or left
+        min_words = max_words if exact_words else 1
+
+        use_memo = dead_ends is not None and dead_ends.max_entries > 0
+        # Under a word cap an empty subtree may only mean "too many words",
+        # so dead ends are looked up but not recorded
+        record_memo = word_cap is None
+        # Position order used to build canonical dead end keys
+        perm = sorted(range(n_positions), key=order.__getitem__)
+        sorted_letters = [order[q] for q in perm]
+
+        # Frames are [bucket position, next index, dead end key, results found before]
+        chosen = []
+        stack = [[0, 0, None, 0]]
+        calls = 1
+        found = 0
+        completed_words = 0
+        memo_hits = 0
+        budget = CHECK_INTERVAL
+
+        try:
+            while stack:
+                frame = stack[-1]
+                p, j = frame[0], frame[1]
+                bucket = buckets[p]
+
+                while j < len(bucket):
+                    for q, n in bucket[j][1]:
+                        if remaining[q] < n:
+                            break
+                    else:
+                        break
+                    j += 1
+                else:
+                    # Bucket exhausted: backtrack, giving back the parent's pick
+                    stack.pop()
+                    if frame[2] is not None and found == frame[3]:
+                        dead_ends.record(frame[2])
+                    if chosen:
+                        sig, vector = chosen.pop()
+                        for q, n in vector:
+                            remaining[q] += n
+                        left += len(sig)
+                    continue
+
+                frame[1] = j + 1
+                sig, vector = bucket[j]
+                for q, n in vector:
+                    remaining[q] -= n
+                left -= len(sig)
+                chosen.append(bucket[j])
+                calls += 1
+                completed_words += 1
+
+                # Fewest (and, for exact_words, most) words this combination
+                # could still end with
+                cap = max_words
+                if word_cap is not None and word_cap[0] < cap:
+                    cap = word_cap[0]
+                if (
+                    len(chosen) + -(-left // longest) > cap
+                    or len(chosen) + left // shortest < min_words
+                ):
+                    chosen.pop()
+                    for q, n in vector:
+                        remaining[q] += n
+                    left += len(sig)
+                    continue
+
+                budget -= 1
+                if not budget:
+                    budget = CHECK_INTERVAL
+                    if time.time() > deadline:
+                        stats['stopped'] = 'timeout'
+                        return
+                    if cancel is not None and cancel.is_set():
+                        stats['stopped'] = 'cancelled'
+                        return
+                    if progress is not None:
+                        progress(calls)
+
+                if not left:
+                    found += 1
+                    yield tuple(item[0] for item in chosen)
+                    chosen.pop()
+                    for q, n in vector:
+                        remaining[q] += n
+                    left += len(sig)
+                    continue
+
+                # Rarest letter still left; earlier positions are all used up
+                next_p = p
+                while not remaining[next_p]:
+                    next_p += 1
+                # Same bucket: allow picking the same signature again, never an earlier one
+                start = j if next_p == p else 0
+
+                # A fresh bucket explores every way to use the leftover letters,
+                # so its outcome is worth remembering across searches
+                key = None
+                if use_memo and not start and left >= MIN_MEMO_LETTERS:
+                    key = (
+                        memo_scope,
+                        multiset_key(sorted_letters, map(remaining.__getitem__, perm)),
+                        max_words - len(chosen) if count_limited else None,
+                    )
+                    if dead_ends.is_dead(key):
+                        memo_hits += 1
+                        chosen.pop()
+                        for q, n in vector:
+                            remaining[q] += n
+                        left += len(sig)
+                        continue
+                    if not record_memo:
+                        key = None
+                stack.append([next_p, start, key, found])
+        finally:
+            stats['calls'] += calls
+            stats['completed_words'] += completed_words
+            stats['memo_hits'] = stats.get('memo_hits', 0) + memo_hits
+
+    def search_ranked(
+        self,
+        counts,
+        deadline,
+        stats,
+        cost_cap=None,
+        cancel=None,
+        progress=None,
+        min_word_length=None,
+        max_word_length=None,
+        max_words=None,
+        exact_words=False,
+    ):
+        """
+        Yield combinations of signatures using exactly the given letters,
+        cheapest words first, cut by cost.
+
+        Same enumeration as ``search`` (every multiset of signatures once,
+        through the rarest letter left), but each bucket is tried from its
+        cheapest signature (see ``signature_costs``), so phrases of common
+        words come first. A combination is dropped as soon as its cost so
+        far plus the least its leftover letters can cost (the fewest words
+        that could use them, each as cheap as the cheapest candidate)
+        reaches ``cost_cap``: a consumer keeping the K best phrases lowers
+        the cap to the K-th best cost and the search narrows down to the
+        combinations that can still beat it.
+
+        Args:
+            counts (dict): Letter -> number of occurrences to use
+            deadline (float): ``time.time()`` value after which the search stops
+            stats (dict): Statistics dictionary, updated when the search ends
+            cost_cap (list): Optional one-item list with the cost a
+                combination must stay below, read live
+            cancel: Optional object whose ``is_set()`` returning True stops
+                the search, checked along with the deadline
+            progress (callable): Optional ``progress(calls)`` called with the
+                nodes visited so far, along with the deadline checks
+            min_word_length (int): Shortest signature allowed
+            max_word_length (int): Longest signature allowed
+            max_words (int): Maximum number of signatures per solution
+            exact_words (bool): Only yield solutions of exactly ``max_words``
+                signatures
+
+        Yields:
+            tuple: ``(cost, signatures)``, the cost of the cheapest phrase of
+            the combination and its signatures
+        """
+        if cost_cap is None:
+            cost_cap = [math.inf]
+        signature_costs = self.signature_costs
+        order = sorted(counts, key=lambda letter: (counts[letter], letter))
+        position = {letter: pos for pos, letter in enumerate(order)}
+        remaining = [counts[letter] for letter in order]
+
+        buckets = [[] for _ in order]
+        for sig in self.candidates(counts):
+            if min_word_length and len(sig) < min_word_length:
+                continue
+            if max_word_length and len(sig) > max_word_length:
+                continue
+            vector = sorted(
+                (position[letter], sig.count(letter)) for letter in set(sig)
+            )
+            buckets[vector[0][0]].append((sig, vector, signature_costs[sig]))
+        for bucket in buckets:
+            # Cheapest (most common) signatures first
+            bucket.sort(key=lambda item: (item[2], item[0]))
+
+        left = sum(remaining)
+        if not left:
+            return
+
+        candidates = [item for bucket in buckets for item in bucket]
+        longest = max((len(item[0]) for item in candidates), default=1)
+        shortest = min((len(item[0]) for item in candidates), default=1)
+        cheapest = min((item[2] for item in candidates), default=0)
+        max_words = max_words or left
+        min_words = max_words if exact_words else 1
+
+        # Frames are [bucket position, next index]
+        chosen = []
+        cost = 0
+        stack = [[0, 0]]
+        calls = 1
+        completed_words = 0
+        prunes = 0
+        budget = CHECK_INTERVAL
+
+        try:
+            while stack:
+                frame = stack[-1]
+                p, j = frame
+                bucket = buckets[p]
+
+                while j < len(bucket):
+                    if cost + bucket[j][2] >= cost_cap[0]:
+                        # The rest of the bucket costs at least as much
+                        prunes += 1
+                        j = len(bucket)
+                        break
+                    for q, n in bucket[j][1]:
+                        if remaining[q] < n:
+                            break
+                    else:
+                        break
+                    j += 1
+                if j == len(bucket):
+                    # Bucket exhausted: backtrack, giving back the parent's pick
+                    stack.pop()
+                    if chosen:
+                        sig, vector, sig_cost = chosen.pop()
+                        for q, n in vector:
+                            remaining[q] += n
+                        left += len(sig)
+                        cost -= sig_cost
+                    continue
+
+                frame[1] = j + 1
+                sig, vector, sig_cost = item = bucket[j]
+                for q, n in vector:
+                    remaining[q] -= n
+                left -= len(sig)
+                cost += sig_cost
+                chosen.append(item)
+                calls += 1
+                completed_words += 1
+
+                # Fewest words the leftover letters need, each at least the cheapest
+                fewest = -(-left // longest)
+                if (
+                    len(chosen) + fewest > max_words
+                    or len(chosen) + left // shortest < min_words
+                    or cost + fewest * cheapest >= cost_cap[0]
+                ):
+                    prunes += 1
+                    chosen.pop()
+                    for q, n in vector:
+                        remaining[q] += n
+                    left += len(sig)
+                    cost -= sig_cost
+                    continue
+
+                budget -= 1
+                if not budget:
+                    budget = CHECK_INTERVAL
+                    if time.time() > deadline:
+                        stats['stopped'] = 'timeout'
+                        return
+                    if cancel is not None and cancel.is_set():
+                        stats['stopped'] = 'cancelled'
+                        return
+                    if progress is not None:
+                        progress(calls)
+
+                if not left:
+                    yield cost, tuple(entry[0] for entry in chosen)
+                    chosen.pop()
+                    for q, n in vector:
+                        remaining[q] += n
+                    left += len(sig)
+                    cost -= sig_cost
+                    continue
+
+                # Rarest letter still left; earlier positions are all used up
+                next_p = p
+                while not remaining[next_p]:
+                    next_p += 1
+                # Same bucket: allow picking the same signature again, never an earlier one
+                stack.append([next_p, j if next_p == p else 0])
+        finally:
+            stats['calls'] += calls
+            stats['completed_words'] += completed_words
+            stats['prunes'] += prunes
+
+    def phrase_cost(self, phrase):
+        """Return the cost of a phrase: the sum of its word costs."""
+        costs = self.costs
+        return sum(costs[word] for word in phrase)
+
+    def expand(self, signatures, grouped=False):
+        """
+        Turn a combination of signatures back into phrases of real words.
+
+        Args:
+            signatures (tuple): Signatures of one solution
+            grouped (bool): If True, yield a single compact phrase where each
+                signature with several words reads as "{amor|mora|roma}"
+
+        Yields:
+            list: Phrases as lists of words, sorted alphabetically
+        """
+        if grouped:
+            yield sorted(
+                self.groups[sig][0] if len(self.groups[sig]) == 1
+                else "{" + "|".join(self.groups[sig]) + "}"
+                for sig in signatures
+            )
+            return
+
+        multiplicity = {}
+        for sig in signatures:
+            multiplicity[sig] = multiplicity.get(sig, 0) + 1
+        choices = [
+            combinations_with_replacement(self.groups[sig], n)
+            for sig, n in multiplicity.items()
+        ]
+        for parts in product(*choices):
+            yield sorted(word for part in parts for word in part)
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: coalesce within the process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two attempts at taking a busy cross-process lock
+LOCK_POLL_INTERVAL = 0.05
+
+# Seconds between two cancellation checks of a waiting caller
+WAIT_POLL_INTERVAL = 0.25
+
+# Keys are spread over this many lock files, so the lock directory stays
+# small; two keys sharing a file only delay each other
+LOCK_STRIPES = 256
+
+
+class _Flight:
+    """
+    One running computation and the callers waiting for it.
+
+    Also the cancellation token handed to the computation: it is set only
+    once every caller has given up, so a search keeps running as long as
+    someone still wants its result.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        # Cancellation tokens of the callers (None: can't be cancelled)
+        self.cancels = []
+
+    def is_set(self):
+        return all(cancel is not None and cancel.is_set() for cancel in self.cancels)
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent computations into a single one.
+
+    Within a process, the first caller for a key runs the computation and
+    later callers with the same key wait for it and receive the same
+    result. Across processes, the leader of each process also takes an
+    exclusive file lock for the key: while another process holds it, the
+    leader keeps checking the shared result cache instead of starting the
+    same search, and runs it only if the lock frees up without a result.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None):
+        """
+        Args:
+            lock_dir (str): Directory for the cross-process lock files, or
+                None to coalesce within the process only
+        """
+        self.lock_dir = lock_dir
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: str,
+        compute: Callable[[object], object],
+        lookup: Optional[Callable[[], object]] = None,
+        timeout: float = 60,
+        cancel=None,
+    ):
+        """
+        Return ``compute()``, sharing one run between concurrent callers.
+
+        Args:
+            key (str): Identity of the computation
+            compute (callable): ``compute(cancel)`` runs the computation (and
+                stores its result where ``lookup`` finds it, for other
+                processes); ``cancel.is_set()`` tells when every caller has
+                given up
+            lookup (callable): Returns the result if another process already
+                stored it, else None
+            timeout (float): Longest wait for another process before
+                computing anyway
+            cancel: Optional token of this caller, with an ``is_set()``
+                method; once set, the caller stops waiting
+
+        Returns:
+            The result, or None if this caller was cancelled while waiting;
+            exceptions raised by ``compute`` reach every caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+            flight.cancels.append(cancel)
+
+        if not leader:
+            while not flight.done.wait(WAIT_POLL_INTERVAL if cancel is not None else None):
+                if cancel.is_set():
+                    return None
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._run_locked(key, compute, lookup, timeout, flight)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            if flight.waiters:
+                logger.info("Coalesced %d identical searches into one (%s)", flight.waiters, key)
+        return flight.result
+
+    def in_flight(self) -> int:
+        """Return the number of computations currently running in this process."""
+        return len(self._flights)
+
+    def _run_locked(self, key, compute, lookup, timeout, flight):
+        if fcntl is None or self.lock_dir is None or lookup is None:
+            return compute(flight)
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+        path = os.path.join(self.lock_dir, f"{stripe:03d}.lock")
+        with open(path, "a") as lock_file:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    # Another process is running this search: wait for its result
+                    result = lookup()
+                    if result is not None:
+                        return result
+                    if flight.is_set():
+                        return None
+                    if time.monotonic() > deadline:
+                        logger.warning("Gave up waiting for another process on %s", key)
+                        return compute(flight)
+                    time.sleep(LOCK_POLL_INTERVAL)
+
+            try:
+                # The previous holder may have just stored the result
+                result = lookup()
+                if result is None:
+                    result = compute(flight)
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
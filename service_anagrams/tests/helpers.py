@@ -0,0 +1,70 @@
+"""Corpus, reference search and fixtures shared by the service_anagrams tests."""
+
+from collections import Counter
+from unittest import mock
+
+from django.core.cache import caches
+
+from .. import utils
+from ..anagramgen_fork import AnagramGenerator, Trie
+from ..registry import CorpusRegistry
+
+
+# A tiny corpus, most common words first (their rank is their position)
+WORDS = [
+    "a", "i", "on", "no", "or", "to", "at", "as", "so", "it", "is", "in",
+    "an", "am", "me", "ma", "tan", "ant", "not", "ton", "sit", "its",
+    "tis", "rat", "art", "tar", "star", "rats", "arts", "tars", "moon",
+    "mono", "soon", "roam", "roma", "amor", "mora", "ram", "arm", "mar",
+    "oar", "ora", "nor", "torn", "iron", "noir", "into", "onto", "mist",
+]
+
+INPUTS = ["astronomer", "moon star", "roman", "station", "airman"]
+
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "anagram-tests": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "anagram-tests"},
+}
+
+
+def brute_force(words, letters):
+    """Every multiset of ``words`` spelling exactly ``letters``, as sorted tuples."""
+    words = sorted(set(words))
+    found = set()
+
+    def extend(start, remaining, phrase):
+        if not remaining:
+            found.add(tuple(phrase))
+            return
+        for i in range(start, len(words)):
+            needed = Counter(words[i])
+            if all(remaining[letter] >= n for letter, n in needed.items()):
+                extend(i, remaining - needed, phrase + [words[i]])
+
+    extend(0, Counter(letters.replace(" ", "")), [])
+    return found
+
+
+def multisets(phrases):
+    return {tuple(sorted(phrase)) for phrase in phrases}
+
+
+def make_generator(trie_class=Trie, words=WORDS):
+    return AnagramGenerator(words, trie_class=trie_class, dead_end_table_size=1000)
+
+
+def use_tiny_corpus(test):
+    """
+    Serve every corpus from WORDS during ``test`` (a TestCase), with an
+    empty "anagram-tests" result cache and searches only coalesced within
+    the process.
+    """
+    caches["anagram-tests"].clear()
+    patches = [
+        mock.patch.object(utils, "corpus_registry", CorpusRegistry(lambda lang, corpus_key: make_generator())),
+        mock.patch.object(utils.single_flight, "lock_dir", None),
+    ]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..alphabets import Alphabet, get_alphabet
+from ..anagramgen_fork import AnagramGenerator
+
+
+@override_settings(ANAGRAM_ALPHABETS={"it": {"letters": "abcdefghijklmnopqrstuvwxyz", "fold_accents": True}})
+class AlphabetTests(SimpleTestCase):
+    def setUp(self):
+        get_alphabet.cache_clear()
+        self.addCleanup(get_alphabet.cache_clear)
+
+    def test_fold(self):
+        alphabet = get_alphabet("it")
+        self.assertEqual(alphabet.fold("Città"), "citta")
+        self.assertEqual(alphabet.fold("Perché no?"), "percheno")
+        self.assertEqual(alphabet.fold("l'abat-jour"), "labatjour")
+        self.assertEqual(Alphabet("abc").fold("àbcd"), "bc")
+
+    def test_fold_words(self):
+        words, spellings = get_alphabet("it").fold_words(["Città", "citta", "DNA", "perché", "", "!!"])
+        self.assertEqual(words, ["citta", "dna", "perche"])
+        self.assertEqual(spellings, {"citta": ("citta", "città"), "perche": ("perché",)})
+
+    def test_kept_letters(self):
+        alphabet = Alphabet("abcdefghijklmnopqrstuvwxyzè", {"é": "e"})
+        self.assertEqual(alphabet.fold("perché è"), "percheè")
+
+    def test_respelling(self):
+        generator = AnagramGenerator(["città", "ti", "cat", "a"], alphabet=get_alphabet("it"))
+        self.assertEqual(list(generator.respell(["citta", "a"])), [["città", "a"]])
+        self.assertEqual(list(generator.respell(["cat", "ti"])), [["cat", "ti"]])
+        anagrams = generator.generate("A Città", prioritize_long_words=False)["anagrams"]
+        self.assertIn(["a", "città"], anagrams)
+        self.assertEqual(generator.word_sources("Città"), [])
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import Client, SimpleTestCase, override_settings
+
+from .. import views
+from ..cancellation import LatestSearches
+from .helpers import TEST_CACHES
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LatestSearchesTests(SimpleTestCase):
+    def test_newer_search_cancels_older_one(self):
+        searches = LatestSearches()
+        older = searches.start("c:page")
+        other = searches.start("c:other-page")
+        newer = searches.start("c:page")
+        self.assertTrue(older.is_set())
+        self.assertFalse(newer.is_set())
+        self.assertFalse(other.is_set())
+
+    def test_anonymous_search_is_never_superseded(self):
+        searches = LatestSearches()
+        token = searches.start(None)
+        searches.start(None)
+        self.assertFalse(token.is_set())
+        token.set()
+        self.assertTrue(token.is_set())
+
+    @mock.patch("service_anagrams.cancellation.POLL_INTERVAL", 0)
+    def test_newer_search_in_another_process(self):
+        caches["anagram-tests"].clear()
+        # Two processes sharing the sequence cache
+        here = LatestSearches("anagram-tests")
+        there = LatestSearches("anagram-tests")
+        token = here.start("c:page")
+        self.assertFalse(token.is_set())
+        there.start("c:page")
+        self.assertTrue(token.is_set())
+
+    def test_forgets_least_recently_active_clients(self):
+        searches = LatestSearches(max_clients=2)
+        for client in ("c:first", "c:second", "c:third"):
+            searches.start(client)
+        self.assertEqual(searches.local_seq("c:first"), 0)
+        self.assertEqual(searches.local_seq("c:third"), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HintCancellationTests(SimpleTestCase):
+    url = "/anagrams/en/fetch/astronomer/"
+
+    def setUp(self):
+        patch = mock.patch.object(views, "latest_searches", LatestSearches())
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.started = threading.Event()
+        self.tokens = []
+
+    def search(self, word, lang, cancel=None, found=None, **options):
+        """A stand-in for generate_anagrams: the first call runs until cancelled."""
+        self.tokens.append(cancel)
+        if len(self.tokens) == 1:
+            if found is not None:
+                found("moon rats")
+            self.started.set()
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if cancel.is_set():
+                    return {"anagrams": [], "stopped": "cancelled"}
+                time.sleep(0.01)
+        return {"anagrams": ["moon rats"], "n_results": 1, "recursion": 1, "stopped": None}
+
+    def test_newer_request_cancels_older_one(self):
+        responses = {}
+
+        def first_request():
+            responses["first"] = Client().get(self.url, {"client": "page-0001"})
+
+        with mock.patch.object(views, "generate_anagrams", side_effect=self.search):
+            thread = threading.Thread(target=first_request)
+            thread.start()
+            self.addCleanup(thread.join, 5)
+            self.assertTrue(self.started.wait(5))
+            # A request from another page doesn't touch it
+            self.assertEqual(Client().get(self.url, {"client": "page-0002"}).json()["status"], "success")
+            self.assertFalse(self.tokens[0].is_set())
+            second = Client().get(self.url, {"client": "page-0001"})
+            thread.join(5)
+        self.assertEqual(responses["first"].json(), {"status": "cancelled"})
+        self.assertEqual(second.json()["status"], "success")
+
+    def test_stream_read_to_the_end_releases_its_search(self):
+        with mock.patch.object(views, "generate_anagrams", side_effect=self.search):
+            # Not the first call: the stand-in answers at once
+            self.tokens.append(None)
+            response = Client().get(self.url + "stream/", {"client": "page-0001"})
+            lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(lines[-1]["status"], "success")
+        self.assertTrue(self.tokens[-1].is_set())
+
+    def test_stream_closed_early_cancels_its_search(self):
+        with mock.patch.object(views, "generate_anagrams", side_effect=self.search):
+            response = Client().get(self.url + "stream/", {"client": "page-0001"})
+            content = iter(response.streaming_content)
+            self.assertEqual(json.loads(next(content))["hint"], "moon rats")
+            self.assertFalse(self.tokens[0].is_set())
+            # The client went away: the server closes the response
+            response.close()
+            self.assertTrue(self.tokens[0].is_set())
@@ -0,0 +1,119 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..anagramgen_fork import AnagramGenerator
+from ..dafsa import Dafsa
+from .helpers import multisets
+
+
+class DafsaTests(SimpleTestCase):
+    """The compiled word index, in memory and saved to a file."""
+
+    def build(self, words=("roma", "amor", "mora", "ram", "a", "citta")):
+        dafsa = Dafsa()
+        for word in words:
+            dafsa.add(word)
+        dafsa.compile()
+        return dafsa
+
+    def save_and_load(self, dafsa):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "corpus.dafsa")
+        dafsa.save(path)
+        return Dafsa.load(path)
+
+    def test_words(self):
+        dafsa = self.build(["roma", "amor", "mora", "ram", "a", "roma"])
+        self.assertEqual(list(dafsa.words()), ["a", "amor", "mora", "ram", "roma"])
+        self.assertIn("mora", dafsa)
+        self.assertNotIn("mor", dafsa)
+        self.assertNotIn("moras", dafsa)
+        self.assertEqual(dafsa.max_word_length, 4)
+
+    def test_word_index_and_tags(self):
+        dafsa = Dafsa()
+        for position, word in enumerate(["roma", "amor", "mora", "ram", "a"]):
+            dafsa.add(word, tags=1 << (position % 2))
+        dafsa.add("roma", tags=4)
+        dafsa.compile()
+        words = list(dafsa.words())
+        for position, word in enumerate(words):
+            self.assertEqual(dafsa.word_index(word), position)
+        self.assertIsNone(dafsa.word_index("rom"))
+        self.assertIsNone(dafsa.word_index("romax"))
+        self.assertEqual(dafsa.word_tags("roma"), 1 | 4)
+        self.assertEqual(dafsa.word_tags("amor"), 2)
+        self.assertEqual(dafsa.word_tags("missing"), 0)
+
+    def test_ranks(self):
+        dafsa = Dafsa()
+        for word, rank in [("roma", 20), ("amor", 10), ("ram", None)]:
+            dafsa.add(word, rank=rank)
+        dafsa.compile()
+        self.assertEqual(dict(dafsa.word_ranks()), {"amor": 10, "ram": 2, "roma": 20})
+
+    def test_round_trip(self):
+        dafsa = self.build()
+        loaded = self.save_and_load(dafsa)
+        self.assertEqual(list(loaded.words()), list(dafsa.words()))
+        for word in dafsa.words():
+            self.assertIn(word, loaded)
+        self.assertNotIn("mor", loaded)
+        self.assertEqual(loaded.max_word_length, dafsa.max_word_length)
+
+        generator = AnagramGenerator(None, index=loaded)
+        self.assertEqual(
+            multisets(generator.generate("amor", prioritize_long_words=False)["anagrams"]),
+            {("amor",), ("mora",), ("roma",)},
+        )
+
+    def test_round_trip_keeps_spellings(self):
+        dafsa = self.build()
+        dafsa.spellings = {"citta": ("città",), "roma": ("roma", "Roma")}
+        self.assertEqual(self.save_and_load(dafsa).spellings, dafsa.spellings)
+
+    def test_spellings_read_from_the_mapping(self):
+        dafsa = self.build(["citta", "cittadino", "perche", "e", "roma"])
+        dafsa.spellings = {"citta": ("città",), "cittadino": ("cittadino", "Cittadino"), "perche": ("perché",), "e": ("è",)}
+        loaded = self.save_and_load(dafsa)
+        self.assertNotIsInstance(loaded.spellings, dict)
+        self.assertEqual(len(loaded.spellings), 4)
+        self.assertEqual(list(loaded.spellings), sorted(dafsa.spellings))
+        for word, variants in dafsa.spellings.items():
+            self.assertEqual(loaded.spellings[word], variants)
+        for word in ("roma", "cit", "cittadin", "cittadinox", "", "zzz"):
+            self.assertNotIn(word, loaded.spellings)
+        self.assertEqual(loaded.spellings.get("roma", ("roma",)), ("roma",))
+
+        generator = AnagramGenerator(None, index=loaded)
+        self.assertEqual(list(generator.respell(["e", "citta"])), [["è", "città"]])
+
+    def test_round_trip_keeps_tags_and_sources(self):
+        dafsa = Dafsa()
+        for position, word in enumerate(["roma", "amor", "mora", "ram", "a"]):
+            dafsa.add(word, tags=1 << (position % 3))
+        dafsa.compile()
+        dafsa.sources = ("first", "second", "third")
+        loaded = self.save_and_load(dafsa)
+        for word in dafsa.words():
+            self.assertEqual(loaded.word_index(word), dafsa.word_index(word))
+            self.assertEqual(loaded.word_tags(word), dafsa.word_tags(word))
+        self.assertEqual(loaded.sources, dafsa.sources)
+
+    def test_round_trip_keeps_ranks(self):
+        dafsa = Dafsa()
+        for rank, word in enumerate(["roma", "amor", "mora", "ram"]):
+            dafsa.add(word, rank=rank * 10)
+        dafsa.compile()
+        self.assertEqual(list(self.save_and_load(dafsa).word_ranks()), list(dafsa.word_ranks()))
+
+    def test_load_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.dafsa")
+            with open(path, "wb") as file:
+                file.write(b"not an index at all")
+            with self.assertRaises(ValueError):
+                Dafsa.load(path)
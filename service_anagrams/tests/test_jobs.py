@@ -0,0 +1,85 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import Client, SimpleTestCase, override_settings
+
+from .. import views
+from ..jobs import JobManager, JobQueueFull
+from .helpers import TEST_CACHES
+
+
+def _slow_search(release):
+    """A stand-in for generate_anagrams running until cancelled or released."""
+
+    def search(word, lang, cancel=None, progress=None, **options):
+        while not release.is_set():
+            if cancel.is_set():
+                return {"anagrams": [], "n_results": 0, "stopped": "cancelled"}
+            progress(1, 0)
+            time.sleep(0.01)
+        return {"anagrams": ["done"], "n_results": 1, "recursion": 5, "stopped": None}
+
+    return search
+
+
+@override_settings(CACHES=TEST_CACHES)
+class JobTests(SimpleTestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        patch = mock.patch("service_anagrams.jobs.generate_anagrams", side_effect=_slow_search(self.release))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.manager = JobManager(max_workers=1, max_pending=2, cache_alias="anagram-tests")
+        self.addCleanup(self.finish_jobs)
+
+    def finish_jobs(self):
+        # Queued jobs must not start once generate_anagrams is no longer patched
+        self.release.set()
+        if self.manager._executor is not None:
+            self.manager._executor.shutdown(wait=True)
+
+    def test_long_poll_returns_at_timeout(self):
+        job = self.manager.submit("roman", "en")
+        start = time.monotonic()
+        polled = self.manager.wait(job["id"], 0.3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertIn(polled["state"], ("queued", "running"))
+
+    def test_long_poll_returns_when_finished(self):
+        job = self.manager.submit("roman", "en")
+        threading.Timer(0.2, self.release.set).start()
+        start = time.monotonic()
+        polled = self.manager.wait(job["id"], 10)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(polled["state"], "done")
+        self.assertEqual(polled["result"]["hints"], ["done"])
+
+    def test_cancel(self):
+        job = self.manager.submit("roman", "en")
+        self.assertTrue(self.manager.cancel(job["id"])["cancel_requested"])
+        self.assertEqual(self.manager.wait(job["id"], 5)["state"], "cancelled")
+
+    def test_queue_limit(self):
+        self.manager.submit("roman", "en")
+        self.manager.submit("roman", "en")
+        with self.assertRaises(JobQueueFull):
+            self.manager.submit("roman", "en")
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.manager.get("missing"))
+        self.assertIsNone(self.manager.cancel("missing"))
+
+    def test_status_view_bounds_the_wait(self):
+        job = self.manager.submit("roman", "en")
+        # Ends the job, so that an unbounded wait fails instead of hanging
+        threading.Timer(3, self.release.set).start()
+        client = Client()
+        with mock.patch.object(views, "job_manager", self.manager):
+            for wait in ("nan", "-1", "abc"):
+                with self.subTest(wait=wait):
+                    start = time.monotonic()
+                    response = client.get(f"/anagrams/jobs/{job['id']}/", {"wait": wait})
+                    self.assertLess(time.monotonic() - start, 1)
+                    self.assertIn(response.json()["job"]["state"], ("queued", "running"))
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+
+@override_settings(ANAGRAM_METRICS_TOKEN="scrape-me")
+class MetricsViewTests(TestCase):
+    url = "/anagrams/metrics/"
+
+    def test_local_address_is_not_enough(self):
+        response = self.client.get(self.url, REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(response.status_code, 403)
+
+    def test_wrong_token(self):
+        for authorization in ("Bearer nope", "Basic scrape-me", "scrape-me"):
+            with self.subTest(authorization=authorization):
+                response = self.client.get(self.url, HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(response.status_code, 403)
+
+    @override_settings(ANAGRAM_METRICS_TOKEN=None)
+    def test_no_token_configured(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
+
+    def test_bearer_token(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    def test_staff_only(self):
+        user = get_user_model().objects.create_user("player", password="secret")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
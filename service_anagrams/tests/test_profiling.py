@@ -0,0 +1,76 @@
+import marshal
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import views
+from ..cancellation import LatestSearches
+from ..models import SearchProfile
+from ..profiling import apply_retention, profile_search
+from .helpers import TEST_CACHES, use_tiny_corpus
+
+
+@override_settings(CACHES=TEST_CACHES, ANAGRAM_RESULT_CACHE="anagram-tests", ANAGRAM_PARALLEL_WORKERS=0)
+class ProfilingTests(TestCase):
+    url = "/anagrams/en/fetch/astronomer/"
+
+    def setUp(self):
+        use_tiny_corpus(self)
+        patch = mock.patch.object(views, "latest_searches", LatestSearches())
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.user = get_user_model().objects.create_user("player", password="secret")
+
+    def make_profiles(self, ages):
+        """Store one empty profile per age (a timedelta), return their pks."""
+        now = timezone.now()
+        pks = []
+        for age in ages:
+            profile = SearchProfile.objects.create(chars="roma", lang="it", corpus_key="tiny", search_mode="trie")
+            SearchProfile.objects.filter(pk=profile.pk).update(created_at=now - age)
+            pks.append(profile.pk)
+        return pks
+
+    def test_staff_profile(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        payload = self.client.get(self.url, {"profile": "1"}).json()
+        profile = SearchProfile.objects.get(pk=payload["profile_id"])
+        self.assertEqual(profile.user, self.user)
+        self.assertEqual(profile.results, payload["n_results"])
+        self.assertGreater(profile.nodes, 0)
+        self.assertNotIn("cancel", profile.options)
+        self.assertIn("generate", profile.report)
+        self.assertTrue(marshal.loads(profile.raw_stats))
+
+    def test_profile_ignored_for_non_staff(self):
+        for login in (False, True):
+            with self.subTest(login=login):
+                if login:
+                    self.client.force_login(self.user)
+                payload = self.client.get(self.url, {"profile": "1"}).json()
+                self.assertEqual(payload["status"], "success")
+                self.assertNotIn("profile_id", payload)
+        self.assertFalse(SearchProfile.objects.exists())
+
+    @override_settings(ANAGRAM_PROFILE_MAX_COUNT=3, ANAGRAM_PROFILE_RETENTION_DAYS=0)
+    def test_keeps_the_newest_profiles(self):
+        pks = self.make_profiles(timedelta(minutes=minutes) for minutes in range(5))
+        self.assertEqual(apply_retention(), 2)
+        self.assertEqual(list(SearchProfile.objects.values_list("pk", flat=True)), pks[:3])
+
+    @override_settings(ANAGRAM_PROFILE_MAX_COUNT=0, ANAGRAM_PROFILE_RETENTION_DAYS=14)
+    def test_deletes_old_profiles(self):
+        recent, _ = self.make_profiles([timedelta(days=13), timedelta(days=15)])
+        self.assertEqual(apply_retention(), 1)
+        self.assertEqual(list(SearchProfile.objects.values_list("pk", flat=True)), [recent])
+
+    @override_settings(ANAGRAM_PROFILE_MAX_COUNT=1)
+    def test_profiling_prunes_older_profiles(self):
+        self.make_profiles([timedelta(minutes=1)])
+        _, profile = profile_search(self.user, "roman", "en")
+        self.assertEqual(list(SearchProfile.objects.all()), [profile])
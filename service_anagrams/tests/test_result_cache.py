@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import utils
+from ..anagramgen_fork import AnagramGenerator
+from ..result_cache import is_cacheable, make_result_key
+from .helpers import TEST_CACHES, use_tiny_corpus
+
+
+@override_settings(CACHES=TEST_CACHES, ANAGRAM_RESULT_CACHE="anagram-tests", ANAGRAM_PARALLEL_WORKERS=0)
+class ResultCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        use_tiny_corpus(self)
+
+    def test_key(self):
+        key = make_result_key("Roma", "it", "corpus", max_results=10)
+        self.assertEqual(key, make_result_key("a m o r", "it", "corpus", max_results=10))
+        self.assertEqual(key, make_result_key("ÀMOR", "it", "corpus", max_results=10))
+        self.assertNotEqual(key, make_result_key("Roma", "it", "corpus", max_results=11))
+        self.assertNotEqual(key, make_result_key("Roma", "it", "other", max_results=10))
+        self.assertNotEqual(key, make_result_key("Roma", "en", "corpus", max_results=10))
+        self.assertNotEqual(key, make_result_key("Romb", "it", "corpus", max_results=10))
+
+    def test_is_cacheable(self):
+        self.assertTrue(is_cacheable({"stopped": None}))
+        self.assertTrue(is_cacheable({"stopped": "max_results"}))
+        self.assertFalse(is_cacheable({"stopped": "timeout"}))
+        self.assertFalse(is_cacheable({"stopped": "cancelled"}))
+
+    def test_spellings_share_one_search(self):
+        with mock.patch.object(utils, "_search_anagrams", wraps=utils._search_anagrams) as search:
+            first = utils.generate_anagrams("astronomer", "en", max_results=20)
+            second = utils.generate_anagrams("Moon Starer", "en", max_results=20)
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_partial_results_not_cached(self):
+        for stopped in ("timeout", "cancelled"):
+            with self.subTest(stopped=stopped):
+                partial = {"success": True, "anagrams": ["a"], "n_results": 1, "stopped": stopped}
+                with mock.patch.object(utils, "_search_anagrams", return_value=partial) as search:
+                    utils.generate_anagrams(f"roman {stopped}", "en")
+                    utils.generate_anagrams(f"roman {stopped}", "en")
+                self.assertEqual(search.call_count, 2)
+
+    def test_stream_shares_the_cache(self):
+        with mock.patch.object(AnagramGenerator, "iter_generate", autospec=True, side_effect=AnagramGenerator.iter_generate) as search:
+            streamed = list(utils.iter_anagrams("astronomer", "en", max_results=30))
+            replayed = list(utils.iter_anagrams("moon starer", "en", max_results=30))
+            fetched = utils.generate_anagrams("astronomer", "en", max_results=30, prioritize_long_words=False)["anagrams"]
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(streamed, replayed)
+        self.assertEqual(streamed, fetched)
+
+    def test_abandoned_stream_not_cached(self):
+        stream = utils.iter_anagrams("astronomer", "en", max_results=30)
+        next(stream)
+        stream.close()
+        with mock.patch.object(utils, "_search_anagrams", wraps=utils._search_anagrams) as search:
+            utils.generate_anagrams("astronomer", "en", max_results=30, prioritize_long_words=False)
+        self.assertEqual(search.call_count, 1)
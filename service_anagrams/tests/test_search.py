@@ -0,0 +1,114 @@
+from django.test import SimpleTestCase
+
+from ..anagramgen_fork import CANCEL_SLOTS, Trie, _CancelFlag
+from ..dafsa import Dafsa
+from .helpers import INPUTS, WORDS, brute_force, make_generator, multisets
+
+
+class SearchTests(SimpleTestCase):
+    """The iterative search against a brute-force reference, on both word indexes."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.generators = {"trie": make_generator(Trie), "dafsa": make_generator(Dafsa)}
+
+    def test_all_anagrams_found(self):
+        for backend, generator in self.generators.items():
+            for letters in INPUTS:
+                with self.subTest(backend=backend, letters=letters):
+                    results = generator.generate(letters, prioritize_long_words=False)
+                    self.assertEqual(multisets(results["anagrams"]), brute_force(WORDS, letters))
+                    self.assertIsNone(results["stopped"])
+
+    def test_signature_mode_finds_all_anagrams(self):
+        for backend, generator in self.generators.items():
+            for letters in INPUTS:
+                with self.subTest(backend=backend, letters=letters):
+                    results = generator.generate(letters, prioritize_long_words=False, search_mode="signature")
+                    self.assertEqual(multisets(results["anagrams"]), brute_force(WORDS, letters))
+                    self.assertIsNone(results["stopped"])
+
+    def test_constraints(self):
+        generator = self.generators["trie"]
+        reference = brute_force(WORDS, "astronomer")
+        cases = [
+            ({"min_word_length": 3}, lambda phrase: min(map(len, phrase)) >= 3),
+            ({"max_word_length": 4}, lambda phrase: max(map(len, phrase)) <= 4),
+            ({"max_words": 2}, lambda phrase: len(phrase) <= 2),
+            ({"max_words": 3, "exact_words": True}, lambda phrase: len(phrase) == 3),
+        ]
+        for options, keep in cases:
+            with self.subTest(**options):
+                results = generator.generate("astronomer", prioritize_long_words=False, **options)
+                self.assertEqual(multisets(results["anagrams"]), {phrase for phrase in reference if keep(phrase)})
+
+    def test_backends_agree(self):
+        for letters in INPUTS:
+            with self.subTest(letters=letters):
+                trie = self.generators["trie"].generate(letters, prioritize_long_words=False)
+                dafsa = self.generators["dafsa"].generate(letters, prioritize_long_words=False)
+                self.assertEqual(trie["anagrams"], dafsa["anagrams"])
+
+    def test_top_k_matches_full_sort(self):
+        generator = self.generators["trie"]
+        for letters in INPUTS:
+            full = generator.generate(letters, prioritize_long_words=True)["anagrams"]
+            for k in (1, 5, 20):
+                with self.subTest(letters=letters, k=k):
+                    top = generator.generate(letters, prioritize_long_words=True, top_k=k)["anagrams"]
+                    self.assertEqual(top, full[:k])
+
+    def test_ranked_top_k_matches_full_enumeration(self):
+        for backend, generator in self.generators.items():
+            index = generator.signatures
+            for letters in INPUTS:
+                costs = sorted(index.phrase_cost(phrase) for phrase in brute_force(WORDS, letters))
+                for k in (1, 3, 10, 1000):
+                    with self.subTest(backend=backend, letters=letters, k=k):
+                        results = generator.generate(letters, search_mode="ranked", top_k=k)["anagrams"]
+                        self.assertEqual([index.phrase_cost(phrase) for phrase in results], costs[:k])
+                        self.assertLessEqual(multisets(results), brute_force(WORDS, letters))
+
+    def test_parallel_matches_serial(self):
+        generator = make_generator(Dafsa)
+        self.addCleanup(generator.close_pool)
+        for letters in INPUTS:
+            with self.subTest(letters=letters):
+                serial = generator.generate(letters, prioritize_long_words=False)["anagrams"]
+                self.assertEqual(generator.generate(letters, prioritize_long_words=False, workers=2)["anagrams"], serial)
+                self.assertEqual(
+                    generator.generate(letters, top_k=5, workers=2)["anagrams"],
+                    generator.generate(letters, top_k=5)["anagrams"],
+                )
+        self.assertEqual(sorted(generator._free_cancel_slots), list(range(CANCEL_SLOTS)))
+
+    def test_reused_cancel_slot_keeps_old_chunks_cancelled(self):
+        flags = [0] * CANCEL_SLOTS
+        flags[3] = 1
+        first = _CancelFlag(flags, 3, 1)
+        self.assertFalse(first.is_set())
+        # The first search ends, a later one takes the slot over
+        flags[3] = 0
+        flags[3] = 2
+        self.assertTrue(first.is_set())
+        self.assertFalse(_CancelFlag(flags, 3, 2).is_set())
+
+    def test_iter_generate_is_lazy(self):
+        generator = self.generators["trie"]
+        stats = {}
+        search = generator.iter_generate("astronomer", stats=stats)
+        first = next(search)
+        search.close()
+        self.assertIn(tuple(sorted(first)), brute_force(WORDS, "astronomer"))
+        self.assertIsNotNone(stats["first_result"])
+
+    def test_found_reports_kept_phrases(self):
+        generator = self.generators["trie"]
+        for options in ({"top_k": 3}, {"search_mode": "ranked", "top_k": 3}, {"prioritize_long_words": False}):
+            with self.subTest(**options):
+                found = []
+                results = generator.generate("astronomer", found=found.append, **options)["anagrams"]
+                self.assertLessEqual({tuple(phrase) for phrase in results}, {tuple(phrase) for phrase in found})
+                if "top_k" not in options:
+                    self.assertEqual(found, results)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from ..cancellation import SearchToken
+from ..singleflight import LOCK_STRIPES, SingleFlight, fcntl
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def compute(self, cancel):
+        self.calls.append(cancel)
+        self.release.wait(5)
+        return {"anagrams": ["moon rats"]}
+
+    def start(self, target, n):
+        """Run ``target`` in ``n`` threads; return their outcomes, filled in as they end."""
+        outcomes = [None] * n
+
+        def run(i):
+            try:
+                outcomes[i] = ("result", target())
+            except Exception as e:
+                outcomes[i] = ("error", e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+        for thread in threads:
+            thread.start()
+            self.addCleanup(thread.join, 5)
+        return threads, outcomes
+
+    def wait_for_waiters(self, key, n):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            flight = self.flights._flights.get(key)
+            if flight is not None and flight.waiters == n:
+                return
+            time.sleep(0.01)
+        self.fail(f"{n} callers never joined the flight")
+
+    def test_concurrent_callers_share_one_computation(self):
+        threads, outcomes = self.start(lambda: self.flights.do("roma", self.compute), 4)
+        self.wait_for_waiters("roma", 3)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual([kind for kind, _ in outcomes], ["result"] * 4)
+        # The very same object: nothing was computed twice
+        self.assertTrue(all(result is outcomes[0][1] for _, result in outcomes))
+        self.assertEqual(self.flights.in_flight(), 0)
+
+    def test_leader_error_reaches_every_caller(self):
+        def compute(cancel):
+            self.calls.append(cancel)
+            self.release.wait(5)
+            raise ValueError("corpus missing")
+
+        threads, outcomes = self.start(lambda: self.flights.do("roma", compute), 3)
+        self.wait_for_waiters("roma", 2)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(self.calls), 1)
+        for kind, error in outcomes:
+            self.assertEqual(kind, "error")
+            self.assertIsInstance(error, ValueError)
+        # The next call starts a new flight
+        self.release.clear()
+        threading.Timer(0.1, self.release.set).start()
+        self.assertEqual(self.flights.do("roma", self.compute), {"anagrams": ["moon rats"]})
+
+    def test_search_cancelled_once_every_caller_gave_up(self):
+        tokens = [SearchToken(), SearchToken()]
+        threads, outcomes = self.start(lambda: self.flights.do("roma", self.compute, cancel=tokens.pop()), 2)
+        self.wait_for_waiters("roma", 1)
+        flight_cancel = self.calls[0]
+        first, second = self.flights._flights["roma"].cancels
+        first.set()
+        self.assertFalse(flight_cancel.is_set())
+        second.set()
+        self.assertTrue(flight_cancel.is_set())
+        # The waiting caller gives up with None at its next check...
+        deadline = time.monotonic() + 5
+        while outcomes.count(None) == 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(("result", None), outcomes)
+        # ...while the leader still returns what its search got to
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertIn(("result", {"anagrams": ["moon rats"]}), outcomes)
+
+    @skipIf(fcntl is None, "no cross-process locks on this platform")
+    def test_waits_for_another_process(self):
+        lock_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(lock_dir.cleanup)
+        self.flights.lock_dir = lock_dir.name
+        cache = {}
+
+        # Another process is running the same search: it holds the key's lock file
+        stripe = int(hashlib.sha1(b"roma").hexdigest(), 16) % LOCK_STRIPES
+        other = open(os.path.join(lock_dir.name, f"{stripe:03d}.lock"), "a")
+        self.addCleanup(other.close)
+        fcntl.flock(other, fcntl.LOCK_EX)
+
+        threads, outcomes = self.start(lambda: self.flights.do("roma", self.compute, lambda: cache.get("roma")), 1)
+        time.sleep(0.2)
+        # ...and stores its result
+        cache["roma"] = {"anagrams": ["mora"]}
+        threads[0].join(5)
+        fcntl.flock(other, fcntl.LOCK_UN)
+        self.assertEqual(outcomes, [("result", {"anagrams": ["mora"]})])
+        self.assertEqual(self.calls, [])
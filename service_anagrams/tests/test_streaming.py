@@ -0,0 +1,62 @@
+import json
+import threading
+from unittest import mock
+from urllib.parse import quote
+
+from django.test import Client, SimpleTestCase, override_settings
+
+from .. import utils, views
+from .helpers import TEST_CACHES, use_tiny_corpus
+
+
+@override_settings(CACHES=TEST_CACHES, ANAGRAM_RESULT_CACHE="anagram-tests", ANAGRAM_PARALLEL_WORKERS=0)
+class StreamingTests(SimpleTestCase):
+    """The NDJSON hints endpoint."""
+
+    def setUp(self):
+        use_tiny_corpus(self)
+
+    def read_stream(self, url, settings=None):
+        client = Client()
+        if settings is not None:
+            client.cookies["anagram_settings"] = quote(json.dumps(settings))
+        response = client.get(url)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_unordered_stream(self):
+        options = {"min_word_length": 1, "max_word_length": 20, "max_results": 50}
+        lines = self.read_stream("/anagrams/en/fetch/astronomer/stream/", dict(options, prioritize_long_words=False))
+        done = lines[-1]
+        self.assertEqual(done["type"], "done")
+        self.assertNotIn("hints", done)
+        hints = [line["hint"] for line in lines if line["type"] == "hint"]
+        self.assertEqual(done["n_results"], len(hints))
+        self.assertEqual(hints, list(utils.iter_anagrams("astronomer", "en", use_cache=False, **options)))
+
+    def test_ordered_stream(self):
+        lines = self.read_stream("/anagrams/en/fetch/astronomer/stream/")
+        hints = [line["hint"] for line in lines if line["type"] == "hint"]
+        done = lines[-1]
+        self.assertEqual(done["type"], "done")
+        self.assertEqual(done["hints"], utils.generate_anagrams("astronomer", "en", max_results=500)["anagrams"])
+        self.assertEqual(done["n_results"], len(done["hints"]))
+        # Every final hint was streamed first, as a provisional one
+        self.assertLessEqual(set(done["hints"]), set(hints))
+
+    def test_ordered_stream_sends_hints_before_the_search_ends(self):
+        release = threading.Event()
+
+        def search(word, lang, found=None, **options):
+            found("moon rats")
+            release.wait(5)
+            return {"anagrams": ["star moon"], "recursion": 1, "stopped": None}
+
+        with mock.patch.object(views, "generate_anagrams", side_effect=search):
+            response = Client().get("/anagrams/en/fetch/astronomer/stream/")
+            content = iter(response.streaming_content)
+            first = json.loads(next(content))
+            self.assertFalse(release.is_set())
+            release.set()
+            done = json.loads(b"".join(content))
+        self.assertEqual(first, {"type": "hint", "hint": "moon rats"})
+        self.assertEqual(done["hints"], ["star moon"])
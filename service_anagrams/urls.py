@@ -5,8 +5,17 @@ from . import views
 urlpatterns = [
     # Hints (anagram generation for unused characters)
     path("<str:lang>/fetch/<str:chars>/", views.fetch_hints, name="fetch_hints"),
+    path("<str:lang>/fetch/<str:chars>/stream/", views.fetch_hints_stream, name="fetch_hints_stream"),
+
+    # Background hint searches (submit, poll / long-poll, cancel)
+    path("jobs/", views.create_job, name="anagram_create_job"),
+    path("jobs/<str:job_id>/", views.job_status, name="anagram_job_status"),
+    path("jobs/<str:job_id>/cancel/", views.cancel_job, name="anagram_cancel_job"),
 
     # Per-user settings (used by the web UI)
     path("settings/", views.get_user_settings, name="anagram_get_settings"),
     path("settings/save/", views.save_user_settings, name="anagram_save_settings"),
+
+    # Search metrics of the process, for staff and a scraper with the metrics token
+    path("metrics/", views.metrics, name="anagram_metrics"),
 ]
\ No newline at end of file
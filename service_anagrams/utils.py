@@ -1,33 +1,125 @@
+import logging
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Tuple
 
-from .anagramgen_fork import AnagramGenerator
+from django.conf import settings
+
+from .alphabets import get_alphabet
+from .anagramgen_fork import AnagramGenerator, Trie
+from .dafsa import Dafsa
+from .metrics import record_search
+from .registry import CorpusRegistry
+from .singleflight import SingleFlight
+from .result_cache import RESULT_CACHE_VERSION, canonical_letters, get_result_cache, is_cacheable, make_result_key
+
+logger = logging.getLogger(__name__)
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
+class CorpusDefinition(NamedTuple):
+    """
+    A corpus: the words of every ``sources`` file merged and deduplicated,
+    minus the words of the ``exclude`` files. Files live in the data folder
+    of the language; each word keeps track of the sources it comes from.
+
+    ``ranking`` lists word lists sorted by frequency, most common first: a
+    word's rank is its line in the first of them holding it (the numbering
+    continues from one list to the next). Words in none of them rank last,
+    all alike, as the rarest word of the corpus would. Used by the "ranked"
+    search mode.
+    """
+
+    label: str
+    sources: Tuple[str, ...]
+    exclude: Tuple[str, ...] = ()
+    ranking: Tuple[str, ...] = ()
+
+
 # Available corpora per language.
-# Keys are logical identifiers used in settings and APIs,
-# values are (filename, human_label).
-CORPORA: Dict[str, Dict[str, Tuple[str, str]]] = {
+# Keys are logical identifiers used in settings and APIs.
+CORPORA: Dict[str, Dict[str, CorpusDefinition]] = {
+    # The Italian word lists are sorted alphabetically, not by frequency:
+    # these corpora have no ranking, every word ranks alike
     "it": {
-        "1000_parole_italiane_comuni": (
-            "1000_parole_italiane_comuni.txt",
+        "1000_parole_italiane_comuni": CorpusDefinition(
             "1.000 parole italiane comuni",
+            ("1000_parole_italiane_comuni.txt",),
+        ),
+        "60000_parole_italiane": CorpusDefinition("60.000 parole italiane", ("60000_parole_italiane.txt",)),
+        "280000_parole_italiane": CorpusDefinition("280.000 parole italiane", ("280000_parole_italiane.txt",)),
+        "parole_verbi_nomi": CorpusDefinition(
+            "506.000 parole italiane, verbi e nomi propri",
+            (
+                "280000_parole_italiane.txt",
+                "110000_parole_italiane_con_nomi_propri.txt",
+                "coniugazione_verbi.txt",
+                "9000_nomi_propri.txt",
+                "400_parole_composte.txt",
+            ),
+            exclude=("lista_badwords.txt",),
+        ),
+        "tutte_le_parole": CorpusDefinition(
+            "686.000 parole italiane, nomi e cognomi",
+            (
+                "280000_parole_italiane.txt",
+                "110000_parole_italiane_con_nomi_propri.txt",
+                "95000_parole_italiane_con_nomi_propri.txt",
+                "coniugazione_verbi.txt",
+                "9000_nomi_propri.txt",
+                "400_parole_composte.txt",
+                "lista_cognomi.txt",
+                "lista_38000_cognomi.txt",
+            ),
+            exclude=("lista_badwords.txt",),
         ),
-        "60000_parole_italiane": ("60000_parole_italiane.txt", "60.000 parole italiane"),
-        "280000_parole_italiane": ("280000_parole_italiane.txt", "280.000 parole italiane"),
-        "660000_parole_italiane": ("660000_parole_italiane.txt", "660.000 parole italiane"),
-        "986700_parole_uniche": ("986700_parole_uniche.txt", "986.700 parole uniche"),
     },
     "en": {
-        "top-5k": ("top-5k.txt", "Top 5k English words"),
-        "top-10k": ("top-10k.txt", "Top 10k English words"),
-        "top-178k": ("top-178k.txt", "Top 178k English words"),
-        "top-370k": ("top-370k.txt", "Top 370k English words"),
+        "top-5k": CorpusDefinition("Top 5k English words", ("top-5k.txt",), ranking=("top-5k.txt",)),
+        "top-10k": CorpusDefinition("Top 10k English words", ("top-10k.txt",), ranking=("top-10k.txt",)),
+        # Sorted alphabetically: ranked by the frequency lists
+        "top-178k": CorpusDefinition(
+            "Top 178k English words",
+            ("top-178k.txt",),
+            ranking=("top-10k.txt", "top-5k.txt"),
+        ),
+        "top-370k": CorpusDefinition(
+            "Top 370k English words",
+            ("top-370k.txt",),
+            ranking=("top-10k.txt", "top-5k.txt"),
+        ),
     },
 }
 
+# Folder of each language's word lists, under data/
+DATA_FOLDERS = {"it": "italian", "en": "english"}
+
+
+# Word index implementations selectable with settings.ANAGRAM_TRIE_BACKEND.
+TRIE_BACKENDS = {
+    "dict": Trie,
+    "dafsa": Dafsa,
+}
+
+
+# Search strategies understood by AnagramGenerator.generate.
+SEARCH_MODES = ("trie", "signature", "ranked")
+
+# Seconds a single search may run.
+SEARCH_TIMEOUT = 30
+
+# Internal cap for search space: independent from user-facing max_results.
+# The user-facing "number of results" should act on the *final* list,
+# not on the raw generation depth/limit.
+SEARCH_MAX_RESULTS = 10000
+
+
+def get_trie_class(backend: str | None = None):
+    """Return the word index class for a backend name (default from settings)."""
+    if backend is None:
+        backend = getattr(settings, "ANAGRAM_TRIE_BACKEND", "dict")
+    return TRIE_BACKENDS.get(backend, Trie)
+
 
 def get_default_corpus_key(lang: str) -> str:
     """Return the default logical corpus key for a given language."""
@@ -35,10 +127,10 @@ def get_default_corpus_key(lang: str) -> str:
     if lang == "en":
         return "top-5k"
     # default for Italian
-    return "660000_parole_italiane"
+    return "parole_verbi_nomi"
 
 
-def get_corpora_for_lang(lang: str) -> Dict[str, Tuple[str, str]]:
+def get_corpora_for_lang(lang: str) -> Dict[str, CorpusDefinition]:
     """Return the mapping of corpora for a given language code."""
     lang = (lang or "it").lower()
     if lang not in CORPORA:
@@ -46,6 +138,217 @@ def get_corpora_for_lang(lang: str) -> Dict[str, Tuple[str, str]]:
     return CORPORA[lang]
 
 
+def normalize_corpus_choice(lang: str | None, corpus_key: str | None) -> Tuple[str, str]:
+    """
+    Return a valid (lang, corpus_key) pair.
+
+    Unknown languages fall back to Italian, unknown or missing corpus keys
+    fall back to the per-language default.
+    """
+    lang = (lang or "it").lower()
+    if lang not in ("it", "en"):
+        lang = "it"
+
+    corpora_for_lang = get_corpora_for_lang(lang)
+    if corpus_key is None or corpus_key not in corpora_for_lang:
+        corpus_key = get_default_corpus_key(lang)
+
+    return lang, corpus_key
+
+
+def get_data_path(lang: str, filename: str) -> str:
+    """Return the absolute path of a word list of a language."""
+    return os.path.join(APP_DIR, "data", DATA_FOLDERS.get(lang, "italian"), filename)
+
+
+def get_corpus_paths(lang: str, corpus_key: str) -> List[str]:
+    """Return the paths of every file a corpus is built from, exclusions and rankings included."""
+    definition = get_corpora_for_lang(lang)[corpus_key]
+    filenames = definition.sources + definition.exclude
+    filenames += tuple(filename for filename in definition.ranking if filename not in filenames)
+    return [get_data_path(lang, filename) for filename in filenames]
+
+
+def get_source_names(lang: str, corpus_key: str) -> Tuple[str, ...]:
+    """Return the names of the sources of a corpus, in tag bit order."""
+    return tuple(os.path.splitext(filename)[0] for filename in get_corpora_for_lang(lang)[corpus_key].sources)
+
+
+def read_word_list(path: str) -> List[str]:
+    """
+    Read a word list, keeping only non-empty alphabetic entries (compound
+    words such as "abat-jour" included).
+    """
+    with open(path, "r") as file:
+        return [
+            line.strip()
+            for line in file
+            if line.strip() and line.strip().replace("-", "").replace("'", "").isalpha()
+        ]
+
+
+def merge_corpus(
+    lang: str, corpus_key: str
+) -> Tuple[List[str], Dict[str, Tuple[str, ...]], Dict[str, int], Dict[str, int]]:
+    """
+    Merge the sources of a corpus into one folded, deduplicated word list.
+
+    Words are folded with the alphabet of the language; an excluded word
+    removes every spelling folding to the same letters.
+
+    Returns:
+        tuple: ``(words, spellings, tags, ranks)``: the folded words, their
+        original spellings (see ``Alphabet.fold_words``) and, for each
+        word, the bitmask of the sources containing it and its frequency
+        rank (see ``CorpusDefinition``)
+
+    Raises:
+        OSError: If a file of the definition can't be read
+    """
+    definition = get_corpora_for_lang(lang)[corpus_key]
+    alphabet = get_alphabet(lang)
+    fold = alphabet.fold
+
+    excluded = set()
+    for filename in definition.exclude:
+        excluded.update(fold(word) for word in read_word_list(get_data_path(lang, filename)))
+
+    tags = {}
+    originals = []
+    for bit, filename in enumerate(definition.sources):
+        for word in read_word_list(get_data_path(lang, filename)):
+            folded = fold(word)
+            if folded and folded not in excluded:
+                tags[folded] = tags.get(folded, 0) | 1 << bit
+                originals.append(word)
+    words, spellings = alphabet.fold_words(originals)
+
+    ranks = {}
+    for filename in definition.ranking:
+        for word in read_word_list(get_data_path(lang, filename)):
+            ranks.setdefault(fold(word), len(ranks))
+    unranked = max(len(ranks), len(words))
+    ranks = {word: ranks.get(word, unranked) for word in words}
+    return words, spellings, tags, ranks
+
+
+def load_corpus_words(lang: str, corpus_key: str) -> List[str]:
+    """Return the merged, folded words of a corpus."""
+    return merge_corpus(lang, corpus_key)[0]
+
+
+def build_corpus_index(lang: str, corpus_key: str, trie_class=None):
+    """
+    Build the merged word index of a corpus, with its spellings, source
+    tags and word ranks.
+
+    Args:
+        trie_class (type): ``Trie`` or ``Dafsa`` (default from settings)
+    """
+    words, spellings, tags, ranks = merge_corpus(lang, corpus_key)
+    index = (trie_class or get_trie_class())()
+    for word in words:
+        index.add(word, tags[word], ranks[word])
+    index.compile()
+    index.spellings = spellings
+    index.sources = get_source_names(lang, corpus_key)
+    logger.info(
+        "Built %s/%s: %d words from %d sources into %s",
+        lang, corpus_key, len(words), len(index.sources), type(index).__name__,
+    )
+    return index
+
+
+def get_compiled_path(lang: str, corpus_key: str) -> str:
+    """Return the path of the precompiled binary index of a corpus."""
+    compiled_dir = getattr(settings, "ANAGRAM_COMPILED_DIR", None) or os.path.join(APP_DIR, "data", "compiled")
+    return os.path.join(compiled_dir, lang, f"{corpus_key}.dafsa")
+
+
+def load_compiled_index(lang: str, corpus_key: str) -> Dafsa | None:
+    """
+    Memory-map the precompiled index of a corpus, if a usable one exists.
+
+    Returns None when the index is missing, older than one of its files,
+    built from other sources or written with another format version;
+    callers then build from the text.
+    """
+    compiled_path = get_compiled_path(lang, corpus_key)
+    try:
+        compiled_mtime = os.path.getmtime(compiled_path)
+        if any(compiled_mtime < os.path.getmtime(path) for path in get_corpus_paths(lang, corpus_key)):
+            logger.warning("Compiled index %s is stale, run build_corpora", compiled_path)
+            return None
+        index = Dafsa.load(compiled_path)
+        if index.sources != get_source_names(lang, corpus_key):
+            logger.warning("Compiled index %s has other sources, run build_corpora", compiled_path)
+            return None
+        return index
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning("Ignoring compiled index: %s", e)
+        return None
+
+
+def _build_generator(lang: str, corpus_key: str) -> AnagramGenerator:
+    index = None
+    if get_trie_class() is Dafsa:
+        index = load_compiled_index(lang, corpus_key)
+    if index is None:
+        index = build_corpus_index(lang, corpus_key)
+    return AnagramGenerator(
+        None,
+        corpus_name=get_corpora_for_lang(lang)[corpus_key].label,
+        index=index,
+        dead_end_table_size=getattr(settings, "ANAGRAM_DEAD_END_TABLE_SIZE", 100000),
+        alphabet=get_alphabet(lang),
+        log_searches=getattr(settings, "ANAGRAM_SEARCH_LOGGING", False),
+    )
+
+
+# Generators are built once per process and shared by every caller
+# (web views, Telegram handlers, management commands).
+corpus_registry = CorpusRegistry(_build_generator)
+
+# Concurrent identical searches run once, within the process and (through
+# lock files next to the shared result cache) across processes.
+single_flight = SingleFlight(getattr(settings, "ANAGRAM_SINGLE_FLIGHT_LOCK_DIR", None))
+
+
+def get_generator(lang: str | None, corpus_key: str | None = None) -> AnagramGenerator:
+    """Return the warm generator for a corpus, loading it on first use."""
+    lang, corpus_key = normalize_corpus_choice(lang, corpus_key)
+    return corpus_registry.get(lang, corpus_key)
+
+
+def get_preload_entries() -> List[Tuple[str, str]]:
+    """
+    Return the corpora listed in ``settings.ANAGRAM_PRELOAD_CORPORA``.
+
+    The setting maps a language code to a list of corpus keys; the special
+    value ``"*"`` selects every corpus of that language. Corpora not listed
+    are loaded lazily on first use.
+    """
+    configured = getattr(settings, "ANAGRAM_PRELOAD_CORPORA", {}) or {}
+    entries = []
+    for lang, keys in configured.items():
+        corpora_for_lang = get_corpora_for_lang(lang)
+        if keys == "*":
+            keys = list(corpora_for_lang)
+        for corpus_key in keys:
+            if corpus_key in corpora_for_lang:
+                entries.append((lang, corpus_key))
+    return entries
+
+
+def preload_corpora(entries: Iterable[Tuple[str, str]] | None = None) -> List[Tuple[str, str]]:
+    """Eagerly load the configured corpora into the process-wide registry."""
+    if entries is None:
+        entries = get_preload_entries()
+    return corpus_registry.preload(entries)
+
+
 def generate_anagrams(
     word: str,
     lang: str | None = None,
@@ -54,57 +357,188 @@ def generate_anagrams(
     min_word_length: int | None = None,
     max_word_length: int | None = None,
     prioritize_long_words: bool = True,
+    search_mode: str | None = None,
+    grouped: bool = False,
+    max_words: int | None = None,
+    exact_words: bool = False,
+    cancel=None,
+    progress=None,
+    use_cache: bool = True,
+    found=None,
 ):
     """
-    High-level helper that prepares the corpus and delegates to AnagramGenerator.
+    High-level helper that picks the warm corpus and delegates to AnagramGenerator.
+
+    ``search_mode`` is one of SEARCH_MODES and defaults to
+    ``settings.ANAGRAM_SEARCH_MODE``; ``grouped`` only applies to the
+    "signature" mode. ``max_words`` caps the number of words per anagram
+    (exactly that many with ``exact_words``).
+
+    Results are cached (see ``result_cache``) by sorted letters, corpus and
+    options, so any spelling of the same letters is only searched once, and
+    identical concurrent calls wait for a single search (see
+    ``singleflight``).
+
+    ``cancel`` (an object with ``is_set()``) lets the caller give up: the
+    search stops once every caller waiting for it has, and the result then
+    has ``stopped`` set to "cancelled" and, like the partial results of a
+    search that hit SEARCH_TIMEOUT, is not cached. ``progress`` is
+    passed on to ``AnagramGenerator.generate`` when this call runs the search,
+    and so is ``found``, called with each phrase (as a string) as it is
+    found: results served from the cache or by another caller's search
+    are only returned at the end.
+    With ``use_cache=False`` the search always runs, in this thread, and its
+    result isn't cached (e.g. to profile it).
 
     Parameters are intentionally loose to stay backward compatible with
     existing callers (web UI, Telegram bot).
     """
 
-    # Normalize language and pick the directory
-    lang = (lang or "it").lower()
-    if lang not in ("it", "en"):
-        lang = "it"
+    # Backward-compatible handling of lang / corpus_key:
+    # - if caller passes a logical key, use it
+    # - otherwise (or for unknown keys) use the per-language default
+    lang, corpus_key = normalize_corpus_choice(lang, corpus_key)
 
-    folder = "italian" if lang == "it" else "english"
-    corpora_for_lang = get_corpora_for_lang(lang)
+    if search_mode not in SEARCH_MODES:
+        search_mode = getattr(settings, "ANAGRAM_SEARCH_MODE", "trie")
 
-    # Backward-compatible handling of corpus / corpus_key:
-    # - if caller passes a logical key, use it
-    # - otherwise use per-language default
-    if corpus_key is None:
-        corpus_key = get_default_corpus_key(lang)
+    # Search the sorted letters: the order results are found in (which
+    # breaks ties between equally ranked phrases) then no longer depends on
+    # how the input was spelled, so every spelling shares one cache entry
+    word = canonical_letters(word, lang)
 
-    # Fallback to default if an unknown key is provided
-    if corpus_key not in corpora_for_lang:
-        corpus_key = get_default_corpus_key(lang)
+    cache_key = _result_key(
+        word,
+        lang,
+        corpus_key,
+        max_results,
+        min_word_length,
+        max_word_length,
+        prioritize_long_words,
+        search_mode,
+        grouped,
+        max_words,
+        exact_words,
+    )
 
-    corpus_filename, corpus_label = corpora_for_lang[corpus_key]
+    cache = get_result_cache() if use_cache else None
+    lookup = None
+    if cache is not None:
+        def lookup():
+            return cache.get(cache_key, version=RESULT_CACHE_VERSION)
 
-    corpus_path = os.path.join(APP_DIR, "data", folder, corpus_filename)
-    with open(corpus_path, "r") as file:
-        corpus_list: List[str] = [
-            line.strip()
-            for line in file
-            if line.strip() and line.strip().isalpha()
-        ]
+        cached = lookup()
+        if cached is not None:
+            return cached
 
-    generator = AnagramGenerator(corpus_list, corpus_name=corpus_label)
+    def search(flight_cancel):
+        results = _search_anagrams(
+            word,
+            lang,
+            corpus_key,
+            max_results,
+            min_word_length,
+            max_word_length,
+            prioritize_long_words,
+            search_mode,
+            grouped,
+            max_words,
+            exact_words,
+            flight_cancel,
+            progress,
+            found,
+        )
+        # Partial results of a cancelled or timed out search must not be served to others
+        if cache is not None and is_cacheable(results):
+            cache.set(cache_key, results, version=RESULT_CACHE_VERSION)
+        return results
 
-    # Internal cap for search space: independent from user-facing max_results.
-    # The user-facing "number of results" should act on the *final* list,
-    # not on the raw generation depth/limit.
-    internal_max_results = 10000
+    if not use_cache:
+        return search(cancel)
+
+    # Identical concurrent requests (same letters and options) share one search
+    results = single_flight.do(cache_key, search, lookup, timeout=SEARCH_TIMEOUT * 2, cancel=cancel)
+    if results is None:
+        # Cancelled while waiting for a search run by another caller
+        results = {
+            "success": False,
+            "n_results": 0,
+            "anagrams": [],
+            "corpus_key": corpus_key,
+            "search_mode": search_mode,
+            "stopped": "cancelled",
+        }
+    return results
+
+
+def _result_key(
+    word,
+    lang,
+    corpus_key,
+    max_results,
+    min_word_length,
+    max_word_length,
+    prioritize_long_words,
+    search_mode,
+    grouped,
+    max_words,
+    exact_words,
+):
+    """Return the result cache key of a ``generate_anagrams`` search."""
+    return make_result_key(
+        word,
+        lang,
+        corpus_key,
+        max_results=max_results,
+        min_word_length=min_word_length,
+        max_word_length=max_word_length,
+        prioritize_long_words=bool(prioritize_long_words),
+        search_mode=search_mode,
+        grouped=bool(grouped),
+        max_words=max_words or None,
+        exact_words=bool(exact_words and max_words),
+    )
+
+
+def _search_anagrams(
+    word,
+    lang,
+    corpus_key,
+    max_results,
+    min_word_length,
+    max_word_length,
+    prioritize_long_words,
+    search_mode,
+    grouped,
+    max_words,
+    exact_words,
+    cancel,
+    progress,
+    found=None,
+):
+    """Run the search behind ``generate_anagrams``, without caching."""
+    generator = corpus_registry.get(lang, corpus_key)
 
     results = generator.generate(
         word,
-        max_results=internal_max_results,
-        timeout=30,
+        max_results=SEARCH_MAX_RESULTS,
+        timeout=SEARCH_TIMEOUT,
         prioritize_long_words=prioritize_long_words,
         min_word_length=min_word_length,
         max_word_length=max_word_length,
+        search_mode=search_mode,
+        grouped=grouped,
+        # Only the best max_results phrases are shown: search for those
+        # directly instead of sorting the first SEARCH_MAX_RESULTS found
+        top_k=max_results if prioritize_long_words or search_mode == "ranked" else None,
+        max_words=max_words,
+        exact_words=exact_words,
+        workers=getattr(settings, "ANAGRAM_PARALLEL_WORKERS", 0),
+        cancel=cancel,
+        progress=progress,
+        found=found and (lambda phrase: found(" ".join(phrase))),
     )
+    record_search(results["telemetry"])
 
     # Convert nested list of words to strings for consumers (web UI, Telegram)
     results["anagrams"] = [
@@ -117,7 +551,129 @@ def generate_anagrams(
     # Ensure n_results reflects the final, possibly truncated list
     results["n_results"] = len(results["anagrams"])
 
-    # Also expose which corpus key was used, for UI / Telegram
+    # Also expose which corpus key and search mode were used, for UI / Telegram
     results["corpus_key"] = corpus_key
+    results["search_mode"] = search_mode
 
     return results
+
+
+def iter_anagrams(
+    word: str,
+    lang: str | None = None,
+    corpus_key: str | None = None,
+    max_results: int | None = None,
+    min_word_length: int | None = None,
+    max_word_length: int | None = None,
+    search_mode: str | None = None,
+    grouped: bool = False,
+    stats: dict | None = None,
+    max_words: int | None = None,
+    exact_words: bool = False,
+    cancel=None,
+    progress=None,
+    use_cache: bool = True,
+):
+    """
+    Streaming counterpart of ``generate_anagrams``: yield anagram strings as
+    the search finds them, in search order.
+
+    Word length and word count constraints are enforced by the search and at
+    most ``max_results`` phrases are yielded. ``stats`` (optional dict) is
+    filled with the search statistics plus ``corpus`` and ``corpus_key``.
+    ``cancel`` and ``progress`` are passed on to
+    ``AnagramGenerator.iter_generate``.
+
+    Streams share the result cache with ``generate_anagrams``: a search
+    already cached under the same key is replayed instead of run, and a
+    stream read to its end stores its phrases (unless cancelled or timed
+    out, or with more than SEARCH_MAX_RESULTS of them).
+    """
+    lang, corpus_key = normalize_corpus_choice(lang, corpus_key)
+    generator = corpus_registry.get(lang, corpus_key)
+
+    if search_mode not in SEARCH_MODES:
+        search_mode = getattr(settings, "ANAGRAM_SEARCH_MODE", "trie")
+
+    if stats is None:
+        stats = {}
+    stats.update({
+        "corpus": generator.corpus_name,
+        "corpus_key": corpus_key,
+        "search_mode": search_mode,
+    })
+
+    # Same letters, order and key as the equivalent generate_anagrams call
+    word = canonical_letters(word, lang)
+    cache = get_result_cache() if use_cache else None
+    if cache is not None:
+        cache_key = _result_key(
+            word,
+            lang,
+            corpus_key,
+            max_results,
+            min_word_length,
+            max_word_length,
+            False,
+            search_mode,
+            grouped,
+            max_words,
+            exact_words,
+        )
+        cached = cache.get(cache_key, version=RESULT_CACHE_VERSION)
+        if cached is not None:
+            stats.update({
+                "calls": (cached.get("telemetry") or {}).get("nodes", 0),
+                "stopped": cached.get("stopped"),
+            })
+            yield from cached["anagrams"]
+            return
+
+    search = generator.iter_generate(
+        word,
+        timeout=SEARCH_TIMEOUT,
+        search_mode=search_mode,
+        grouped=grouped,
+        stats=stats,
+        min_word_length=min_word_length,
+        max_word_length=max_word_length,
+        max_words=max_words,
+        exact_words=exact_words,
+        cancel=cancel,
+        progress=progress,
+    )
+    anagrams = []
+    try:
+        for phrase in search:
+            anagram = " ".join(phrase)
+            yield anagram
+            anagrams.append(anagram)
+            if max_results is not None and len(anagrams) >= max_results:
+                stats["stopped"] = "max_results"
+                break
+    finally:
+        search.close()
+        if "calls" in stats:
+            telemetry = generator.telemetry(generator.normalize(word), stats, len(anagrams), search_mode)
+            record_search(telemetry)
+
+    # Only reached when the stream was read to its end
+    if cache is not None and is_cacheable(stats) and max_results is not None and max_results <= SEARCH_MAX_RESULTS:
+        cache.set(
+            cache_key,
+            {
+                "success": bool(anagrams),
+                "n_results": len(anagrams),
+                "recursion": stats["calls"],
+                "words": stats["completed_words"],
+                "prunes": stats["prunes"],
+                "memo_hits": stats["memo_hits"],
+                "anagrams": anagrams,
+                "corpus": generator.corpus_name,
+                "stopped": stats["stopped"],
+                "telemetry": telemetry,
+                "corpus_key": corpus_key,
+                "search_mode": search_mode,
+            },
+            version=RESULT_CACHE_VERSION,
+        )
@@ -1,30 +1,39 @@
+import hmac
 import json
+import math
+import queue
+import re
+import threading
+import time
 from urllib.parse import unquote
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.http import require_GET, require_POST
 
+from .cancellation import latest_searches
+from .jobs import JobQueueFull, job_manager
+from .metrics import registry as metrics_registry
 from .models import UserAnagramSettings
+from .profiling import profile_search
 from .utils import (
+    SEARCH_MODES,
     generate_anagrams,
     get_corpora_for_lang,
     get_default_corpus_key,
+    iter_anagrams,
 )
 
 
-@require_GET
-def fetch_hints(request, lang, chars):
+def _get_generation_settings(request, lang):
     """
-    Compute anagrams for the unused characters and return hints plus stats.
+    Return the generate_anagrams keyword arguments for this request.
 
     If the user is authenticated and has saved settings, those are applied.
-    Otherwise reasonable defaults are used.
+    Anonymous users may carry their settings in the ``anagram_settings``
+    cookie. Otherwise an empty dict is returned and defaults are used.
     """
-    chars = chars.strip()
-
-    # Base language and defaults
-    lang = (lang or "it").lower()
-
     # Try to load per-user settings if available
     settings_kwargs = {}
     if request.user.is_authenticated:
@@ -40,6 +49,8 @@ def fetch_hints(request, lang, chars):
                 "max_word_length": user_settings.max_word_length,
                 "prioritize_long_words": user_settings.prioritize_long_words,
                 "max_results": user_settings.max_results,
+                "max_words": user_settings.max_words or None,
+                "exact_words": user_settings.exact_words,
             }
     else:
         # Anonymous users: if a settings cookie is present, use it
@@ -67,6 +78,7 @@ def fetch_hints(request, lang, chars):
                 min_word_length = _to_int(cookie_data.get("min_word_length"), 2)
                 max_word_length = _to_int(cookie_data.get("max_word_length"), 20)
                 max_results = _to_int(cookie_data.get("max_results"), 500)
+                max_words = _to_int(cookie_data.get("max_words"), 0)
 
                 if min_word_length < 1:
                     min_word_length = 1
@@ -74,8 +86,11 @@ def fetch_hints(request, lang, chars):
                     max_word_length = min_word_length
                 if max_results < 1:
                     max_results = 1
+                if max_words < 0:
+                    max_words = 0
 
                 prioritize_long_words = bool(cookie_data.get("prioritize_long_words", True))
+                exact_words = bool(cookie_data.get("exact_words", False))
 
                 settings_kwargs = {
                     "corpus_key": corpus_key,
@@ -83,24 +98,301 @@ def fetch_hints(request, lang, chars):
                     "max_word_length": max_word_length,
                     "prioritize_long_words": prioritize_long_words,
                     "max_results": max_results,
+                    "max_words": max_words or None,
+                    "exact_words": exact_words,
                 }
 
-    hints = generate_anagrams(
-        chars,
-        lang,
-        **settings_kwargs,
+    return settings_kwargs
+
+
+# Seconds without a new hint after which the stream sends a progress line,
+# which is also how a dropped connection gets noticed
+STREAM_HEARTBEAT_INTERVAL = 1.0
+
+_CLIENT_ID_RE = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+
+
+def _get_search_client(request):
+    """
+    Return who a hint search belongs to, for superseding older searches:
+    the session if there is one, else the per-page ``client`` id sent by
+    the web UI, else None.
+    """
+    if request.session.session_key:
+        return "s:" + request.session.session_key
+    client = request.GET.get("client", "")
+    if _CLIENT_ID_RE.match(client):
+        return "c:" + client
+    return None
+
+
+@require_GET
+def fetch_hints(request, lang, chars):
+    """
+    Compute anagrams for the unused characters and return hints plus stats.
+
+    If the user is authenticated and has saved settings, those are applied.
+    Otherwise reasonable defaults are used.
+
+    Optional query parameters: ``mode`` ("trie", "signature" or "ranked") picks the
+    search strategy, ``grouped=1`` returns signature results in compact
+    "{amor|mora|roma}" form.
+
+    A newer hint request from the same client cancels this one, which then
+    answers with status "cancelled".
+
+    Staff users may add ``profile=1``: the search then runs uncached under
+    the profiler, is stored as a SearchProfile and the response carries
+    ``profile_id`` and ``profile_url`` (its admin page).
+    """
+    chars = chars.strip()
+
+    # Base language and defaults
+    lang = (lang or "it").lower()
+
+    settings_kwargs = _get_generation_settings(request, lang)
+    search_kwargs = dict(
+        settings_kwargs,
+        search_mode=request.GET.get("mode"),
+        grouped=request.GET.get("grouped") in ("1", "true"),
+        cancel=latest_searches.start(_get_search_client(request)),
     )
 
-    return JsonResponse(
-        {
-            "status": "success",
-            "hints_html": hints.get("anagrams", []),
-            "n_results": hints.get("n_results", 0),
-            "recursions": hints.get("recursion", 0),
-            "corpus": hints.get("corpus"),
-            "corpus_key": hints.get("corpus_key"),
+    profile = None
+    if request.GET.get("profile") in ("1", "true") and request.user.is_staff:
+        hints, profile = profile_search(request.user, chars, lang, **search_kwargs)
+    else:
+        hints = generate_anagrams(chars, lang, **search_kwargs)
+
+    if hints.get("stopped") == "cancelled":
+        return JsonResponse({"status": "cancelled"})
+
+    payload = {
+        "status": "success",
+        "hints_html": hints.get("anagrams", []),
+        "n_results": hints.get("n_results", 0),
+        "recursions": hints.get("recursion", 0),
+        "corpus": hints.get("corpus"),
+        "corpus_key": hints.get("corpus_key"),
+        "search_mode": hints.get("search_mode"),
+        # Figures of the search that produced these hints (maybe an earlier, cached one)
+        "stats": hints.get("telemetry"),
+    }
+    if profile is not None:
+        payload["profile_id"] = profile.pk
+        payload["profile_url"] = reverse("admin:service_anagrams_searchprofile_change", args=[profile.pk])
+    return JsonResponse(payload)
+
+
+@require_GET
+def fetch_hints_stream(request, lang, chars):
+    """
+    Streaming variant of ``fetch_hints``: newline-delimited JSON.
+
+    Each hint is sent as soon as the search finds it, as
+    ``{"type": "hint", "hint": "..."}``; a final
+    ``{"type": "done", ...}`` line carries the same stats as ``fetch_hints``.
+    Hints arrive in search order. When the user prioritizes long words (or
+    asks for the "ranked" mode) they are provisional: each one made the
+    best ``max_results`` when found but may have been outranked since, and
+    the "done" line also carries ``hints``, the final list in the order of
+    ``fetch_hints``. A cached search sends no provisional hints, only that
+    list.
+
+    The search runs in a helper thread. While it finds nothing new, a
+    ``{"type": "progress", ...}`` line is sent every
+    STREAM_HEARTBEAT_INTERVAL: when the client has gone away, that write
+    fails and the search is cancelled instead of running to its timeout.
+    A newer hint request from the same client cancels this one too; the
+    stream then ends with a "done" line with status "cancelled".
+    """
+    chars = chars.strip()
+    lang = (lang or "it").lower()
+
+    settings_kwargs = _get_generation_settings(request, lang)
+    # Long words first unless the user said otherwise, as in fetch_hints
+    prioritize_long_words = settings_kwargs.pop("prioritize_long_words", True)
+    settings_kwargs.setdefault("max_results", 500)
+    token = latest_searches.start(_get_search_client(request))
+    search_mode = request.GET.get("mode")
+    if search_mode not in SEARCH_MODES:
+        search_mode = getattr(settings, "ANAGRAM_SEARCH_MODE", "trie")
+    grouped = request.GET.get("grouped") in ("1", "true")
+    ordered = prioritize_long_words or search_mode == "ranked"
+
+    def stream():
+        stats = {}
+        progress = {"calls": 0}
+        messages = queue.Queue()
+
+        def search():
+            try:
+                if ordered:
+                    # Hints are sent as they enter the best max_results, the final ranking at the end
+                    results = generate_anagrams(
+                        chars,
+                        lang,
+                        prioritize_long_words=prioritize_long_words,
+                        search_mode=search_mode,
+                        grouped=grouped,
+                        cancel=token,
+                        progress=lambda calls, found: progress.update(calls=calls),
+                        found=lambda hint: messages.put(("hint", hint)),
+                        **settings_kwargs,
+                    )
+                    stats.update({
+                        "calls": results.get("recursion", 0),
+                        "stopped": results.get("stopped"),
+                        "corpus": results.get("corpus"),
+                        "corpus_key": results.get("corpus_key"),
+                        "search_mode": results.get("search_mode"),
+                        "hints": results.get("anagrams", []),
+                    })
+                else:
+                    for hint in iter_anagrams(
+                        chars,
+                        lang,
+                        search_mode=search_mode,
+                        grouped=grouped,
+                        stats=stats,
+                        cancel=token,
+                        progress=lambda calls: progress.update(calls=calls),
+                        **settings_kwargs,
+                    ):
+                        messages.put(("hint", hint))
+                        if token.is_set():
+                            break
+            except Exception as e:
+                messages.put(("error", e))
+            else:
+                messages.put(("done", None))
+
+        worker = threading.Thread(target=search, name="hints-stream", daemon=True)
+        worker.start()
+        n_results = 0
+        try:
+            while True:
+                try:
+                    kind, value = messages.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield json.dumps({"type": "progress", "recursions": progress["calls"]}) + "\n"
+                    continue
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    break
+                n_results += 1
+                yield json.dumps({"type": "hint", "hint": value}) + "\n"
+        finally:
+            # Client gone (the server closed this generator) or stream over
+            token.set()
+
+        done = {
+            "type": "done",
+            "status": "cancelled" if stats.get("stopped") == "cancelled" else "success",
+            "n_results": n_results,
+            "recursions": stats.get("calls", 0),
+            "corpus": stats.get("corpus"),
+            "corpus_key": stats.get("corpus_key"),
+            "search_mode": stats.get("search_mode"),
         }
-    )
+        if ordered:
+            done["hints"] = stats.get("hints", [])
+            done["n_results"] = len(done["hints"])
+        yield json.dumps(done) + "\n"
+
+    response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+    # Ask reverse proxies not to buffer, so hints reach the client immediately
+    response["X-Accel-Buffering"] = "no"
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+# Longest long-poll accepted by job_status, in seconds
+JOB_MAX_WAIT = 30
+
+
+def _job_payload(job):
+    """Public view of a job record."""
+    payload = {
+        "id": job["id"],
+        "state": job["state"],
+        "progress": job["progress"],
+        "cancel_requested": job.get("cancel_requested", False),
+        "elapsed": round(((job["finished"] or time.time()) - (job["started"] or job["created"])), 3),
+    }
+    if job["result"] is not None:
+        payload["result"] = job["result"]
+    if job["error"]:
+        payload["error"] = job["error"]
+    return payload
+
+
+@require_POST
+def create_job(request):
+    """
+    Start a background hint search and return its job id right away.
+
+    JSON body: ``chars`` (letters), optional ``lang``, ``mode`` and
+    ``grouped``. The user's settings apply as in ``fetch_hints``. Poll
+    ``job_status`` for progress and results.
+    """
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        data = {}
+
+    chars = str(data.get("chars") or "").strip()
+    if not chars:
+        return JsonResponse({"status": "error", "message": "No letters given."}, status=400)
+    lang = str(data.get("lang") or "it").lower()
+
+    settings_kwargs = _get_generation_settings(request, lang)
+    try:
+        job = job_manager.submit(
+            chars,
+            lang,
+            search_mode=data.get("mode"),
+            grouped=bool(data.get("grouped", False)),
+            **settings_kwargs,
+        )
+    except JobQueueFull:
+        return JsonResponse(
+            {"status": "error", "message": "Too many searches in progress, try again later."},
+            status=503,
+        )
+
+    return JsonResponse({"status": "success", "job": _job_payload(job)}, status=202)
+
+
+@require_GET
+def job_status(request, job_id):
+    """
+    Return a job's state, progress and, once finished, its results.
+
+    With ``?wait=<seconds>`` (at most JOB_MAX_WAIT) the response is held
+    until the job finishes or the time is up (long polling).
+    """
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        wait = 0
+    # NaN would pass both bounds below and hold the request until the job ends
+    wait = min(max(wait, 0), JOB_MAX_WAIT) if math.isfinite(wait) else 0
+
+    job = job_manager.wait(job_id, wait) if wait else job_manager.get(job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Unknown job."}, status=404)
+    return JsonResponse({"status": "success", "job": _job_payload(job)})
+
+
+@require_POST
+def cancel_job(request, job_id):
+    """Cancel a queued or running job."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Unknown job."}, status=404)
+    return JsonResponse({"status": "success", "job": _job_payload(job)})
 
 
 @require_GET
@@ -126,6 +418,8 @@ def get_user_settings(request):
             "max_word_length": settings_obj.max_word_length,
             "prioritize_long_words": settings_obj.prioritize_long_words,
             "max_results": settings_obj.max_results,
+            "max_words": settings_obj.max_words,
+            "exact_words": settings_obj.exact_words,
         }
     else:
         # Anonymous: just send sensible defaults (not stored in DB)
@@ -136,11 +430,13 @@ def get_user_settings(request):
             "max_word_length": 20,
             "prioritize_long_words": True,
             "max_results": 500,
+            "max_words": 0,
+            "exact_words": False,
         }
 
     corpora_list = [
-        {"key": key, "label": label}
-        for key, (filename, label) in corpora_for_lang.items()
+        {"key": key, "label": definition.label}
+        for key, definition in corpora_for_lang.items()
     ]
 
     return JsonResponse(
@@ -190,6 +486,7 @@ def save_user_settings(request):
     min_word_length = _to_int(data.get("min_word_length"), 2)
     max_word_length = _to_int(data.get("max_word_length"), 20)
     max_results = _to_int(data.get("max_results"), 500)
+    max_words = _to_int(data.get("max_words"), 0)
 
     # Basic sanity checks
     if min_word_length < 1:
@@ -198,8 +495,11 @@ def save_user_settings(request):
         max_word_length = min_word_length
     if max_results < 1:
         max_results = 1
+    if max_words < 0:
+        max_words = 0
 
     prioritize_long_words = bool(data.get("prioritize_long_words", True))
+    exact_words = bool(data.get("exact_words", False))
 
     settings_obj, _ = UserAnagramSettings.objects.get_or_create(user=request.user)
     settings_obj.corpus_key = corpus_key
@@ -207,6 +507,8 @@ def save_user_settings(request):
     settings_obj.max_word_length = max_word_length
     settings_obj.max_results = max_results
     settings_obj.prioritize_long_words = prioritize_long_words
+    settings_obj.max_words = max_words
+    settings_obj.exact_words = exact_words
     settings_obj.save()
 
     return JsonResponse(
@@ -218,6 +520,32 @@ def save_user_settings(request):
                 "max_word_length": settings_obj.max_word_length,
                 "prioritize_long_words": settings_obj.prioritize_long_words,
                 "max_results": settings_obj.max_results,
+                "max_words": settings_obj.max_words,
+                "exact_words": settings_obj.exact_words,
             },
         }
     )
+
+
+@require_GET
+def metrics(request):
+    """
+    Search metrics of this server process, in the Prometheus text format.
+
+    Served to staff users and to scrapers sending
+    ``Authorization: Bearer <settings.ANAGRAM_METRICS_TOKEN>``; anyone
+    else gets a 403. The client address isn't trusted: behind a reverse
+    proxy every request comes from the proxy.
+    """
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _has_metrics_token(request):
+    """True if the request carries the metrics bearer token (when one is set)."""
+    token = getattr(settings, "ANAGRAM_METRICS_TOKEN", None)
+    if not token:
+        return False
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), token.encode())
@@ -2,42 +2,15 @@
 print("[handlers.py] Importazione handler")
 
 from telethon import events
+from telethon.errors import MessageNotModifiedError
 from .client import client
-from service_anagrams.utils import generate_anagrams
+from .pages import PAGE_DATA_PREFIX, result_pages
+from .searches import chat_searches
+from .sender import send_queue
 import logging
 
 logger = logging.getLogger(__name__)
 
-MAX_MESSAGE_LENGTH = 4000  # 4096 è limite ufficiale, lascio un po' di margine
-
-def chunk_anagrams(anagrams):
-    """
-    Riceve una lista di anagrammi (stringhe).
-    Restituisce una lista di messaggi stringa, 
-    ognuno <= MAX_MESSAGE_LENGTH caratteri.
-    """
-    chunks = []
-    current_chunk = ""
-
-    for anagram in anagrams:
-        # +1 per il '\n' che aggiungiamo
-        addition = anagram + "\n"
-
-        # Se aggiungere questo anagramma supera il limite,
-        # allora chiudo il chunk corrente e ne inizio uno nuovo.
-        if len(current_chunk) + len(addition) > MAX_MESSAGE_LENGTH:
-            chunks.append(current_chunk.rstrip())  # tolgo spazio finale/newline
-            current_chunk = addition
-        else:
-            current_chunk += addition
-
-    # Aggiungo l'ultimo chunk se non vuoto
-    if current_chunk:
-        chunks.append(current_chunk.rstrip())
-
-    return chunks
-
-
 def register_handlers():
     print("[handlers.py] Registrazione handler sul client")
 
@@ -54,21 +27,53 @@ def register_handlers():
             print("[handlers.py] Messaggio vuoto, ignorato")
             return
 
-        anagrams = generate_anagrams(word, None, None, 500)
+        # Risposta immediata: la ricerca può richiedere diversi secondi
+        if chat_searches.busy():
+            ack = await send_queue.call(event.respond, f"In coda, cerco a breve gli anagrammi di \"{word}\"…")
+        else:
+            ack = await send_queue.call(event.respond, f"Cerco gli anagrammi di \"{word}\"…")
+
+        try:
+            anagrams = await chat_searches.search(event.chat_id, word)
+        except Exception:
+            logger.exception("[handlers.py] Errore nella ricerca di %r", word)
+            await send_queue.call(ack.edit, "Errore durante la ricerca, riprova più tardi.")
+            return
+
+        if anagrams is None:
+            # La stessa chat ha mandato un'altra parola nel frattempo
+            await send_queue.call(ack.edit, f"Ricerca di \"{word}\" annullata: c'è una parola più recente.")
+            return
 
         if not anagrams['success']:
-            await event.respond("Nessun anagramma trovato.")
+            await send_queue.call(ack.edit, "Nessun anagramma trovato.")
             return
         
         corpus_name = anagrams.get('corpus') or 'corpus predefinito'
-        await event.respond(
+        header = (
             f"Trovati {anagrams['n_results']} anagrammi "
             f"(corpus: {corpus_name}) "
             f"con {anagrams['recursion']} ricorsioni e {anagrams['words']} parole completate:"
         )
 
+        # Solo la prima pagina: le altre arrivano con i pulsanti
+        result_id = result_pages.store(header, anagrams['anagrams'])
+        text, buttons = result_pages.render(result_id, 0)
+        await send_queue.call(ack.edit, text, buttons=buttons)
+
+    @client.on(events.CallbackQuery(pattern=PAGE_DATA_PREFIX))
+    async def on_page_button(event):
+        parsed = result_pages.parse(event.data)
+        page = result_pages.render(*parsed) if parsed else None
+        if page is None:
+            await event.answer("Risultati scaduti, rimanda la parola.", alert=True)
+            return
 
-        chunks = chunk_anagrams(anagrams['anagrams'])
-        for chunk in chunks:
-            await event.respond(chunk)
+        text, buttons = page
+        await event.answer()
+        try:
+            await send_queue.call(event.edit, text, buttons=buttons)
+        except MessageNotModifiedError:
+            # Doppio clic sullo stesso pulsante
+            pass
 
@@ -1,20 +1,72 @@
 # run_telegram_bot.py
-print("[command] Esecuzione comando run_telegram_bot")
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service_anagrams.utils import CORPORA, get_default_corpus_key, get_preload_entries, preload_corpora
 
-from django.core.management.base import BaseCommand
-from service_telegram.client import start_client, client
-from service_telegram import handlers
 
 class Command(BaseCommand):
-    help = "Esegui il bot Telegram"
+    help = "Esegui il bot Telegram in un processo dedicato"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corpus",
+            action="append",
+            metavar="LANG/KEY",
+            help="Corpus da caricare all'avvio, es. it/60000_parole_italiane "
+                 "(ripetibile, default: settings.ANAGRAM_PRELOAD_CORPORA)",
+        )
+        parser.add_argument(
+            "--searches",
+            type=int,
+            help="Ricerche eseguite contemporaneamente "
+                 "(default: settings.TELEGRAM_MAX_CONCURRENT_SEARCHES)",
+        )
+
+    def handle(self, *args, **options):
+        entries = get_preload_entries()
+        if options["corpus"]:
+            entries = []
+            for item in options["corpus"]:
+                lang, _, corpus_key = item.partition("/")
+                if corpus_key not in CORPORA.get(lang, {}):
+                    raise CommandError(f"Corpus sconosciuto: {item}")
+                entries.append((lang, corpus_key))
+        else:
+            # Il bot cerca sempre nel corpus italiano predefinito
+            default = ("it", get_default_corpus_key("it"))
+            if default not in entries:
+                entries.append(default)
+
+        # Corpora caldi prima di accettare messaggi: la prima ricerca non paga il caricamento
+        start = time.perf_counter()
+        loaded = preload_corpora(entries)
+        self.stdout.write(
+            f"Corpora caricati in {time.perf_counter() - start:.2f}s: "
+            + (", ".join(f"{lang}/{key}" for lang, key in loaded) or "nessuno")
+        )
+
+        # Import qui: creare il client apre la sessione del bot
+        from service_telegram import handlers
+        from service_telegram.client import client, start_client_async
+        from service_telegram.searches import chat_searches
 
-    def handle(self, *args, **kwargs):
-        print("[command] Avvio client Telegram")
-        start_client()
+        if options["searches"]:
+            chat_searches.max_concurrent = options["searches"]
 
-        print("[command] Registro gli handler")
-        handlers.register_handlers()
+        async def run():
+            await start_client_async()
+            handlers.register_handlers()
+            self.stdout.write(self.style.SUCCESS(
+                f"Bot avviato ({chat_searches.max_concurrent} ricerche contemporanee), "
+                "in ascolto fino alla disconnessione"
+            ))
+            await client.run_until_disconnected()
 
-        print("[command] Eseguo client.run_until_disconnected() (bloccante)")
-        client.run_until_disconnected()
-        print("[command] client.run_until_disconnected() terminato")
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Bot fermato")
@@ -0,0 +1,136 @@
+# service_telegram/pages.py
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from telethon import Button
+
+logger = logging.getLogger(__name__)
+
+# Prefisso dei dati dei pulsanti di navigazione: "p:<id risultati>:<pagina>"
+PAGE_DATA_PREFIX = b"p:"
+
+MAX_MESSAGE_LENGTH = 4000  # 4096 è limite ufficiale, lascio un po' di margine
+
+def chunk_anagrams(anagrams, reserved=0):
+    """
+    Riceve una lista di anagrammi (stringhe).
+    Restituisce una lista di messaggi stringa, 
+    ognuno <= MAX_MESSAGE_LENGTH - reserved caratteri
+    (``reserved``: spazio per il testo aggiunto attorno a ogni messaggio).
+    """
+    chunks = []
+    current_chunk = ""
+
+    for anagram in anagrams:
+        # +1 per il '\n' che aggiungiamo
+        addition = anagram + "\n"
+
+        # Se aggiungere questo anagramma supera il limite,
+        # allora chiudo il chunk corrente e ne inizio uno nuovo.
+        if len(current_chunk) + len(addition) > MAX_MESSAGE_LENGTH - reserved:
+            chunks.append(current_chunk.rstrip())  # tolgo spazio finale/newline
+            current_chunk = addition
+        else:
+            current_chunk += addition
+
+    # Aggiungo l'ultimo chunk se non vuoto
+    if current_chunk:
+        chunks.append(current_chunk.rstrip())
+
+    return chunks
+
+
+class ResultPages:
+    """
+    Risultati di una ricerca divisi in pagine, conservati in una cache Django.
+
+    Il bot invia solo la prima pagina con i pulsanti "indietro / avanti";
+    le pagine successive vengono lette da qui senza ripetere la ricerca,
+    finché il risultato non scade dopo ``ttl`` secondi.
+    """
+
+    def __init__(self, page_size=50, ttl=3600, cache_alias=None):
+        """
+        Args:
+            page_size (int): Anagrammi per pagina
+            ttl (int): Secondi per cui un risultato resta disponibile
+            cache_alias (str): Alias della cache Django (default: "default",
+                locale al processo)
+        """
+        self.page_size = page_size
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        if self.cache_alias:
+            try:
+                return caches[self.cache_alias]
+            except InvalidCacheBackendError:
+                logger.warning("Telegram results cache %r is not configured in CACHES", self.cache_alias)
+        return caches["default"]
+
+    @staticmethod
+    def key(result_id):
+        return f"telegram:results:{result_id}"
+
+    def store(self, header, anagrams):
+        """
+        Divide gli anagrammi in pagine e le salva.
+
+        Args:
+            header (str): Riepilogo mostrato sopra ogni pagina
+            anagrams (list): Anagrammi trovati
+
+        Returns:
+            str: Id del risultato, usato dai pulsanti
+        """
+        pages = []
+        for start in range(0, len(anagrams), self.page_size):
+            # Una pagina lunga viene divisa ancora per stare in un messaggio
+            pages.extend(chunk_anagrams(anagrams[start:start + self.page_size], len(header) + 50))
+        result_id = uuid.uuid4().hex
+        self.cache.set(self.key(result_id), {"header": header, "pages": pages or [""]}, self.ttl)
+        return result_id
+
+    def render(self, result_id, page):
+        """
+        Restituisce testo e pulsanti di una pagina.
+
+        Returns:
+            tuple: (testo, pulsanti), oppure None se il risultato è scaduto
+        """
+        result = self.cache.get(self.key(result_id))
+        if result is None:
+            return None
+        pages = result["pages"]
+        page = max(0, min(page, len(pages) - 1))
+        text = f"{result['header']}\n\n{pages[page]}"
+        if len(pages) == 1:
+            return text, None
+        text += f"\n\nPagina {page + 1}/{len(pages)}"
+        buttons = []
+        if page > 0:
+            buttons.append(Button.inline("◀ Indietro", data=PAGE_DATA_PREFIX + f"{result_id}:{page - 1}".encode()))
+        if page < len(pages) - 1:
+            buttons.append(Button.inline("Avanti ▶", data=PAGE_DATA_PREFIX + f"{result_id}:{page + 1}".encode()))
+        return text, [buttons]
+
+    @staticmethod
+    def parse(data):
+        """Restituisce (id risultato, pagina) dai dati di un pulsante, o None."""
+        try:
+            result_id, page = data[len(PAGE_DATA_PREFIX):].decode().split(":")
+            return result_id, int(page)
+        except ValueError:
+            return None
+
+
+# Risultati paginati del bot Telegram
+result_pages = ResultPages(
+    page_size=getattr(settings, "TELEGRAM_PAGE_SIZE", 50),
+    ttl=getattr(settings, "TELEGRAM_RESULTS_TTL", 3600),
+    cache_alias=getattr(settings, "TELEGRAM_RESULTS_CACHE", None),
+)
@@ -0,0 +1,91 @@
+# service_telegram/searches.py
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+from service_anagrams.cancellation import latest_searches
+from service_anagrams.utils import generate_anagrams
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSearches:
+    """
+    Esegue le ricerche di anagrammi del bot fuori dal loop asyncio di Telethon.
+
+    Le ricerche girano su un pool di thread limitato, così il loop resta
+    libero di rispondere alle altre chat. Ogni chat ha al massimo una
+    ricerca utile: una nuova parola annulla quella ancora in coda o in
+    corso (tramite ``latest_searches``), e al più ``max_concurrent``
+    ricerche girano insieme per tutto il bot.
+
+    Un pool di thread e non di processi: corpora caricati, cache dei
+    risultati, single-flight e token di annullamento vivono nel processo.
+    La ricerca però è Python puro e tiene il GIL, che il loop riottiene
+    solo al cambio forzato dell'interprete (``sys.getswitchinterval()``,
+    5 ms): ogni risveglio del loop ritarda quindi di circa 5 ms per
+    ricerca in corso (misurato su un core: mediana 5-7 ms, p99 14-55 ms
+    con 1-2 ricerche), abbastanza per un bot.
+    """
+
+    def __init__(self, max_concurrent=2, max_results=500):
+        """
+        Args:
+            max_concurrent (int): Ricerche eseguite contemporaneamente
+            max_results (int): Anagrammi restituiti per ricerca
+        """
+        self.max_concurrent = max_concurrent
+        self.max_results = max_results
+        self._executor = None
+        self._semaphore = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrent,
+                thread_name_prefix="telegram-search",
+            )
+        return self._executor
+
+    @property
+    def semaphore(self):
+        # Creato al primo uso, dentro il loop del bot
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def busy(self):
+        """True se una nuova ricerca dovrebbe aspettare che se ne liberi una."""
+        return self.semaphore.locked()
+
+    async def search(self, chat_id, word):
+        """
+        Cerca gli anagrammi di ``word`` per la chat ``chat_id``.
+
+        Returns:
+            dict: Risultato di ``generate_anagrams``, oppure None se nel
+            frattempo la stessa chat ha chiesto un'altra parola
+        """
+        token = latest_searches.start(f"tg:{chat_id}")
+        async with self.semaphore:
+            if token.is_set():
+                return None
+            loop = asyncio.get_running_loop()
+            anagrams = await loop.run_in_executor(
+                self.executor,
+                partial(generate_anagrams, word, None, None, self.max_results, cancel=token),
+            )
+        if anagrams.get("stopped") == "cancelled":
+            return None
+        return anagrams
+
+
+# Ricerche del bot Telegram
+chat_searches = ChatSearches(
+    max_concurrent=getattr(settings, "TELEGRAM_MAX_CONCURRENT_SEARCHES", 2),
+    max_results=getattr(settings, "TELEGRAM_MAX_RESULTS", 500),
+)
@@ -0,0 +1,75 @@
+# service_telegram/sender.py
+import asyncio
+import logging
+
+from django.conf import settings
+from telethon.errors import FloodWaitError
+
+logger = logging.getLogger(__name__)
+
+
+class SendQueue:
+    """
+    Coda unica per i messaggi inviati (o modificati) dal bot.
+
+    Le chiamate a Telegram vengono eseguite una alla volta, distanziate di
+    almeno ``interval`` secondi. Se Telegram risponde con un FloodWaitError
+    la coda si ferma per il tempo richiesto e poi riprova la stessa
+    chiamata, invece di continuare a inviare e peggiorare il blocco.
+    """
+
+    def __init__(self, interval=0.05, max_retries=3):
+        """
+        Args:
+            interval (float): Secondi minimi tra due chiamate
+            max_retries (int): Nuovi tentativi dopo un FloodWaitError
+        """
+        self.interval = interval
+        self.max_retries = max_retries
+        self._queue = None
+        self._worker = None
+
+    async def call(self, func, *args, **kwargs):
+        """
+        Esegue ``await func(*args, **kwargs)`` quando arriva il suo turno.
+
+        Returns:
+            Il risultato della chiamata; le sue eccezioni arrivano al chiamante
+        """
+        if self._worker is None or self._worker.done():
+            # Creati al primo uso, dentro il loop del bot
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, kwargs, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            func, args, kwargs, future = await self._queue.get()
+            if future.done():
+                # Chiamante non più interessato
+                continue
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await func(*args, **kwargs)
+                except FloodWaitError as e:
+                    if attempt == self.max_retries:
+                        if not future.done():
+                            future.set_exception(e)
+                        break
+                    logger.warning("[sender.py] FloodWait: pausa di %s secondi", e.seconds)
+                    await asyncio.sleep(e.seconds + 1)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    break
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                    break
+            await asyncio.sleep(self.interval)
+
+
+# Invii del bot Telegram
+send_queue = SendQueue(interval=getattr(settings, "TELEGRAM_SEND_INTERVAL", 0.05))
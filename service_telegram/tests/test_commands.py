@@ -0,0 +1,72 @@
+import sys
+import types
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+import service_telegram
+from service_anagrams.utils import get_default_corpus_key
+
+from ..management.commands import run_telegram_bot
+from ..searches import ChatSearches
+
+
+class RunTelegramBotTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+        self.chat_searches = ChatSearches(max_concurrent=2)
+        self.addCleanup(self.chat_searches.executor.shutdown)
+
+        async def start_client_async():
+            self.calls.append("start")
+
+        async def run_until_disconnected():
+            self.calls.append("run")
+
+        # Moduli finti: importare quelli veri aprirebbe la sessione del bot
+        client = types.ModuleType("service_telegram.client")
+        client.client = types.SimpleNamespace(run_until_disconnected=run_until_disconnected)
+        client.start_client_async = start_client_async
+        handlers = types.ModuleType("service_telegram.handlers")
+        handlers.register_handlers = lambda: self.calls.append("register")
+
+        self.preload = mock.Mock(side_effect=lambda entries: self.calls.append("preload") or entries)
+        patches = [
+            mock.patch.dict(sys.modules, {"service_telegram.client": client, "service_telegram.handlers": handlers}),
+            mock.patch.object(service_telegram, "client", client, create=True),
+            mock.patch.object(service_telegram, "handlers", handlers, create=True),
+            mock.patch.object(run_telegram_bot, "preload_corpora", self.preload),
+            mock.patch("service_telegram.searches.chat_searches", self.chat_searches),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_bot(self, *args):
+        out = StringIO()
+        call_command("run_telegram_bot", *args, stdout=out)
+        return out.getvalue()
+
+    def test_corpora_loaded_before_the_bot_starts(self):
+        out = self.run_bot("--searches", "3")
+        self.assertEqual(self.calls, ["preload", "start", "register", "run"])
+        self.assertIn(("it", get_default_corpus_key("it")), self.preload.call_args.args[0])
+        self.assertEqual(self.chat_searches.max_concurrent, 3)
+        self.assertIn("3 ricerche contemporanee", out)
+        self.assertTrue(out.rstrip().endswith("Bot fermato"))
+
+    def test_corpus_option(self):
+        corpus = f"it/{get_default_corpus_key('it')}"
+        out = self.run_bot("--corpus", corpus)
+        self.preload.assert_called_once_with([("it", get_default_corpus_key("it"))])
+        self.assertIn("Corpora caricati in", out)
+        self.assertIn(corpus, out)
+        self.assertIn("2 ricerche contemporanee", out)
+
+    def test_unknown_corpus(self):
+        for corpus in ("it/nessuno", "xx/60000_parole_italiane", "it"):
+            with self.subTest(corpus=corpus), self.assertRaisesMessage(CommandError, "Corpus sconosciuto"):
+                self.run_bot("--corpus", corpus)
+        self.assertEqual(self.calls, [])
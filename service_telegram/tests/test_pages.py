@@ -0,0 +1,82 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from ..pages import MAX_MESSAGE_LENGTH, PAGE_DATA_PREFIX, ResultPages, chunk_anagrams
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "telegram-tests": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "telegram-tests"},
+}
+
+
+class ChunkAnagramsTests(SimpleTestCase):
+    def test_fills_messages_up_to_the_limit(self):
+        # 9 lettere + "\n": 400 anagrammi riempiono esattamente un messaggio
+        anagrams = [f"{n:09d}" for n in range(MAX_MESSAGE_LENGTH // 10 + 1)]
+        chunks = chunk_anagrams(anagrams)
+        self.assertEqual([chunk.count("\n") + 1 for chunk in chunks], [MAX_MESSAGE_LENGTH // 10, 1])
+        self.assertEqual("\n".join(chunks).split("\n"), anagrams)
+
+    def test_reserved_space(self):
+        anagrams = ["roma amor"] * 1000
+        for reserved in (0, 100, 3990):
+            with self.subTest(reserved=reserved):
+                chunks = chunk_anagrams(anagrams, reserved)
+                self.assertTrue(all(len(chunk) <= MAX_MESSAGE_LENGTH - reserved for chunk in chunks))
+                self.assertEqual(sum(chunk.count("\n") + 1 for chunk in chunks), len(anagrams))
+
+    def test_no_anagrams(self):
+        self.assertEqual(chunk_anagrams([]), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResultPagesTests(SimpleTestCase):
+    def setUp(self):
+        self.pages = ResultPages(page_size=2, ttl=60, cache_alias="telegram-tests")
+        self.pages.cache.clear()
+
+    def buttons(self, rendered):
+        """(etichetta, pagina di destinazione) dei pulsanti di una pagina."""
+        _, buttons = rendered
+        return [(button.text, ResultPages.parse(button.data)[1]) for button in buttons[0]]
+
+    def test_pages_and_buttons(self):
+        result_id = self.pages.store("5 anagrammi", ["a", "b", "c", "d", "e"])
+        first, middle, last = (self.pages.render(result_id, page) for page in range(3))
+        self.assertEqual(first[0], "5 anagrammi\n\na\nb\n\nPagina 1/3")
+        self.assertEqual(last[0], "5 anagrammi\n\ne\n\nPagina 3/3")
+        self.assertEqual(self.buttons(first), [("Avanti ▶", 1)])
+        self.assertEqual(self.buttons(middle), [("◀ Indietro", 0), ("Avanti ▶", 2)])
+        self.assertEqual(self.buttons(last), [("◀ Indietro", 1)])
+
+    def test_out_of_range_pages_are_clamped(self):
+        result_id = self.pages.store("3 anagrammi", ["a", "b", "c"])
+        self.assertEqual(self.pages.render(result_id, 10), self.pages.render(result_id, 1))
+        self.assertEqual(self.pages.render(result_id, -1), self.pages.render(result_id, 0))
+
+    def test_single_page_has_no_buttons(self):
+        result_id = self.pages.store("2 anagrammi", ["a", "b"])
+        self.assertEqual(self.pages.render(result_id, 0), ("2 anagrammi\n\na\nb", None))
+        result_id = self.pages.store("Nessun anagramma", [])
+        self.assertEqual(self.pages.render(result_id, 0), ("Nessun anagramma\n\n", None))
+
+    def test_long_page_split_into_messages(self):
+        pages = ResultPages(page_size=1000, cache_alias="telegram-tests")
+        result_id = pages.store("Risultati", ["roma amor mora"] * 1000)
+        text, buttons = pages.render(result_id, 0)
+        self.assertLessEqual(len(text), MAX_MESSAGE_LENGTH)
+        self.assertIsNotNone(buttons)
+
+    def test_expired_result(self):
+        result_id = self.pages.store("3 anagrammi", ["a", "b", "c"])
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.pages.render(result_id, 1))
+        self.assertIsNone(self.pages.render("unknown", 0))
+
+    def test_parse(self):
+        self.assertEqual(ResultPages.parse(PAGE_DATA_PREFIX + b"abc123:2"), ("abc123", 2))
+        for data in (PAGE_DATA_PREFIX + b"abc123", PAGE_DATA_PREFIX + b"abc123:x", PAGE_DATA_PREFIX + b"a:1:2"):
+            with self.subTest(data=data):
+                self.assertIsNone(ResultPages.parse(data))
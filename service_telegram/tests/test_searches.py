@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from service_anagrams.cancellation import LatestSearches
+
+from .. import searches
+from ..searches import ChatSearches
+
+
+class ChatSearchesTests(SimpleTestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.words = []
+        patches = [
+            mock.patch.object(searches, "generate_anagrams", side_effect=self.search),
+            mock.patch.object(searches, "latest_searches", LatestSearches()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def search(self, word, lang, corpus_key, max_results, cancel=None):
+        """Sostituto di generate_anagrams: gira finché viene rilasciato o annullato."""
+        with self.lock:
+            self.words.append(word)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            deadline = time.monotonic() + 5
+            while not self.release.is_set() and time.monotonic() < deadline:
+                if cancel.is_set():
+                    return {"anagrams": [], "stopped": "cancelled"}
+                time.sleep(0.01)
+            return {"anagrams": [word], "n_results": 1, "stopped": None}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    async def wait_running(self, n):
+        deadline = time.monotonic() + 5
+        while self.running != n:
+            self.assertLess(time.monotonic(), deadline, f"{n} searches never ran")
+            await asyncio.sleep(0.01)
+
+    async def test_caps_concurrent_searches(self):
+        chat_searches = ChatSearches(max_concurrent=2)
+        self.addCleanup(chat_searches.executor.shutdown)
+        tasks = [asyncio.create_task(chat_searches.search(chat_id, f"roma{chat_id}")) for chat_id in range(4)]
+        await self.wait_running(2)
+        self.assertTrue(chat_searches.busy())
+        # Il loop resta libero mentre le ricerche girano nel pool
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.running, 2)
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+        self.assertEqual([result["anagrams"] for result in results], [[f"roma{chat_id}"] for chat_id in range(4)])
+        self.assertEqual(self.peak, 2)
+        self.assertFalse(chat_searches.busy())
+
+    async def test_new_word_cancels_running_search_of_the_chat(self):
+        chat_searches = ChatSearches(max_concurrent=2)
+        self.addCleanup(chat_searches.executor.shutdown)
+        first = asyncio.create_task(chat_searches.search(1, "roma"))
+        other_chat = asyncio.create_task(chat_searches.search(2, "mora"))
+        await self.wait_running(2)
+        second = asyncio.create_task(chat_searches.search(1, "amor"))
+        self.assertIsNone(await first)
+        await self.wait_running(2)
+        self.release.set()
+        self.assertEqual((await second)["anagrams"], ["amor"])
+        self.assertEqual((await other_chat)["anagrams"], ["mora"])
+
+    async def test_new_word_drops_queued_search_of_the_chat(self):
+        chat_searches = ChatSearches(max_concurrent=1)
+        self.addCleanup(chat_searches.executor.shutdown)
+        busy = asyncio.create_task(chat_searches.search(2, "mora"))
+        await self.wait_running(1)
+        queued = asyncio.create_task(chat_searches.search(1, "roma"))
+        latest = asyncio.create_task(chat_searches.search(1, "amor"))
+        await asyncio.sleep(0.05)
+        self.release.set()
+        self.assertIsNone(await queued)
+        self.assertEqual((await latest)["anagrams"], ["amor"])
+        await busy
+        # La ricerca superata non è mai partita
+        self.assertEqual(self.words, ["mora", "amor"])
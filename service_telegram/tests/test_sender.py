@@ -0,0 +1,85 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase
+from telethon.errors import FloodWaitError
+
+from ..sender import SendQueue
+
+
+real_sleep = asyncio.sleep
+
+
+def flood_wait(seconds):
+    return FloodWaitError(request=None, capture=seconds)
+
+
+class SendQueueTests(SimpleTestCase):
+    def setUp(self):
+        # Le pause vengono registrate invece di essere attese
+        self.sleeps = []
+
+        async def sleep(seconds):
+            self.sleeps.append(seconds)
+            await real_sleep(0)
+
+        patch = mock.patch("service_telegram.sender.asyncio.sleep", new=sleep)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.queue = SendQueue(interval=0.05, max_retries=2)
+
+    async def call_error(self, func):
+        """
+        Eccezione sollevata da una chiamata in coda.
+
+        assertRaises ripulisce i frame del traceback, tra cui quello del
+        worker ancora sospeso, e lo chiuderebbe: l'eccezione si cattura qui.
+        """
+        try:
+            await self.queue.call(func)
+        except Exception as e:
+            return e
+        self.fail("la chiamata non ha sollevato eccezioni")
+
+    async def stop(self):
+        """Ferma il worker della coda, dentro il loop del test."""
+        self.queue._worker.cancel()
+        await real_sleep(0)
+        self.assertTrue(self.queue._worker.cancelled())
+
+    async def test_retries_after_flood_wait(self):
+        send = mock.AsyncMock(side_effect=[flood_wait(7), flood_wait(3), "sent"])
+        self.assertEqual(await self.queue.call(send, "chat", text="ciao"), "sent")
+        self.assertEqual(send.await_args_list, [mock.call("chat", text="ciao")] * 3)
+        # Pausa richiesta da Telegram più un secondo, poi l'intervallo tra due invii
+        self.assertEqual(self.sleeps, [8, 4, 0.05])
+        await self.stop()
+
+    async def test_gives_up_after_max_retries(self):
+        send = mock.AsyncMock(side_effect=flood_wait(5))
+        self.assertIsInstance(await self.call_error(send), FloodWaitError)
+        self.assertEqual(send.await_count, 3)
+        self.assertEqual(self.sleeps, [6, 6, 0.05])
+        # La coda continua a servire le chiamate successive
+        self.assertEqual(await self.queue.call(mock.AsyncMock(return_value="sent")), "sent")
+        await self.stop()
+
+    async def test_other_errors_are_not_retried(self):
+        send = mock.AsyncMock(side_effect=ValueError("message too long"))
+        self.assertIsInstance(await self.call_error(send), ValueError)
+        self.assertEqual(send.await_count, 1)
+        self.assertEqual(self.sleeps, [0.05])
+        await self.stop()
+
+    async def test_calls_run_one_at_a_time_in_order(self):
+        order = []
+
+        async def send(text):
+            order.append(text)
+            return text
+
+        results = [await self.queue.call(send, text) for text in ("uno", "due", "tre")]
+        self.assertEqual(results, ["uno", "due", "tre"])
+        self.assertEqual(order, ["uno", "due", "tre"])
+        self.assertEqual(self.sleeps, [0.05, 0.05, 0.05])
+        await self.stop()